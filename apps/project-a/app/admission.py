@@ -0,0 +1,234 @@
+"""
+Admission control: per-class concurrency limits, token-bucket rate limits
+and bounded wait queues.
+
+Routes are assigned to a traffic class with ``@admission.limit("list")``.
+Every class has its own slots, tokens and queue, so heavy list endpoints
+saturating their class never slow the admission of point reads. A request
+that finds no free slot waits in its class queue until its deadline. It is
+rejected at once with ``503`` and a ``Retry-After`` header when the bucket
+is empty, the queue is full, the estimated wait is past the deadline, or the
+deadline passes while it waits. The ASGI app admits its routes through
+the same classes with ``TrafficClass.acquire_async``.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from functools import wraps
+
+from flask import jsonify, request
+
+# concurrency: requests served at once; rate: tokens per second (0 = no rate
+# limit); burst: bucket size; queue: requests allowed to wait for a slot;
+# timeout: longest wait in seconds
+LIMIT_KEYS = ("concurrency", "rate", "burst", "queue", "timeout")
+DEFAULT_CLASSES = {
+    "list": {"concurrency": 4, "rate": 0, "burst": 0, "queue": 16, "timeout": 1.0},
+    "point": {"concurrency": 32, "rate": 0, "burst": 0, "queue": 64, "timeout": 0.5},
+    "write": {"concurrency": 8, "rate": 0, "burst": 0, "queue": 32, "timeout": 1.0},
+}
+SERVICE_TIME_WEIGHT = 0.2  # EWMA weight of the newest service time
+BUSY_MESSAGE = "Server is busy, retry later"
+
+# Returned by TrafficClass._admit for a request that joined the queue
+_QUEUED = object()
+
+
+def retry_after_header(seconds):
+    """``Retry-After`` value for a rejection: whole seconds, at least 1."""
+    return str(max(1, math.ceil(seconds)))
+
+
+def parse_limits(text):
+    """Parse ``"concurrency=4,rate=50,queue=16"`` into a limits dict."""
+    limits = {}
+    for part in filter(None, (part.strip() for part in text.split(","))):
+        key, _, value = part.partition("=")
+        key = key.strip()
+        if key not in LIMIT_KEYS:
+            raise ValueError(f"Unknown admission limit '{key}' (expected one of {', '.join(LIMIT_KEYS)})")
+        limits[key] = float(value)
+    return limits
+
+
+class TokenBucket:
+    """Refills ``rate`` tokens per second up to ``burst``."""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.clock = clock
+        self.tokens = self.burst
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Take a token; returns 0, or the seconds until one is available."""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class TrafficClass:
+    """Slots, token bucket and wait queue shared by the routes of one class."""
+
+    def __init__(self, name, concurrency, rate=0, burst=0, queue=0, timeout=1.0):
+        if concurrency < 1:
+            raise ValueError(f"Admission class '{name}' needs a concurrency of at least 1")
+        self.name = name
+        self.concurrency = int(concurrency)
+        self.max_queue = int(queue)
+        self.timeout = float(timeout)
+        self.bucket = TokenBucket(rate, burst or rate) if rate > 0 else None
+        self.active = 0
+        self.waiting = 0
+        self.service_time = 0.0
+        self._cond = threading.Condition()
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = {"rate": 0, "queue_full": 0, "deadline": 0, "timeout": 0}
+
+    def estimated_wait(self, position):
+        """Expected seconds until the ``position``-th waiter gets a slot."""
+        return math.ceil(position / self.concurrency) * self.service_time
+
+    def acquire(self):
+        """Take a slot, waiting up to ``timeout``.
+
+        Returns None once a slot is held, or the suggested retry delay in
+        seconds when the request is rejected.
+        """
+        retry_after = self._admit()
+        if retry_after is _QUEUED:
+            return self._wait_for_slot()
+        return retry_after
+
+    async def acquire_async(self, executor=None):
+        """``acquire`` for an event loop.
+
+        Admission and rejection are decided on the loop; only a request that
+        has to queue waits for its slot on ``executor``, which should have a
+        thread per queue place.
+        """
+        retry_after = self._admit()
+        if retry_after is _QUEUED:
+            return await asyncio.get_running_loop().run_in_executor(executor, self._wait_for_slot)
+        return retry_after
+
+    def _admit(self):
+        """Take a free slot, reject, or join the queue (returns ``_QUEUED``)."""
+        if self.bucket is not None:
+            wait = self.bucket.take()
+            if wait:
+                with self._cond:
+                    self.rejected["rate"] += 1
+                return wait
+
+        with self._cond:
+            # Newcomers never overtake requests that are already queued
+            if self.active < self.concurrency and not self.waiting:
+                self.active += 1
+                self.admitted += 1
+                return None
+            estimate = self.estimated_wait(self.waiting + 1)
+            if self.waiting >= self.max_queue:
+                self.rejected["queue_full"] += 1
+                return estimate
+            if estimate > self.timeout:
+                self.rejected["deadline"] += 1
+                return estimate
+            self.waiting += 1
+            return _QUEUED
+
+    def _wait_for_slot(self):
+        with self._cond:
+            try:
+                has_slot = self._cond.wait_for(lambda: self.active < self.concurrency, self.timeout)
+            finally:
+                self.waiting -= 1
+            if not has_slot:
+                self.rejected["timeout"] += 1
+                return self.estimated_wait(self.waiting + 1)
+            self.active += 1
+            self.admitted += 1
+            self.queued += 1
+            return None
+
+    def release(self, seconds):
+        """Free a slot after a request that took ``seconds``."""
+        with self._cond:
+            self.active -= 1
+            self.service_time += SERVICE_TIME_WEIGHT * (seconds - self.service_time)
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "concurrency": self.concurrency,
+                "active": self.active,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected": dict(self.rejected),
+                "service_ms": round(self.service_time * 1000, 3),
+            }
+
+
+class AdmissionController:
+    """Route decorators that admit requests through their traffic class."""
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.classes = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("ADMISSION_ENABLED", True)
+        app.config.setdefault("ADMISSION_CLASSES", {})
+        self.enabled = bool(app.config["ADMISSION_ENABLED"])
+        configured = app.config["ADMISSION_CLASSES"]
+        self.classes = {
+            name: TrafficClass(name, **{**DEFAULT_CLASSES.get(name, {}), **configured.get(name, {})})
+            for name in {**DEFAULT_CLASSES, **configured}
+        }
+
+    @staticmethod
+    def reject(retry_after):
+        response = jsonify({"error": BUSY_MESSAGE})
+        response.status_code = 503
+        response.headers["Retry-After"] = retry_after_header(retry_after)
+        return response
+
+    def limit(self, class_name, methods=None):
+        """Admit a view's requests through ``class_name``.
+
+        With ``methods``, only requests using one of them are limited.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or methods is not None and request.method not in methods:
+                    return view(*args, **kwargs)
+                traffic_class = self.classes[class_name]
+                retry_after = traffic_class.acquire()
+                if retry_after is not None:
+                    return self.reject(retry_after)
+                start = time.perf_counter()
+                try:
+                    return view(*args, **kwargs)
+                finally:
+                    traffic_class.release(time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        return {name: traffic_class.stats() for name, traffic_class in sorted(self.classes.items())}
@@ -0,0 +1,412 @@
+"""
+ASGI entry point with async user, product and order handlers.
+
+The handlers share the stores, schemas, inventory, response cache and order
+event log of ``main.py``; only the request and response plumbing differs,
+and response bodies are byte-for-byte those of the Flask app. Large lists
+are encoded, and large bodies gzip-compressed, on a small thread pool
+(``ASGI_SERIALIZE_WORKERS``) so the event loop keeps serving other
+connections meanwhile. New orders and status changes, which wait for the
+order event log's fsync, run on the loop's default executor.
+
+Routes are admitted through the same admission classes as their Flask
+counterparts (``main.admission``; a request that has to queue waits on the
+``admission`` thread pool, not on the loop), and routes with roles are
+checked against ``main.authorizer`` like ``require_roles``, so rejections
+are the same ``503``, ``401`` and ``403`` responses.
+
+Run it with any ASGI server::
+
+    uvicorn asgi:app
+
+or with ``python asgi.py`` (port ``ASGI_PORT``, default 5002), which uses
+uvicorn when it is installed and the built-in asyncio server otherwise. The
+built-in server answers ``413`` to bodies over ``ASGI_MAX_BODY_BYTES``
+(default 1 MiB).
+"""
+
+import asyncio
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from common_utils import get_env_var
+from data_models import InvalidTransitionError, InventoryError, OrderStatus, to_json
+
+import main
+from admission import BUSY_MESSAGE, retry_after_header
+from authz import USER_HEADER
+
+# Lists of at least this many items are encoded on the serializer pool
+OFFLOAD_MIN_ITEMS = int(get_env_var("ASGI_OFFLOAD_MIN_ITEMS", "100"))
+# Bodies of at least this many bytes are compressed on the serializer pool
+OFFLOAD_MIN_BYTES = int(get_env_var("ASGI_OFFLOAD_MIN_BYTES", "65536"))
+serializer_pool = ThreadPoolExecutor(
+    max_workers=int(get_env_var("ASGI_SERIALIZE_WORKERS", "2")), thread_name_prefix="serialize",
+)
+# One thread per admission queue place, so queued requests never wait for a thread
+admission_pool = ThreadPoolExecutor(
+    max_workers=max(1, sum(traffic_class.max_queue for traffic_class in main.admission.classes.values())),
+    thread_name_prefix="admission",
+)
+
+
+class Request:
+    """The parts of an HTTP request the handlers use."""
+
+    __slots__ = ("method", "path", "query_string", "headers", "body")
+
+    def __init__(self, scope, body):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query_string = scope.get("query_string", b"").decode("latin-1")
+        self.headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        self.body = body
+
+    @property
+    def full_path(self):
+        """Path and query string, formatted like Flask's ``request.full_path``."""
+        return f"{self.path}?{self.query_string}"
+
+    def arg(self, name, type=str):
+        """A query parameter converted with ``type``, or None if missing or invalid."""
+        values = parse_qs(self.query_string).get(name)
+        try:
+            return type(values[0]) if values else None
+        except ValueError:
+            return None
+
+    def json(self):
+        """The JSON body, or None if it is missing or malformed."""
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return None
+
+    def accepts_gzip(self):
+        for coding in self.headers.get("accept-encoding", "").split(","):
+            name, _, params = coding.partition(";")
+            if name.strip().lower() in ("gzip", "*"):
+                _, _, quality = params.partition("q=")
+                try:
+                    return float(quality or 1) > 0
+                except ValueError:
+                    return False
+        return False
+
+
+class Response:
+    """A JSON response; ``entry`` is set for bodies from the response cache."""
+
+    __slots__ = ("body", "status", "entry", "headers")
+
+    def __init__(self, body, status=200, entry=None, headers=()):
+        self.body = body
+        self.status = status
+        self.entry = entry
+        self.headers = headers
+
+
+def encode(obj):
+    # Same bytes as jsonify through ModelJSONProvider
+    return to_json(obj) + b"\n"
+
+
+def json_response(obj, status=200):
+    return Response(encode(obj), status)
+
+
+async def offload(function, *args):
+    """Run CPU-heavy work on the serializer pool."""
+    return await asyncio.get_running_loop().run_in_executor(serializer_pool, function, *args)
+
+
+async def encode_list(items):
+    if len(items) >= OFFLOAD_MIN_ITEMS:
+        return await offload(encode, items)
+    return encode(items)
+
+
+# Cache misses being encoded, by (full path, generations); concurrent misses share one
+_pending_entries = {}
+
+
+async def cached_list(request, tags, load):
+    """Serve a list from the shared response cache, encoding it on a miss."""
+    key = request.full_path
+    entry, generations = main.response_cache.lookup(key, tags)
+    if entry is None:
+        pending_key = (key, generations)
+        task = _pending_entries.get(pending_key)
+        if task is None:
+            async def build():
+                body = await encode_list(load())
+                return main.response_cache.store(key, body, 200, "application/json", generations)
+
+            task = _pending_entries[pending_key] = asyncio.ensure_future(build())
+            task.add_done_callback(lambda _: _pending_entries.pop(pending_key, None))
+        # Shielded: a disconnecting client must not cancel the build for the others
+        entry = await asyncio.shield(task)
+    return Response(entry.body, entry=entry)
+
+
+async def compress(request, response):
+    """The body to send, gzip-compressed when the Flask app would compress it."""
+    compressor = main.compressor
+    body = response.body
+    if not (compressor.level > 0 and len(body) >= compressor.min_size and 200 <= response.status < 300
+            and request.accepts_gzip()):
+        return body, False
+    entry = response.entry
+    if entry is not None and entry.gzipped is not None:
+        return entry.gzipped, True
+    gzipped = await offload(compressor.compress, body) if len(body) >= OFFLOAD_MIN_BYTES \
+        else compressor.compress(body)
+    if entry is not None:
+        entry.gzipped = gzipped
+    return gzipped, True
+
+
+ROUTES = []
+
+
+def route(method, path, limit=None, roles=()):
+    """Register a handler; ``<int:name>`` path segments are passed as ints.
+
+    Args:
+        limit: Admission class of the route, as in ``admission.limit``
+        roles: Roles the caller needs, as in ``require_roles``
+    """
+    pattern = re.compile("^" + re.sub(r"<int:(\w+)>", r"(?P<\1>\\d+)", path) + "$")
+
+    def decorator(handler):
+        ROUTES.append((method, pattern, guarded(handler, limit, frozenset(roles))))
+        return handler
+    return decorator
+
+
+def guarded(handler, limit, required):
+    """Wrap a handler in its admission class and role check."""
+    if required:
+        inner = handler
+
+        async def handler(request, **params):
+            # A role cache miss asks the (blocking) role source
+            denied = await asyncio.get_running_loop().run_in_executor(
+                None, main.authorizer.check, request.headers.get(USER_HEADER.lower()), required)
+            if denied is not None:
+                return json_response(*denied)
+            return await inner(request, **params)
+
+    if limit is None:
+        return handler
+
+    async def admitted(request, **params):
+        if not main.admission.enabled:
+            return await handler(request, **params)
+        traffic_class = main.admission.classes[limit]
+        retry_after = await traffic_class.acquire_async(admission_pool)
+        if retry_after is not None:
+            return Response(encode({"error": BUSY_MESSAGE}), 503,
+                            headers=[(b"retry-after", retry_after_header(retry_after).encode())])
+        start = time.perf_counter()
+        try:
+            return await handler(request, **params)
+        finally:
+            traffic_class.release(time.perf_counter() - start)
+    return admitted
+
+
+@route("GET", "/users", limit="list")
+async def list_users(request):
+    return await cached_list(request, ("users",), lambda: list(main.users.values()))
+
+
+@route("POST", "/users", limit="write")
+async def create_user(request):
+    data, errors = main.USER_SCHEMA.validate(request.json())
+    if errors:
+        return json_response(main.validation_error(errors), 400)
+    return json_response(main.create_user(data), 201)
+
+
+@route("GET", "/users/<int:user_id>", limit="point")
+async def get_user(request, user_id):
+    user = main.users.get(user_id)
+    if not user:
+        return json_response({"error": "User not found"}, 404)
+    return json_response(user)
+
+
+@route("GET", "/products", limit="list")
+async def list_products(request):
+    return await cached_list(request, ("products",),
+                             lambda: [main.product_listing(product) for product in main.products.values()])
+
+
+@route("GET", "/products/<int:product_id>", limit="point")
+async def get_product(request, product_id):
+    product = main.products.get(product_id)
+    if not product:
+        return json_response({"error": "Product not found"}, 404)
+    return json_response(product)
+
+
+@route("GET", "/orders", limit="list")
+async def list_orders(request):
+    return await cached_list(request, ("orders",), lambda: list(main.orders.values()))
+
+
+@route("POST", "/orders", limit="write")
+async def create_order(request):
+    data, errors = main.ORDER_SCHEMA.validate(request.json())
+    if errors:
+        return json_response(main.validation_error(errors), 400)
+    try:
+        # Waits for the event log's group commit, like status changes
+        order = await asyncio.get_running_loop().run_in_executor(None, main.create_order, data)
+    except InventoryError as e:
+        return json_response(*main.inventory_error(e))
+    return json_response(order, 201)
+
+
+@route("GET", "/orders/<int:order_id>", limit="point")
+async def get_order(request, order_id):
+    order = main.orders.get(order_id)
+    if not order:
+        return json_response({"error": "Order not found"}, 404)
+    return json_response(order)
+
+
+async def change_order_status(order, status):
+    # Waits for the event log's group commit; keep it off the event loop
+    await asyncio.get_running_loop().run_in_executor(None, main.change_order_status, order, status)
+
+
+@route("PATCH", "/orders/<int:order_id>/status", limit="write")
+async def update_order_status(request, order_id):
+    order = main.orders.get(order_id)
+    if not order:
+        return json_response({"error": "Order not found"}, 404)
+    data, errors = main.ORDER_STATUS_SCHEMA.validate(request.json())
+    if errors:
+        return json_response(main.validation_error(errors), 400)
+    try:
+        await change_order_status(order, data["status"])
+    except InvalidTransitionError as e:
+        return json_response({"error": str(e)}, 409)
+    return json_response(order)
+
+
+@route("POST", "/orders/<int:order_id>/cancel", limit="write")
+async def cancel_order(request, order_id):
+    order = main.orders.get(order_id)
+    if not order:
+        return json_response({"error": "Order not found"}, 404)
+    try:
+        await change_order_status(order, OrderStatus.CANCELLED)
+    except InvalidTransitionError:
+        return json_response({"error": f"Cannot cancel an order that is {order.status.value}"}, 409)
+    return json_response(order)
+
+
+@route("GET", "/stats", limit="point")
+async def get_stats(request):
+    return json_response(main.order_stats.snapshot(days=request.arg("days", int)))
+
+
+@route("GET", "/stats/users/<int:user_id>", limit="point")
+async def get_user_stats(request, user_id):
+    return json_response(main.order_stats.user(user_id))
+
+
+@route("GET", "/stats/check", limit="list", roles=("admin",))
+async def check_stats(request):
+    # Scans every order; keep it off the event loop
+    return json_response(await asyncio.get_running_loop().run_in_executor(None, main.stats_check))
+
+
+class ASGIApp:
+    """ASGI 3 application dispatching to the handlers in ``ROUTES``.
+
+    Args:
+        on_startup: Called on the lifespan startup event (e.g. to load data)
+    """
+
+    def __init__(self, on_startup=None):
+        self.on_startup = on_startup
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.http(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    if self.on_startup is not None:
+                        self.on_startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def http(self, scope, receive, send):
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        request = Request(scope, b"".join(chunks))
+
+        response = None
+        path_found = False
+        for method, pattern, handler in ROUTES:
+            match = pattern.match(request.path)
+            if match is None:
+                continue
+            path_found = True
+            if method == request.method:
+                params = {name: int(value) for name, value in match.groupdict().items()}
+                response = await handler(request, **params)
+                break
+        if response is None:
+            response = json_response({"error": "Method not allowed" if path_found else "Not found"},
+                                     405 if path_found else 404)
+
+        body, gzipped = await compress(request, response)
+        headers = [(b"content-type", b"application/json"), (b"vary", b"Accept-Encoding"),
+                   (b"content-length", str(len(body)).encode()), *response.headers]
+        if gzipped:
+            headers.append((b"content-encoding", b"gzip"))
+        await send({"type": "http.response.start", "status": response.status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+app = ASGIApp(on_startup=main.load_data)
+
+
+if __name__ == "__main__":
+    port = int(get_env_var("ASGI_PORT", "5002"))
+    try:
+        import uvicorn
+    except ImportError:  # fall back to the built-in server
+        uvicorn = None
+    print(f"Starting Project A (ASGI) on port {port}...")
+    if uvicorn is not None:
+        uvicorn.run(app, host="0.0.0.0", port=port)
+    else:
+        from asgi_server import run
+
+        run(app, host="0.0.0.0", port=port, max_body=int(get_env_var("ASGI_MAX_BODY_BYTES", str(1 << 20))))
@@ -0,0 +1,212 @@
+"""
+Minimal asyncio HTTP/1.1 server for ASGI applications.
+
+Used by ``python asgi.py`` when no ASGI server such as uvicorn is installed.
+It supports keep-alive connections, ``Content-Length`` request bodies and
+the lifespan protocol. Request bodies sent with chunked transfer encoding
+are refused with ``411``, a malformed ``Content-Length`` with ``400`` and a
+body over ``max_body`` bytes with ``413``. A connection that closes before
+its body is complete is dropped. Responses are buffered and sent with a
+``Content-Length`` header.
+"""
+
+import asyncio
+from http import HTTPStatus
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1 << 20
+
+
+class _Lifespan:
+    """Runs the app's lifespan protocol; apps that do not support it are skipped."""
+
+    def __init__(self, app):
+        self.app = app
+        self.events = asyncio.Queue()
+        self.started = asyncio.get_running_loop().create_future()
+        self.task = None
+
+    async def startup(self):
+        self.task = asyncio.ensure_future(self.run())
+        await self.events.put({"type": "lifespan.startup"})
+        message = await self.started
+        if message is not None and message["type"] == "lifespan.startup.failed":
+            raise RuntimeError(f"Application startup failed: {message.get('message', '')}")
+
+    async def shutdown(self):
+        if self.task is not None and not self.task.done():
+            await self.events.put({"type": "lifespan.shutdown"})
+            await self.task
+
+    async def run(self):
+        async def send(message):
+            if message["type"].startswith("lifespan.startup") and not self.started.done():
+                self.started.set_result(message)
+
+        try:
+            await self.app({"type": "lifespan", "asgi": {"version": "3.0"}}, self.events.get, send)
+        except Exception:
+            pass
+        if not self.started.done():
+            self.started.set_result(None)
+
+
+def _head(status, headers):
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ""
+    lines = [f"HTTP/1.1 {status} {reason}".encode("latin-1")]
+    lines.extend(name + b": " + value for name, value in headers)
+    return b"\r\n".join(lines) + b"\r\n\r\n"
+
+
+async def _respond(writer, status, body=b"", keep_alive=False):
+    headers = [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", str(len(body)).encode())]
+    if not keep_alive:
+        headers.append((b"connection", b"close"))
+    writer.write(_head(status, headers) + body)
+    await writer.drain()
+
+
+async def _handle_connection(app, reader, writer, max_body=MAX_BODY_BYTES):
+    server = writer.get_extra_info("sockname")
+    client = writer.get_extra_info("peername")
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+            except asyncio.LimitOverrunError:
+                await _respond(writer, 431)
+                return
+
+            lines = head[:-4].decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ")
+            except ValueError:
+                await _respond(writer, 400)
+                return
+            headers = []
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers.append((name.strip().lower().encode("latin-1"), value.strip().encode("latin-1")))
+            fields = dict(headers)
+            connection = fields.get(b"connection", b"").lower()
+            keep_alive = connection != b"close" if version == "HTTP/1.1" else connection == b"keep-alive"
+
+            if b"chunked" in fields.get(b"transfer-encoding", b"").lower():
+                await _respond(writer, 411)
+                return
+            try:
+                length = int(fields.get(b"content-length", b"0") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                await _respond(writer, 400)
+                return
+            if length > max_body:
+                await _respond(writer, 413)
+                return
+            try:
+                body = await reader.readexactly(length) if length else b""
+            except asyncio.IncompleteReadError:
+                return
+
+            path, _, query = target.partition("?")
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": version[5:],
+                "method": method,
+                "scheme": "http",
+                "path": path,
+                "raw_path": path.encode("latin-1"),
+                "query_string": query.encode("latin-1"),
+                "root_path": "",
+                "headers": headers,
+                "server": server[:2] if server else None,
+                "client": client[:2] if client else None,
+            }
+            request_sent = False
+            finished = asyncio.Event()
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    request_sent = True
+                    return {"type": "http.request", "body": body, "more_body": False}
+                # Nothing else arrives for this request; report the end once the app is done
+                await finished.wait()
+                return {"type": "http.disconnect"}
+
+            status = None
+            response_headers = []
+            chunks = []
+
+            async def send(message):
+                nonlocal status, response_headers
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    response_headers = [(name.lower(), value) for name, value in message.get("headers", ())
+                                        if name.lower() not in (b"content-length", b"connection")]
+                elif message["type"] == "http.response.body":
+                    chunks.append(message.get("body", b""))
+
+            try:
+                await app(scope, receive, send)
+            except Exception:
+                await _respond(writer, 500)
+                return
+            finally:
+                finished.set()
+            if status is None:
+                await _respond(writer, 500)
+                return
+
+            response_body = b"".join(chunks)
+            response_headers.append((b"content-length", str(len(response_body)).encode()))
+            if not keep_alive:
+                response_headers.append((b"connection", b"close"))
+            writer.write(_head(status, response_headers) + response_body)
+            await writer.drain()
+            if not keep_alive:
+                return
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(app, host="127.0.0.1", port=8000, lifespan=True, max_body=MAX_BODY_BYTES):
+    """Serve ``app`` until cancelled.
+
+    Args:
+        app: ASGI 3 application
+        host: Interface to listen on
+        port: TCP port
+        lifespan: Run the app's startup and shutdown events
+        max_body: Largest request body accepted, in bytes
+    """
+    events = _Lifespan(app) if lifespan else None
+    if events is not None:
+        await events.startup()
+    server = await asyncio.start_server(
+        lambda reader, writer: _handle_connection(app, reader, writer, max_body), host, port,
+        limit=MAX_HEADER_BYTES, backlog=1024,
+    )
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if events is not None:
+            await events.shutdown()
+
+
+def run(app, host="127.0.0.1", port=8000, **kwargs):
+    """Blocking ``serve``; stops on Ctrl+C."""
+    try:
+        asyncio.run(serve(app, host, port, **kwargs))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,58 @@
+"""
+Role checks for Flask (and ASGI) routes.
+
+The caller is identified by the ``X-User-Id`` header and their roles are
+resolved through a ``RoleCache``, so most checks never reach the role
+source. ``require_roles`` builds the frozenset of required roles once, when
+the route is decorated, and each request costs one cache lookup and a
+subset test.
+"""
+
+from functools import wraps
+
+from flask import jsonify, request
+
+USER_HEADER = "X-User-Id"
+
+
+def current_user_id():
+    """The caller's user id, or None without the header."""
+    return request.headers.get(USER_HEADER)
+
+
+class Authorizer:
+    """Route decorators backed by a role cache."""
+
+    def __init__(self, role_cache):
+        self.role_cache = role_cache
+
+    def check(self, user_id, required):
+        """None if ``user_id`` has every role in ``required``, else the error body and status.
+
+        401 without a user id, 403 when a role is missing and 503 when the
+        role source fails.
+        """
+        if not user_id:
+            return {"error": f"Missing {USER_HEADER} header"}, 401
+        try:
+            user_roles = self.role_cache.get(user_id)
+        except Exception:
+            return {"error": "Role lookup failed"}, 503
+        if not required <= user_roles:
+            return {"error": f"Requires roles: {sorted(required)}"}, 403
+        return None
+
+    def require_roles(self, *roles):
+        """Allow a route only for callers that have every one of ``roles`` (see ``check``)."""
+        required = frozenset(roles)
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                denied = self.check(current_user_id(), required)
+                if denied is not None:
+                    body, status = denied
+                    return jsonify(body), status
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
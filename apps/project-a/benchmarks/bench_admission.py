@@ -0,0 +1,130 @@
+"""
+Point-read latency under list-endpoint overload, with and without admission control.
+
+The app is started twice with the synthetic data of ``loadtest.py``, once
+with ``ADMISSION_ENABLED=0`` and once with the admission limits given here.
+Each run first measures ``GET /products/<id>`` alone at a fixed open-loop
+rate, then again while ``--list-connections`` clients hammer the full
+``GET /orders`` dump back to back. Every list request carries a unique query
+string so it misses the response cache and rebuilds the dump. The report
+shows point-read percentiles, list throughput and the 503s that admission
+control sent back.
+
+Usage:
+    python benchmarks/bench_admission.py --orders 1000 --list-connections 16 --point-rps 100 --duration 10
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from loadtest import Recorder, closed_loop, open_loop, start_server, summarize  # noqa: E402
+
+
+class PointReads:
+    """``GET /products/<id>`` for random products."""
+
+    def __init__(self, num_products: int, seed: int):
+        self.num_products = num_products
+        self.rng = random.Random(seed)
+
+    def next(self):
+        return "point", "GET", f"/products/{self.rng.randint(1, self.num_products)}", None
+
+
+class ListDumps:
+    """``GET /orders`` with a unique query string, so the response cache never hits."""
+
+    def __init__(self):
+        self.sequence = 0
+
+    def next(self):
+        self.sequence += 1
+        return "list", "GET", f"/orders?request={self.sequence}", None
+
+
+async def measure(target, args, overload: bool) -> dict:
+    start = time.perf_counter()
+    point = Recorder(start + args.warmup)
+    listing = Recorder(start + args.warmup)
+    end = start + args.warmup + args.duration
+    runs = [open_loop(target, PointReads(args.products, args.seed), point, args.point_connections,
+                      args.point_rps, end, "")]
+    if overload:
+        runs.append(closed_loop(target, ListDumps(), listing, args.list_connections, end, ""))
+    await asyncio.gather(*runs)
+    seconds = time.perf_counter() - point.measure_from
+    return {"point": summarize(point.results, seconds), "list": summarize(listing.results, seconds)}
+
+
+def run(args, environment: dict) -> dict:
+    saved = {name: os.environ.get(name) for name in environment}
+    os.environ.update(environment)
+    try:
+        process, base_url = start_server(args)
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name)
+            else:
+                os.environ[name] = value
+    host, port = base_url.rsplit("/", 1)[1].split(":")
+    try:
+        return {
+            "idle": asyncio.run(measure((host, int(port)), args, overload=False)),
+            "overload": asyncio.run(measure((host, int(port)), args, overload=True)),
+        }
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def row(label: str, phase: dict) -> str:
+    point, listing = phase["point"], phase["list"]
+    latency = point.get("latency_ms", {})
+    list_ok = listing["status_codes"].get("200", 0)
+    list_503 = listing["status_codes"].get("503", 0)
+    return (f"{label:<22}{latency.get('p50', 0):>9.2f}{latency.get('p99', 0):>9.2f}{latency.get('max', 0):>9.2f}"
+            f"{point['error_rate']:>9.2%}{list_ok / listing_seconds(phase):>10.1f}{list_503:>8}")
+
+
+def listing_seconds(phase: dict) -> float:
+    listing = phase["list"]
+    return listing["requests"] / listing["throughput_rps"] if listing["throughput_rps"] else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=1000, help="orders in the GET /orders dump")
+    parser.add_argument("--point-rps", type=float, default=100.0, help="open-loop rate of point reads")
+    parser.add_argument("--point-connections", type=int, default=64)
+    parser.add_argument("--list-connections", type=int, default=16, help="closed-loop list clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per phase")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--list-limits", default="concurrency=1,queue=2,timeout=0.2",
+                        help="ADMISSION_LIST for the admission-controlled run")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    args.server = "werkzeug"
+
+    results = {
+        "unlimited": run(args, {"ADMISSION_ENABLED": "0"}),
+        "admission": run(args, {"ADMISSION_ENABLED": "1", "ADMISSION_LIST": args.list_limits}),
+    }
+
+    print(f"GET /products/<id> at {args.point_rps:.0f} rps; {args.list_connections} clients on GET /orders "
+          f"({args.orders} orders); admission limits for lists: {args.list_limits}\n")
+    print(f"{'':<22}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>9}{'list/s':>10}{'503s':>8}")
+    for label, phases in results.items():
+        for phase in ("idle", "overload"):
+            print(row(f"{label}, {phase}", phases[phase]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Throughput and tail latency of the ASGI mode vs. the threaded WSGI server at high concurrency.
+
+Each mode is started with the synthetic data of ``loadtest.py`` and driven
+closed-loop with the same request mix at every ``--concurrency`` level:
+``--server werkzeug`` (one thread per connection) against ``--server asgi``
+(the async handlers of ``app/asgi.py`` on one event loop, with large bodies
+encoded on the serializer pool). ``--mix`` and ``--orders`` control how much
+of the load is large list responses.
+
+Usage:
+    python benchmarks/bench_asgi.py --concurrency 32 128 512 --duration 10
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from loadtest import DEFAULT_MIX, parse_mix, run_load, start_server  # noqa: E402
+
+MODES = ("werkzeug", "asgi")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[32, 128, 512])
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"endpoint weights (default {DEFAULT_MIX})")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--gzip", action="store_true", help="send Accept-Encoding: gzip")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    args.url = None
+    args.rps = None
+    levels = args.concurrency
+
+    print(f"{'mode':<10}{'conns':>7}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>9}")
+    for mode in MODES:
+        args.server = mode
+        process, base_url = start_server(args)
+        try:
+            for concurrency in levels:
+                args.concurrency = concurrency
+                overall = asyncio.run(run_load(args, base_url))["overall"]
+                latency = overall.get("latency_ms", {})
+                print(f"{mode:<10}{concurrency:>7}{overall['throughput_rps']:>10,.0f}{latency.get('p50', 0):>10.2f}"
+                      f"{latency.get('p99', 0):>10.2f}{latency.get('max', 0):>10.2f}{overall['error_rate']:>9.2%}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
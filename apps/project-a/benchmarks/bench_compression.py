@@ -0,0 +1,72 @@
+"""
+Benchmark gzip compression levels on a product list response.
+
+Encodes a synthetic product list the way ``GET /products`` does and reports,
+per compression level, the compressed size, ratio and compression /
+decompression time. With the response cache, compression is paid once per
+cache entry instead of on every request; the last column shows the CPU per
+request when an entry serves ``--hits`` requests.
+
+Usage:
+    python benchmarks/bench_compression.py --products 10000 --levels 1 3 6 9
+"""
+
+import argparse
+import gzip
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from data_models import Product, to_json
+
+
+def make_payload(num_products: int) -> bytes:
+    products = [
+        Product(
+            id=product_id,
+            name=f"Product {product_id}",
+            description=f"Description of product {product_id}",
+            price=Decimal(1000 + product_id % 9000) / 100,
+            sku=f"SKU-{product_id:07d}",
+            category_id=product_id % 50,
+            stock_quantity=product_id % 500,
+            tags=["electronics", "audio"],
+            created_at=datetime(2024, 1, 1),
+            updated_at=datetime(2024, 1, 1),
+        )
+        for product_id in range(1, num_products + 1)
+    ]
+    return to_json(products) + b"\n"
+
+
+def best_ms(function, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 3, 6, 9])
+    parser.add_argument("--hits", type=int, default=100, help="requests served per cache entry")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = make_payload(args.products)
+    print(f"payload: {args.products} products, {len(payload) / 1024:.1f}K uncompressed\n")
+    print(f"{'level':>5}{'size K':>10}{'ratio':>8}{'compress ms':>13}{'MB/s':>8}{'decompress ms':>15}"
+          f"{'cached ms/req':>15}")
+    for level in args.levels:
+        compress_ms, compressed = best_ms(lambda: gzip.compress(payload, compresslevel=level, mtime=0), args.repeat)
+        decompress_ms, _ = best_ms(lambda: gzip.decompress(compressed), args.repeat)
+        throughput = len(payload) / 2**20 / (compress_ms / 1000)
+        print(f"{level:>5}{len(compressed) / 1024:>10.1f}{len(payload) / len(compressed):>7.1f}x"
+              f"{compress_ms:>13.2f}{throughput:>8.0f}{decompress_ms:>15.2f}{compress_ms / args.hits:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
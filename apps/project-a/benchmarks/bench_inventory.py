@@ -0,0 +1,119 @@
+"""
+Stress test stock reservations under concurrent checkout.
+
+Worker threads place orders of 1-3 lines drawn mostly from a few hot SKUs,
+cancel a share of their successful orders, and the run checks that stock
+was never oversold: for every product, initial stock minus the stock held by
+the remaining reservations must equal what is still available. Throughput is
+compared with a variant that serializes all reservations behind one lock.
+
+Usage:
+    python benchmarks/bench_inventory.py --threads 16 --orders 20000 --hot-skus 3
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from data_models import Inventory, OutOfStockError
+
+
+class GlobalLockInventory(Inventory):
+    """Baseline: one lock around every reservation and release."""
+
+    def __init__(self):
+        super().__init__()
+        self._global_lock = threading.Lock()
+
+    def reserve(self, reservation_id, lines):
+        with self._global_lock:
+            return super().reserve(reservation_id, lines)
+
+    def release(self, reservation_id):
+        with self._global_lock:
+            return super().release(reservation_id)
+
+
+def run(inventory: Inventory, args) -> dict:
+    initial = {}
+    for product_id in range(1, args.products + 1):
+        stock = args.hot_stock if product_id <= args.hot_skus else args.stock
+        inventory.set_stock(product_id, stock)
+        initial[product_id] = stock
+
+    counters = {"reserved": 0, "rejected": 0, "cancelled": 0}
+    counters_lock = threading.Lock()
+    per_thread = args.orders // args.threads
+
+    def worker(worker_id: int):
+        rng = random.Random(args.seed * 1000 + worker_id)
+        reserved = rejected = cancelled = 0
+        for sequence in range(per_thread):
+            lines = []
+            for _ in range(rng.randint(1, 3)):
+                if rng.random() < args.hot_share:
+                    product_id = rng.randint(1, args.hot_skus)
+                else:
+                    product_id = rng.randint(1, args.products)
+                lines.append((product_id, rng.randint(1, 3)))
+            order_id = (worker_id, sequence)
+            try:
+                inventory.reserve(order_id, lines)
+            except OutOfStockError:
+                rejected += 1
+                continue
+            reserved += 1
+            if rng.random() < args.cancel_rate:
+                inventory.release(order_id)
+                cancelled += 1
+        with counters_lock:
+            counters["reserved"] += reserved
+            counters["rejected"] += rejected
+            counters["cancelled"] += cancelled
+
+    threads = [threading.Thread(target=worker, args=(worker_id,)) for worker_id in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    # Oversell check: initial = available + still-reserved for every product
+    held = {product_id: 0 for product_id in initial}
+    for reservation in inventory._reservations.values():
+        for product_id, quantity in reservation.items():
+            held[product_id] += quantity
+    consistent = all(
+        inventory.available(product_id) >= 0 and inventory.available(product_id) + held[product_id] == stock
+        for product_id, stock in initial.items()
+    )
+    return dict(counters, seconds=seconds, consistent=consistent,
+                hot_left=sum(inventory.available(product_id) for product_id in range(1, args.hot_skus + 1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--orders", type=int, default=20_000)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--hot-skus", type=int, default=3)
+    parser.add_argument("--hot-share", type=float, default=0.8, help="share of lines for hot SKUs")
+    parser.add_argument("--hot-stock", type=int, default=5000)
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--cancel-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads, {args.orders} orders, {args.hot_skus} hot SKUs ({args.hot_share:.0%} of lines)\n")
+    print(f"{'variant':<14}{'orders/s':>10}{'reserved':>10}{'rejected':>10}{'cancelled':>11}{'hot left':>10}  consistent")
+    for label, inventory in (("per-product", Inventory()), ("global lock", GlobalLockInventory())):
+        result = run(inventory, args)
+        throughput = (result["reserved"] + result["rejected"]) / result["seconds"]
+        print(f"{label:<14}{throughput:>10,.0f}{result['reserved']:>10}{result['rejected']:>10}"
+              f"{result['cancelled']:>11}{result['hot_left']:>10}  {result['consistent']}")
+
+
+if __name__ == "__main__":
+    main()
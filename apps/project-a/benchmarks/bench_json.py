@@ -0,0 +1,92 @@
+"""
+Benchmark JSON encoding of model lists.
+
+Compares Flask's default encoding of ``to_dict()`` results (what jsonify did
+before) with ``data_models.to_json`` on the model objects, checks that the
+output is identical and reports the best time of several runs.
+
+Usage:
+    python benchmarks/bench_json.py --products 100000 --orders 20000
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from data_models import Order, OrderItem, OrderStatus, Product, to_json
+
+
+def make_products(count: int, rng: random.Random):
+    return [
+        Product(
+            id=product_id,
+            name=f"Product {product_id}",
+            description=f"Description of product {product_id}",
+            price=Decimal(rng.randrange(100, 100_000)) / 100,
+            sku=f"SKU-{product_id:07d}",
+            category_id=rng.randrange(1, 50),
+            stock_quantity=rng.randrange(0, 500),
+            tags=["electronics", "audio"],
+            created_at=datetime(2024, 1, 1),
+            updated_at=datetime(2024, 1, 1),
+        )
+        for product_id in range(1, count + 1)
+    ]
+
+
+def make_orders(count: int, rng: random.Random):
+    return [
+        Order(
+            id=order_id,
+            user_id=rng.randrange(1, 1000),
+            status=rng.choice(list(OrderStatus)),
+            items=[
+                OrderItem(item_id, rng.randrange(1, 1000), "Product", "SKU-0000001",
+                          rng.randrange(1, 5), Decimal(rng.randrange(100, 10_000)) / 100)
+                for item_id in range(1, rng.randrange(2, 6))
+            ],
+            shipping_address="1 Main St",
+            order_date=datetime(2024, 1, 1),
+        )
+        for order_id in range(1, count + 1)
+    ]
+
+
+def to_dict_json(objects) -> bytes:
+    # Flask's DefaultJSONProvider with compact output
+    return json.dumps([obj.to_dict() for obj in objects], sort_keys=True, separators=(",", ":")).encode()
+
+
+def best_ms(function, objects, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(objects)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'payload':<18}{'to_dict ms':>12}{'to_json ms':>12}{'speedup':>10}  identical")
+    for label, objects in (
+        (f"{args.products} products", make_products(args.products, rng)),
+        (f"{args.orders} orders", make_orders(args.orders, rng)),
+    ):
+        baseline_ms, expected = best_ms(to_dict_json, objects, args.repeat)
+        direct_ms, encoded = best_ms(to_json, objects, args.repeat)
+        print(f"{label:<18}{baseline_ms:>12.1f}{direct_ms:>12.1f}{baseline_ms / direct_ms:>9.1f}x  {encoded == expected}")
+
+
+if __name__ == "__main__":
+    main()
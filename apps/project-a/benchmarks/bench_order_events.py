@@ -0,0 +1,118 @@
+"""
+Benchmark the order status event log.
+
+1. Durable appends from many threads: the group-committed OrderEventLog
+   versus writing and fsyncing every event on its own.
+2. Startup: replaying the binary log onto orders versus re-ingesting the
+   same status changes from JSON lines.
+
+Usage:
+    python benchmarks/bench_order_events.py --threads 32 --events 20000 --replay-events 1000000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from data_models import Order, OrderEventLog, OrderStatus, apply_order_events, read_order_events
+
+LIFECYCLE = [OrderStatus.CONFIRMED, OrderStatus.PROCESSING, OrderStatus.SHIPPED, OrderStatus.DELIVERED]
+
+
+def run_threads(threads: int, per_thread: int, append) -> float:
+    def worker(worker_id: int):
+        for sequence in range(per_thread):
+            append(worker_id * per_thread + sequence, LIFECYCLE[sequence % len(LIFECYCLE)])
+
+    workers = [threading.Thread(target=worker, args=(worker_id,)) for worker_id in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def bench_appends(directory: str, args) -> None:
+    per_thread = args.events // args.threads
+    total = per_thread * args.threads
+
+    with OrderEventLog(os.path.join(directory, "group.log")) as log:
+        seconds = run_threads(args.threads, per_thread, log.append)
+        batches = log.batches
+    print(f"group commit:     {total / seconds:>10,.0f} events/s  ({batches} fsyncs, "
+          f"{total / max(batches, 1):.1f} events per fsync)")
+
+    # Baseline: one write + fsync per event
+    naive_per_thread = max(args.naive_events // args.threads, 1)
+    lock = threading.Lock()
+    with open(os.path.join(directory, "naive.log"), "ab") as f:
+        def append(order_id, status):
+            with lock:
+                f.write(f"{order_id},{status.value}\n".encode())
+                f.flush()
+                os.fsync(f.fileno())
+
+        seconds = run_threads(args.threads, naive_per_thread, append)
+    naive_total = naive_per_thread * args.threads
+    print(f"fsync per event:  {naive_total / seconds:>10,.0f} events/s  ({naive_total} fsyncs)")
+
+
+def bench_replay(directory: str, args) -> None:
+    num_orders = args.replay_events // len(LIFECYCLE)
+    log_path = os.path.join(directory, "replay.log")
+    json_path = os.path.join(directory, "replay.ndjson")
+    start_time = datetime(2024, 1, 1)
+
+    with OrderEventLog(log_path) as log, open(json_path, "w") as f:
+        for step, status in enumerate(LIFECYCLE):
+            for order_id in range(1, num_orders + 1):
+                timestamp = start_time + timedelta(seconds=order_id, minutes=step)
+                log.append(order_id, status, timestamp, wait=False)
+                f.write(json.dumps({"order_id": order_id, "status": status.value,
+                                    "timestamp": timestamp.isoformat()}) + "\n")
+
+    def fresh_orders():
+        return {order_id: Order(id=order_id, user_id=1, status=OrderStatus.PENDING, order_date=start_time)
+                for order_id in range(1, num_orders + 1)}
+
+    orders = fresh_orders()
+    start = time.perf_counter()
+    applied = apply_order_events(orders, read_order_events(log_path))
+    replay_seconds = time.perf_counter() - start
+
+    orders = fresh_orders()
+    start = time.perf_counter()
+    with open(json_path) as f:
+        for line in f:
+            record = json.loads(line)
+            order = orders.get(record["order_id"])
+            status = OrderStatus(record["status"])
+            if order is not None and order.can_transition_to(status):
+                order.transition_to(status, at=datetime.fromisoformat(record["timestamp"]))
+    ingest_seconds = time.perf_counter() - start
+
+    print(f"\n{applied} events onto {num_orders} orders")
+    print(f"binary log replay: {replay_seconds:>7.2f}s ({os.path.getsize(log_path) / 2**20:.1f}M)")
+    print(f"JSON re-ingest:    {ingest_seconds:>7.2f}s ({os.path.getsize(json_path) / 2**20:.1f}M)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--events", type=int, default=20_000, help="durable appends (group commit)")
+    parser.add_argument("--naive-events", type=int, default=2_000, help="durable appends (fsync per event)")
+    parser.add_argument("--replay-events", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=".") as directory:
+        bench_appends(directory, args)
+        bench_replay(directory, args)
+
+
+if __name__ == "__main__":
+    main()
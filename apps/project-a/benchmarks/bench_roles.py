@@ -0,0 +1,143 @@
+"""
+Benchmark role checks with and without the role cache.
+
+A local stand-in role source sleeps for ``--delay-ms`` (plus jitter) per
+call, like a remote IAM service, and knows nothing about a share of the
+users. Worker threads check roles for users drawn from a skewed
+distribution, first straight against the source and then through
+``RoleCache``. The run reports throughput, check latency, source calls and
+the cache counters. A final burst of threads asks for the same cold user at
+once to show that concurrent misses share a single source call.
+
+Usage:
+    python benchmarks/bench_roles.py --threads 32 --checks 2000 --users 5000 --delay-ms 20
+"""
+
+import argparse
+import random
+import threading
+import time
+from collections import defaultdict
+
+from common_utils.aim import RoleCache
+
+REQUIRED = frozenset({"admin"})
+
+
+class DelayedRoleSource:
+    """Stand-in role source with injected latency; records concurrent calls per user."""
+
+    def __init__(self, delay: float, jitter: float, unknown_share: float, seed: int):
+        self.delay = delay
+        self.jitter = jitter
+        self.unknown_share = unknown_share
+        self.seed = seed
+        self.calls = 0
+        self.max_concurrent_same_user = 0
+        self._in_flight = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __call__(self, user_id):
+        with self._lock:
+            self.calls += 1
+            self._in_flight[user_id] += 1
+            self.max_concurrent_same_user = max(self.max_concurrent_same_user, self._in_flight[user_id])
+        rng = random.Random(hash((self.seed, user_id)))
+        time.sleep(self.delay + rng.random() * self.jitter)
+        with self._lock:
+            self._in_flight[user_id] -= 1
+        if rng.random() < self.unknown_share:
+            raise LookupError(user_id)
+        return ["admin", "viewer"] if rng.random() < 0.5 else ["viewer"]
+
+
+def run(check, args) -> dict:
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(worker_id: int):
+        rng = random.Random(args.seed * 1000 + worker_id)
+        local = []
+        for _ in range(args.checks):
+            user_id = min(int(rng.paretovariate(1.2)), args.users)  # skewed: a few users are very active
+            start = time.perf_counter()
+            try:
+                check(user_id)
+            except LookupError:
+                pass
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(worker_id,)) for worker_id in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "checks/s": len(latencies) / seconds,
+        "p50 ms": latencies[len(latencies) // 2] * 1000,
+        "p99 ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--checks", type=int, default=2000, help="role checks per thread")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--delay-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--unknown-share", type=float, default=0.1, help="users the source does not know")
+    parser.add_argument("--ttl", type=float, default=300.0)
+    parser.add_argument("--max-entries", type=int, default=10_000)
+    parser.add_argument("--uncached-checks", type=int, default=50, help="checks per thread without the cache")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    def make_source():
+        return DelayedRoleSource(args.delay_ms / 1000, args.jitter_ms / 1000, args.unknown_share, args.seed)
+
+    print(f"{args.threads} threads, {args.users} users, source delay {args.delay_ms:.0f}+{args.jitter_ms:.0f} ms\n")
+    print(f"{'variant':<10}{'checks/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'source calls':>14}")
+
+    source = make_source()
+    uncached = run(lambda user_id: REQUIRED <= frozenset(source(user_id)),
+                   argparse.Namespace(**dict(vars(args), checks=args.uncached_checks)))
+    print(f"{'uncached':<10}{uncached['checks/s']:>12,.0f}{uncached['p50 ms']:>10.3f}{uncached['p99 ms']:>10.3f}"
+          f"{source.calls:>14}")
+
+    source = make_source()
+    cache = RoleCache(source, max_entries=args.max_entries, ttl=args.ttl)
+    cached = run(lambda user_id: cache.has_roles(user_id, REQUIRED), args)
+    print(f"{'cached':<10}{cached['checks/s']:>12,.0f}{cached['p50 ms']:>10.3f}{cached['p99 ms']:>10.3f}"
+          f"{source.calls:>14}")
+    print(f"\ncache: {cache.stats()}")
+    print(f"max concurrent source calls for one user: {source.max_concurrent_same_user}")
+
+    # Burst: every thread misses on the same cold user at the same time
+    source = make_source()
+    cache = RoleCache(source)
+    barrier = threading.Barrier(args.threads)
+
+    def burst():
+        barrier.wait()
+        try:
+            cache.get("cold-user")
+        except LookupError:
+            pass
+
+    threads = [threading.Thread(target=burst) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"burst of {args.threads} concurrent misses for one user: {source.calls} source call, "
+          f"{cache.coalesced} coalesced")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark the product search index.
+
+Builds an InvertedIndex over synthetic product names, descriptions and tags
+(1M products by default) and reports build time, index size and query
+latency for exact, prefix (autocomplete), AND and OR queries.
+
+Usage:
+    python benchmarks/bench_search.py --products 1000000
+"""
+
+import argparse
+import random
+import resource
+import time
+
+from common_utils import InvertedIndex
+
+
+ADJECTIVES = ["wireless", "smart", "compact", "premium", "portable", "classic", "ultra", "eco", "pro", "mini"]
+NOUNS = ["headphones", "smartphone", "laptop", "cookbook", "speaker", "camera", "backpack", "keyboard", "monitor"]
+BRANDS = [f"brand{i}" for i in range(2000)]
+TAGS = ["electronics", "books", "audio", "mobile", "computer", "programming", "python", "outdoor", "gaming"]
+
+QUERIES = [
+    ("exact", "laptop", "and"),
+    ("prefix", "head", "and"),
+    ("rare prefix", "brand19", "and"),
+    ("and", "wireless headphones", "and"),
+    ("and rare", "brand42 camera", "and"),
+    ("or", "laptop camera", "or"),
+]
+
+
+def build(num_products: int, seed: int) -> InvertedIndex:
+    rng = random.Random(seed)
+    index = InvertedIndex({"name": 3.0, "tags": 2.0, "description": 1.0})
+    for product_id in range(1, num_products + 1):
+        adjective, noun, brand = rng.choice(ADJECTIVES), rng.choice(NOUNS), rng.choice(BRANDS)
+        index.add(product_id, {
+            "name": f"{brand} {adjective} {noun}",
+            "description": f"A {adjective} {noun} model {product_id} for everyday use",
+            "tags": " ".join(rng.sample(TAGS, 3)),
+        })
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    index = build(args.products, args.seed)
+    build_seconds = time.perf_counter() - start
+    index_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    print(f"products:      {len(index)}")
+    print(f"terms:         {index.num_terms}")
+    print(f"build time:    {build_seconds:.2f}s ({args.products / build_seconds:,.0f} products/s)")
+    print(f"index memory:  {index_kb / 1024:.1f}M (peak RSS growth, Linux)")
+    print()
+    # The first prefix query also sorts the vocabulary, which shows up in "max"
+    print(f"{'query':<14}{'text':<24}{'p50 ms':>10}{'max ms':>10}")
+    for label, query, mode in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            index.search(query, mode=mode, limit=20)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"{label:<14}{query:<24}{timings[len(timings) // 2]:>10.2f}{timings[-1]:>10.2f}")
+
+    start = time.perf_counter()
+    for product_id in range(1, 1001):
+        index.add(product_id, {"name": f"updated gadget {product_id}", "tags": "sale"})
+    per_product_ms = (time.perf_counter() - start) * 1000 / 1000
+    print(f"\nincremental update: {per_product_ms:.3f} ms per product (1000 re-indexed)")
+
+
+if __name__ == "__main__":
+    main()
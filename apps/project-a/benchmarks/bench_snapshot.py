@@ -0,0 +1,119 @@
+"""
+Benchmark binary product snapshots against a JSON catalog load.
+
+Writes the same synthetic catalog (1M products by default) as JSON and as a
+data_models snapshot, then reports file sizes, time to load the JSON and
+build every Product, and time to open the snapshot and fetch products by id.
+
+Usage:
+    python benchmarks/bench_snapshot.py --products 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from data_models import Product, Snapshot, write_snapshot
+
+
+TAGS = ["electronics", "books", "audio", "mobile", "computer", "programming", "python", "outdoor", "gaming"]
+
+
+def make_products(num_products: int, seed: int):
+    rng = random.Random(seed)
+    created = datetime(2024, 1, 1)
+    for product_id in range(1, num_products + 1):
+        yield Product(
+            id=product_id,
+            name=f"Product {product_id}",
+            description=f"Description of product {product_id}",
+            price=Decimal(rng.randrange(100, 100_000)) / 100,
+            sku=f"SKU-{product_id:07d}",
+            category_id=rng.randrange(1, 50),
+            stock_quantity=rng.randrange(0, 500),
+            tags=rng.sample(TAGS, 3),
+            created_at=created,
+            updated_at=created,
+        )
+
+
+def product_from_dict(data: dict) -> Product:
+    return Product(
+        id=data["id"],
+        name=data["name"],
+        description=data["description"],
+        price=Decimal(str(data["price"])),
+        sku=data["sku"],
+        category_id=data["category_id"],
+        stock_quantity=data["stock_quantity"],
+        is_active=data["is_active"],
+        images=data["images"],
+        tags=data["tags"],
+        weight=data["weight"],
+        dimensions=data["dimensions"],
+        created_at=datetime.fromisoformat(data["created_at"]),
+        updated_at=datetime.fromisoformat(data["updated_at"]),
+    )
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "products.json")
+        snapshot_path = os.path.join(directory, "products.snap")
+
+        catalog = list(make_products(args.products, args.seed))
+        with open(json_path, "w") as f:
+            json.dump([product.to_dict() for product in catalog], f)
+        start = time.perf_counter()
+        write_snapshot(snapshot_path, catalog, Product)
+        write_seconds = time.perf_counter() - start
+        del catalog
+
+        print(f"products:        {args.products}")
+        print(f"json size:       {os.path.getsize(json_path) / 2**20:.1f}M")
+        print(f"snapshot size:   {os.path.getsize(snapshot_path) / 2**20:.1f}M (written in {write_seconds:.2f}s)")
+        print()
+
+        rng = random.Random(args.seed)
+        lookup_ids = [rng.randrange(1, args.products + 1) for _ in range(args.lookups)]
+
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        snapshot = Snapshot(snapshot_path, Product)
+        open_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for product_id in lookup_ids:
+            snapshot.get(product_id)
+        lookup_us = (time.perf_counter() - start) * 1e6 / args.lookups
+        print(f"snapshot open:   {open_ms:.2f} ms")
+        print(f"snapshot get:    {lookup_us:.1f} us per product ({args.lookups} random ids)")
+        print(f"snapshot RSS:    +{rss_mb() - rss_before:.1f}M (peak growth, Linux)")
+        snapshot.close()
+
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        with open(json_path) as f:
+            loaded = {data["id"]: product_from_dict(data) for data in json.load(f)}
+        json_seconds = time.perf_counter() - start
+        print(f"json load:       {json_seconds:.2f}s for {len(loaded)} products")
+        print(f"json RSS:        +{rss_mb() - rss_before:.1f}M (peak growth, Linux)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Statistics reads from live aggregates vs. scanning every order.
+
+Synthetic orders of 1-4 lines are spread over ``--days`` days and
+``--users`` users, and a share of them moves through the order lifecycle or
+is cancelled. The scan baseline answers each ``/stats`` question the way a
+handler without aggregates would: revenue per status and per day by summing
+``total_amount``, orders per user, units per product for the top N and the
+low-stock products. ``OrderStats`` answers from its materialized aggregates;
+its update cost per order and the time of a full consistency check are
+reported too.
+
+Usage:
+    python benchmarks/bench_stats.py --orders 200000 --products 10000 --reads 200
+"""
+
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from data_models import Order, OrderItem, OrderStatus
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from stats import OrderStats  # noqa: E402
+
+LIFECYCLE = (OrderStatus.CONFIRMED, OrderStatus.PROCESSING, OrderStatus.SHIPPED, OrderStatus.DELIVERED)
+
+
+def build_orders(args, prices):
+    rng = random.Random(args.seed)
+    start = datetime(2024, 1, 1)
+    orders = []
+    for order_id in range(1, args.orders + 1):
+        order = Order(id=order_id, user_id=rng.randint(1, args.users), status=OrderStatus.PENDING,
+                      order_date=start + timedelta(seconds=rng.randrange(args.days * 86400)))
+        for line in range(rng.randint(1, 4)):
+            product_id = rng.randint(1, args.products)
+            order.add_item(OrderItem(id=line + 1, product_id=product_id, product_name=f"Product {product_id}",
+                                     product_sku=f"SKU-{product_id}", quantity=rng.randint(1, 3),
+                                     unit_price=prices[product_id]))
+        orders.append(order)
+    return orders
+
+
+def scan(orders, stock, top_n, threshold):
+    """Answer the /stats questions by scanning every order."""
+    counts = defaultdict(int)
+    revenue = defaultdict(Decimal)
+    daily = defaultdict(Decimal)
+    per_user = defaultdict(int)
+    units = defaultdict(int)
+    for order in orders:
+        total = order.total_amount
+        counts[order.status] += 1
+        revenue[order.status] += total
+        per_user[order.user_id] += 1
+        if order.status is not OrderStatus.CANCELLED:
+            daily[order.order_date.date()] += total
+            for item in order.items:
+                units[item.product_id] += item.quantity
+    top = heapq.nlargest(top_n, units.items(), key=lambda entry: (entry[1], -entry[0]))
+    low = sorted(product_id for product_id, available in stock.items() if available < threshold)
+    return counts, revenue, daily, len(per_user), top, low
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--reads", type=int, default=200, help="live reads to average over")
+    parser.add_argument("--scans", type=int, default=3, help="scan reads to average over")
+    parser.add_argument("--cancel-rate", type=float, default=0.1)
+    parser.add_argument("--advance-rate", type=float, default=0.5, help="share of orders moved through the lifecycle")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--threshold", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    prices = {product_id: Decimal(rng.randint(100, 100_000)).scaleb(-2) for product_id in range(1, args.products + 1)}
+    stock = {product_id: rng.randint(0, 500) for product_id in prices}
+    orders = build_orders(args, prices)
+
+    stats = OrderStats(args.top, args.threshold)
+    for product_id, available in stock.items():
+        stats.stock_changed(product_id, available)
+
+    start = time.perf_counter()
+    for order in orders:
+        stats.order_created(order)
+    created = time.perf_counter() - start
+
+    changes = 0
+    start = time.perf_counter()
+    for order in orders:
+        draw = rng.random()
+        if draw < args.cancel_rate:
+            steps = (OrderStatus.CANCELLED,)
+        elif draw < args.cancel_rate + args.advance_rate:
+            steps = LIFECYCLE[:rng.randint(1, len(LIFECYCLE))]
+        else:
+            continue
+        for status in steps:
+            previous = order.status
+            order.transition_to(status)
+            stats.status_changed(order, previous)
+            changes += 1
+    changed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.scans):
+        scan(orders, stock, args.top, args.threshold)
+    scan_ms = (time.perf_counter() - start) / args.scans * 1000
+
+    start = time.perf_counter()
+    for _ in range(args.reads):
+        stats.snapshot(days=30)
+    live_ms = (time.perf_counter() - start) / args.reads * 1000
+
+    start = time.perf_counter()
+    differences = stats.compare(OrderStats.recompute(orders, stock.items(), args.top, args.threshold))
+    check_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{args.orders:,} orders, {args.products:,} products, {args.users:,} users, {args.days} days\n")
+    print(f"{'scan every order':<34}{scan_ms:>12.2f} ms per read")
+    print(f"{'live aggregates (snapshot)':<34}{live_ms:>12.4f} ms per read  ({scan_ms / live_ms:,.0f}x)")
+    print(f"{'update on order create':<34}{created / len(orders) * 1e6:>12.2f} us per order")
+    print(f"{'update on status change':<34}{changed / max(changes, 1) * 1e6:>12.2f} us per change ({changes:,})")
+    print(f"{'consistency check':<34}{check_ms:>12.2f} ms, {len(differences)} differences")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark compiled schema validation against the previous ad-hoc checks.
+
+Validates synthetic user and product records (a share of them invalid) with
+the checks the API handler and the CLI ran before (a fresh required-field
+list per record, ``validate_required_fields`` and ``re.match`` on a pattern
+string) and with validators compiled from the shared models, which also
+check types, ranges and formats. Reports the cost per record.
+
+Usage:
+    python benchmarks/bench_validation.py --records 200000 --invalid-rate 0.02
+"""
+
+import argparse
+import random
+import re
+import time
+from decimal import Decimal
+
+from common_utils import schema_from_dataclass, validate_required_fields
+from data_models import Product, User
+
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+
+
+def make_users(count: int, invalid_rate: float, rng: random.Random) -> list:
+    records = []
+    for index in range(count):
+        record = {
+            "username": f"user{index}",
+            "email": f"user{index}@example.com",
+            "first_name": "ada",
+            "last_name": "lovelace",
+            "is_active": True,
+        }
+        if rng.random() < invalid_rate:
+            if rng.random() < 0.5:
+                record["email"] = f"user{index}example.com"
+            else:
+                record["last_name"] = None
+        records.append(record)
+    return records
+
+
+def make_products(count: int, invalid_rate: float, rng: random.Random) -> list:
+    records = []
+    for index in range(count):
+        record = {
+            "name": f"product {index}",
+            "description": "A product",
+            "price": Decimal(1000 + index % 9000) / 100,
+            "sku": f"SKU-{index:07d}",
+            "category_id": index % 50,
+            "stock_quantity": index % 500,
+            "tags": ["electronics", "audio"],
+        }
+        if rng.random() < invalid_rate:
+            record["sku"] = None
+        records.append(record)
+    return records
+
+
+def api_users(records: list) -> int:
+    """The previous POST /users checks."""
+    invalid = 0
+    for data in records:
+        required_fields = ['username', 'email', 'first_name', 'last_name']
+        missing_fields = [field for field in required_fields if field not in data or data[field] is None]
+        if missing_fields or re.match(EMAIL_PATTERN, data['email']) is None:
+            invalid += 1
+    return invalid
+
+
+def cli_users(records: list) -> int:
+    """The previous CLI user checks."""
+    invalid = 0
+    for row in records:
+        required_fields = ['username', 'email', 'first_name', 'last_name']
+        if validate_required_fields(row, required_fields)['errors'] or re.match(EMAIL_PATTERN, row['email']) is None:
+            invalid += 1
+    return invalid
+
+
+def cli_products(records: list) -> int:
+    """The previous CLI product checks (required fields only)."""
+    invalid = 0
+    for row in records:
+        required_fields = ['name', 'description', 'price', 'sku', 'category_id']
+        if validate_required_fields(row, required_fields)['errors']:
+            invalid += 1
+    return invalid
+
+
+def compiled(schema):
+    validate = schema.compile()
+
+    def run(records: list) -> int:
+        invalid = 0
+        for record in records:
+            if validate(record)[1]:
+                invalid += 1
+        return invalid
+    return run
+
+
+def best_seconds(function, records: list, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        invalid = function(records)
+        best = min(best, time.perf_counter() - start)
+    return best, invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--invalid-rate", type=float, default=0.02)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    users = make_users(args.records, args.invalid_rate, rng)
+    products = make_products(args.records, args.invalid_rate, rng)
+    # The fields the CLI reads (see project-b processing.py)
+    user_schema = schema_from_dataclass(User, include=("username", "email", "first_name", "last_name", "is_active"))
+    product_schema = schema_from_dataclass(
+        Product,
+        include=("name", "description", "price", "sku", "category_id", "stock_quantity", "tags"),
+    )
+
+    print(f"{args.records} records per dataset, {args.invalid_rate:.0%} invalid\n")
+    print(f"{'checks':<28}{'µs/record':>10}{'invalid':>9}")
+    for label, function, records in (
+        ("users: API ad-hoc", api_users, users),
+        ("users: CLI ad-hoc", cli_users, users),
+        ("users: compiled schema", compiled(user_schema), users),
+        ("products: CLI ad-hoc", cli_products, products),
+        ("products: compiled schema", compiled(product_schema), products),
+    ):
+        seconds, invalid = best_seconds(function, records, args.repeat)
+        print(f"{label:<28}{seconds / len(records) * 1e6:>10.2f}{invalid:>9}")
+
+
+if __name__ == "__main__":
+    main()
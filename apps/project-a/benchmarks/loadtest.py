@@ -0,0 +1,425 @@
+"""
+Load-test the API over HTTP with a seeded, offline workload.
+
+Starts the app in a subprocess on localhost (or targets ``--url``), fills it
+with synthetic data from ``--seed``, and drives a weighted mix of requests
+from an asyncio client. The client runs either closed-loop (``--concurrency``
+connections issuing requests back to back) or open-loop at a fixed arrival
+rate (``--rps``, at most ``--concurrency`` requests in flight). Open-loop
+latencies are measured from each request's scheduled start, so time spent
+queueing behind a slow server is counted instead of hidden. Throughput,
+latency percentiles and error rates, overall and per endpoint, are printed
+as JSON.
+
+Usage:
+    python benchmarks/loadtest.py --duration 10 --concurrency 32
+    python benchmarks/loadtest.py --rps 500 --mix get_products=50,get_order=30,post_order=15,post_user=5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "app")
+
+ENDPOINTS = ("get_products", "get_order", "post_order", "post_user")
+DEFAULT_MIX = "get_products=40,get_order=40,post_order=15,post_user=5"
+
+
+# Server side: runs in the subprocess started with --serve
+
+def seed_app(main, num_products: int, num_users: int, num_orders: int, seed: int) -> None:
+    """Fill the app's stores with deterministic synthetic data."""
+    from data_models import Category, Order, OrderItem, OrderStatus, Product, User
+
+    rng = random.Random(seed)
+    words = ["wireless", "smart", "compact", "pro", "ultra", "classic", "eco", "portable", "digital", "premium"]
+    nouns = ["speaker", "phone", "lamp", "keyboard", "camera", "watch", "router", "monitor", "charger", "book"]
+
+    for category_id in range(1, 11):
+        main.categories[category_id] = Category(id=category_id, name=f"Category {category_id}")
+    main.category_tree.add_categories(main.categories.values())
+
+    for product_id in range(1, num_products + 1):
+        main.store_product(Product(
+            id=product_id,
+            name=f"{rng.choice(words)} {rng.choice(nouns)} {product_id}",
+            description=f"{rng.choice(words)} {rng.choice(words)} {rng.choice(nouns)}",
+            price=Decimal(rng.randint(100, 100_000)) / 100,
+            sku=f"SKU-{product_id:07d}",
+            category_id=rng.randint(1, 10),
+            stock_quantity=1_000_000,
+            tags=rng.sample(words, 2),
+        ))
+
+    for user_id in range(1, num_users + 1):
+        main.users[user_id] = User(
+            id=user_id,
+            username=f"user{user_id}",
+            email=f"user{user_id}@example.com",
+            first_name="Load",
+            last_name=f"Tester{user_id}",
+        )
+
+    for _ in range(num_orders):
+        order_id = main.next_order_id()
+        lines = {rng.randint(1, num_products): rng.randint(1, 3) for _ in range(rng.randint(1, 3))}
+        main.inventory.reserve(order_id, lines)
+        order = Order(id=order_id, user_id=rng.randint(1, max(num_users, 1)), status=OrderStatus.PENDING,
+                      order_date=datetime(2024, 1, 1))
+        for product_id, quantity in lines.items():
+            product = main.products[product_id]
+            order.add_item(OrderItem(id=len(order.items) + 1, product_id=product_id, product_name=product.name,
+                                     product_sku=product.sku, quantity=quantity, unit_price=product.price))
+        main.orders[order_id] = order
+    # Orders were stored directly, so build the /stats aggregates from them
+    main.order_stats.add_orders(main.orders.values())
+
+
+def serve_werkzeug(app, host: str, port: int) -> None:
+    from werkzeug.serving import make_server
+    make_server(host, port, app, threaded=True).serve_forever()
+
+
+def serve_waitress(app, host: str, port: int) -> None:
+    import waitress
+    waitress.serve(app, host=host, port=port, _quiet=True)
+
+
+def serve_asgi(app, host: str, port: int) -> None:
+    # The async handlers of app/asgi.py; the data is already seeded, so no startup hook
+    import asgi
+    from asgi_server import run
+    run(asgi.ASGIApp(), host, port, lifespan=False)
+
+
+SERVERS = {"werkzeug": serve_werkzeug, "waitress": serve_waitress, "asgi": serve_asgi}
+
+
+def serve(args) -> None:
+    import logging
+
+    sys.path.insert(0, APP_DIR)
+    import main
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    seed_app(main, args.products, args.users, args.orders, args.seed)
+    print("ready", flush=True)
+    SERVERS[args.server](main.app, "127.0.0.1", args.port)
+
+
+def start_server(args) -> Tuple[subprocess.Popen, str]:
+    """Start the app in a subprocess and wait until it accepts connections."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    command = [
+        sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port), "--server", args.server,
+        "--products", str(args.products), "--users", str(args.users), "--orders", str(args.orders),
+        "--seed", str(args.seed),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    if process.stdout.readline().strip() != "ready":
+        process.kill()
+        raise RuntimeError("The app failed to start")
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            if time.monotonic() > deadline or process.poll() is not None:
+                process.kill()
+                raise RuntimeError("The app is not accepting connections")
+            time.sleep(0.05)
+    return process, f"http://127.0.0.1:{port}"
+
+
+# Client side
+
+class Workload:
+    """Seeded stream of requests drawn from a weighted endpoint mix."""
+
+    def __init__(self, mix: Dict[str, float], num_products: int, num_users: int, num_orders: int, seed: int):
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.num_products = num_products
+        self.num_users = num_users
+        self.num_orders = num_orders
+        self.rng = random.Random(seed)
+        self.new_users = 0
+
+    def next(self) -> Tuple[str, str, str, Optional[bytes]]:
+        """Return (endpoint, method, path, JSON body) of the next request."""
+        rng = self.rng
+        kind = rng.choices(self.kinds, self.weights)[0]
+        if kind == "get_products":
+            return kind, "GET", "/products", None
+        if kind == "get_order":
+            return kind, "GET", f"/orders/{rng.randint(1, max(self.num_orders, 1))}", None
+        if kind == "post_order":
+            body = {
+                "user_id": rng.randint(1, max(self.num_users, 1)),
+                "items": [{"product_id": rng.randint(1, self.num_products), "quantity": rng.randint(1, 3)}
+                          for _ in range(rng.randint(1, 3))],
+            }
+            return kind, "POST", "/orders", json.dumps(body).encode()
+        self.new_users += 1
+        body = {"username": f"load{self.new_users}", "email": f"load{self.new_users}@example.com",
+                "first_name": "load", "last_name": "tester"}
+        return kind, "POST", "/users", json.dumps(body).encode()
+
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client connection."""
+
+    def __init__(self, host: str, port: int, extra_headers: str):
+        self.host = host
+        self.port = port
+        self.extra_headers = extra_headers
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method: str, path: str, body: Optional[bytes]) -> int:
+        """Send a request and read the whole response; returns the status."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n{self.extra_headers}"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        self.writer.write(head.encode() + b"\r\n" + (body or b""))
+        try:
+            header_block = await self.reader.readuntil(b"\r\n\r\n")
+            lines = header_block.decode("latin-1").split("\r\n")
+            version, status = lines[0].split(" ", 2)[:2]
+            headers = {}
+            for line in lines[1:]:
+                if line:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+            if headers.get("transfer-encoding", "").lower() == "chunked":
+                while True:
+                    size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                    await self.reader.readexactly(size + 2)
+                    if size == 0:
+                        break
+            elif "content-length" in headers:
+                await self.reader.readexactly(int(headers["content-length"]))
+            else:
+                await self.reader.read()
+            if version == "HTTP/1.0" or headers.get("connection", "").lower() == "close" \
+                    or "content-length" not in headers and "transfer-encoding" not in headers:
+                self.close()
+            return int(status)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Recorder:
+    """Collects (endpoint, status, latency) of requests started after the warmup."""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.results: List[Tuple[str, int, float]] = []
+
+    def record(self, kind: str, status: int, started: float, finished: float) -> None:
+        if started >= self.measure_from:
+            self.results.append((kind, status, finished - started))
+
+
+async def send(connection: Connection, request, recorder: Recorder, started: float) -> None:
+    kind, method, path, body = request
+    try:
+        status = await connection.request(method, path, body)
+    except (OSError, asyncio.IncompleteReadError, ValueError):
+        status = 0  # connection error
+    recorder.record(kind, status, started, time.perf_counter())
+
+
+async def closed_loop(target, workload: Workload, recorder: Recorder, concurrency: int, end: float,
+                      headers: str) -> None:
+    async def worker():
+        connection = Connection(*target, headers)
+        while time.perf_counter() < end:
+            await send(connection, workload.next(), recorder, time.perf_counter())
+        connection.close()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def open_loop(target, workload: Workload, recorder: Recorder, concurrency: int, rps: float, end: float,
+                    headers: str) -> None:
+    pool: asyncio.Queue = asyncio.Queue()
+    for _ in range(concurrency):
+        pool.put_nowait(Connection(*target, headers))
+
+    async def one(request, scheduled):
+        connection = await pool.get()
+        try:
+            await send(connection, request, recorder, scheduled)
+        finally:
+            pool.put_nowait(connection)
+
+    tasks = set()
+    start = time.perf_counter()
+    sequence = 0
+    while True:
+        scheduled = start + sequence / rps
+        if scheduled >= end:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.ensure_future(one(workload.next(), scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        sequence += 1
+    await asyncio.gather(*tasks)
+    while not pool.empty():
+        pool.get_nowait().close()
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(results: List[Tuple[str, int, float]], seconds: float) -> dict:
+    latencies = sorted(latency * 1000 for _, _, latency in results)
+    statuses: Dict[str, int] = defaultdict(int)
+    for _, status, _ in results:
+        statuses[str(status) if status else "connection_error"] += 1
+    errors = sum(1 for _, status, _ in results if status == 0 or status >= 400)
+    summary = {
+        "requests": len(results),
+        "throughput_rps": round(len(results) / seconds, 1),
+        "errors": errors,
+        "error_rate": round(errors / len(results), 4) if results else 0.0,
+        "status_codes": dict(sorted(statuses.items())),
+    }
+    if latencies:
+        summary["latency_ms"] = {
+            "mean": round(sum(latencies) / len(latencies), 3),
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "max": round(latencies[-1], 3),
+        }
+    return summary
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint '{kind}' (choose from {', '.join(ENDPOINTS)})")
+        try:
+            mix[kind] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight for '{kind}'")
+    if not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError("the mix needs a positive weight")
+    return mix
+
+
+async def run_load(args, base_url: str) -> dict:
+    url = urlsplit(base_url)
+    target = (url.hostname, url.port or 80)
+    headers = "Accept-Encoding: gzip\r\n" if args.gzip else ""
+    workload = Workload(args.mix, args.products, args.users, args.orders, args.seed)
+
+    start = time.perf_counter()
+    recorder = Recorder(start + args.warmup)
+    end = start + args.warmup + args.duration
+    if args.rps:
+        await open_loop(target, workload, recorder, args.concurrency, args.rps, end, headers)
+    else:
+        await closed_loop(target, workload, recorder, args.concurrency, end, headers)
+    seconds = time.perf_counter() - recorder.measure_from
+
+    by_endpoint = defaultdict(list)
+    for result in recorder.results:
+        by_endpoint[result[0]].append(result)
+    return {
+        "config": {
+            "url": base_url,
+            "server": None if args.url else args.server,
+            "mode": f"open loop at {args.rps} rps" if args.rps else "closed loop",
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "mix": args.mix,
+            "seed": args.seed,
+            "data": {"products": args.products, "users": args.users, "orders": args.orders},
+            "gzip": args.gzip,
+        },
+        "measured_s": round(seconds, 3),
+        "overall": summarize(recorder.results, seconds),
+        "endpoints": {kind: summarize(results, seconds) for kind, results in sorted(by_endpoint.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--server", choices=sorted(SERVERS), default="werkzeug", help="server to start the app with")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds excluded from the results")
+    parser.add_argument("--concurrency", type=int, default=32, help="connections (max requests in flight)")
+    parser.add_argument("--rps", type=float, help="open-loop arrival rate; closed loop when omitted")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"endpoint weights (default {DEFAULT_MIX})")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--gzip", action="store_true", help="send Accept-Encoding: gzip")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        process, base_url = start_server(args)
+    try:
+        report = asyncio.run(run_load(args, base_url))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
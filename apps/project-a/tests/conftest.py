@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+
+@pytest.fixture
+def fresh_main(monkeypatch):
+    """Empty stores, indexes and response cache in ``main``, restored after the test."""
+    import main
+    from common_utils import InvertedIndex
+    from data_models import CategoryTree, Inventory
+    from stats import OrderStats
+
+    for name in ("users", "products", "categories", "orders"):
+        monkeypatch.setattr(main, name, {})
+    monkeypatch.setattr(main, "category_tree", CategoryTree())
+    monkeypatch.setattr(main, "product_search", InvertedIndex({"name": 3.0, "tags": 2.0, "description": 1.0}))
+    monkeypatch.setattr(main, "inventory", Inventory(on_change=main.update_stock_quantity))
+    monkeypatch.setattr(main, "order_stats", OrderStats())
+    monkeypatch.setattr(main, "_unindexed_snapshot", None)
+    monkeypatch.setattr(main, "_last_user_id", 0)
+    main.response_cache.clear()
+    return main
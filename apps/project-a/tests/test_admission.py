@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from admission import AdmissionController, TokenBucket, TrafficClass, parse_limits
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def hold_slot(traffic_class):
+    assert traffic_class.acquire() is None
+
+
+def test_parse_limits():
+    assert parse_limits(" concurrency=4, rate=50 ,queue=16") == {"concurrency": 4.0, "rate": 50.0, "queue": 16.0}
+    assert parse_limits("") == {}
+    with pytest.raises(ValueError):
+        parse_limits("threads=4")
+
+
+def test_token_bucket_refills_at_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+    assert bucket.take() == bucket.take() == 0
+    assert bucket.take() == pytest.approx(0.5)
+    clock.now = 0.5
+    assert bucket.take() == 0
+    clock.now = 100  # refills up to the burst only
+    assert [bucket.take() for _ in range(2)] == [0, 0]
+    assert bucket.take() > 0
+
+
+def test_full_queue_is_rejected_at_once():
+    traffic_class = TrafficClass("list", concurrency=1, queue=0, timeout=5)
+    hold_slot(traffic_class)
+    traffic_class.service_time = 0.3
+    assert traffic_class.acquire() == pytest.approx(0.3)
+    assert traffic_class.rejected["queue_full"] == 1
+
+
+def test_wait_past_the_deadline_is_rejected_at_once():
+    traffic_class = TrafficClass("list", concurrency=2, queue=10, timeout=1)
+    hold_slot(traffic_class)
+    hold_slot(traffic_class)
+    traffic_class.service_time = 2.0
+    assert traffic_class.acquire() == pytest.approx(2.0)
+    assert traffic_class.rejected["deadline"] == 1
+    assert traffic_class.waiting == 0
+
+
+def test_queued_request_gets_a_released_slot():
+    traffic_class = TrafficClass("write", concurrency=1, queue=1, timeout=5)
+    hold_slot(traffic_class)
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(traffic_class.acquire()))
+    waiter.start()
+    while not traffic_class.waiting:
+        time.sleep(0.001)
+    traffic_class.release(0.01)
+    waiter.join()
+    assert results == [None]
+    assert (traffic_class.active, traffic_class.admitted, traffic_class.queued) == (1, 2, 1)
+
+
+def test_queued_request_times_out():
+    traffic_class = TrafficClass("write", concurrency=1, queue=1, timeout=0.05)
+    hold_slot(traffic_class)
+    assert traffic_class.acquire() is not None
+    assert traffic_class.rejected["timeout"] == 1
+
+
+def test_rate_limit_rejects_without_taking_a_slot():
+    traffic_class = TrafficClass("point", concurrency=5, rate=1, burst=1)
+    hold_slot(traffic_class)
+    assert traffic_class.acquire() > 0
+    assert traffic_class.rejected["rate"] == 1
+    assert traffic_class.active == 1
+
+
+@pytest.fixture
+def overloaded_app():
+    """A Flask app whose single list slot is held by a request blocked on ``release``."""
+    app = Flask(__name__)
+    app.config["ADMISSION_CLASSES"] = {"list": {"concurrency": 1, "queue": 0}}
+    admission = AdmissionController(app)
+    entered, release = threading.Event(), threading.Event()
+
+    @app.route("/orders", methods=["GET", "POST"])
+    @admission.limit("list", methods=("GET",))
+    def orders():
+        entered.set()
+        release.wait(5)
+        return {"orders": []}
+
+    @app.route("/orders/<int:order_id>")
+    @admission.limit("point")
+    def order(order_id):
+        return {"id": order_id}
+
+    responses = []
+    holder = threading.Thread(target=lambda: responses.append(app.test_client().get("/orders")))
+    holder.start()
+    assert entered.wait(5)
+    entered.clear()
+    yield app, admission, responses
+    release.set()
+    holder.join()
+
+
+def test_overloaded_class_sheds_with_retry_after(overloaded_app):
+    app, admission, responses = overloaded_app
+    client = app.test_client()
+
+    shed = client.get("/orders")
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "1"
+    assert shed.get_json() == {"error": "Server is busy, retry later"}
+
+    # Other classes keep being served
+    assert client.get("/orders/7").get_json() == {"id": 7}
+    stats = admission.stats()
+    assert stats["list"]["active"] == 1
+    assert stats["list"]["rejected"]["queue_full"] == 1
+    assert stats["point"]["admitted"] == 1
+
+
+def test_disabled_admission_admits_everything(overloaded_app):
+    app, admission, _ = overloaded_app
+    admission.enabled = False
+    response = app.test_client().get("/orders/1")
+    assert response.status_code == 200
+    assert admission.stats()["point"]["admitted"] == 0
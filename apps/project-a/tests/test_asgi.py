@@ -0,0 +1,121 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+import asgi
+import main
+from admission import TrafficClass
+
+
+@pytest.fixture(autouse=True)
+def sample_data(fresh_main):
+    fresh_main.init_sample_data()
+
+
+@pytest.fixture
+def roles(monkeypatch):
+    """Serve roles from a dict instead of the IAM hook."""
+    by_user = {}
+    monkeypatch.setattr(main.role_cache, "source", lambda user_id: by_user.get(user_id, []))
+    main.role_cache.invalidate()
+    yield by_user
+    main.role_cache.invalidate()
+
+
+def asgi_request(method, path, body=b"", headers=()):
+    scope = {"type": "http", "method": method, "path": path, "query_string": b"",
+             "headers": [(name.lower().encode(), value.encode()) for name, value in headers]}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi.app(scope, receive, send))
+    start, body_message = messages
+    return start["status"], dict(start["headers"]), json.loads(body_message["body"])
+
+
+def flask_request(method, path, body=b"", headers=()):
+    response = main.app.test_client().open(path, method=method, data=body, headers=dict(headers),
+                                           content_type="application/json")
+    return response.status_code, response.headers, response.get_json()
+
+
+def assert_same(method, path, body=b"", headers=()):
+    status, _, payload = asgi_request(method, path, body, headers)
+    assert (status, payload) == flask_request(method, path, body, headers)[::2]
+    return status, payload
+
+
+@pytest.mark.parametrize("method,path,body", [
+    ("GET", "/users", b""),
+    ("GET", "/users/1", b""),
+    ("GET", "/users/999", b""),
+    ("GET", "/products", b""),
+    ("GET", "/products/1", b""),
+    ("GET", "/orders/999", b""),
+    ("POST", "/users", b'{"username": "x"}'),
+])
+def test_responses_match_flask(method, path, body):
+    assert_same(method, path, body)
+
+
+def test_role_checks_match_flask(roles):
+    roles["7"] = ["viewer"]
+    roles["8"] = ["admin"]
+    assert assert_same("GET", "/stats/check")[0] == 401
+    assert assert_same("GET", "/stats/check", headers=[("X-User-Id", "7")])[0] == 403
+
+    status, _, payload = asgi_request("GET", "/stats/check", headers=[("X-User-Id", "8")])
+    flask_status, _, flask_payload = flask_request("GET", "/stats/check", headers=[("X-User-Id", "8")])
+    assert status == flask_status == 200
+    del payload["seconds"], flask_payload["seconds"]
+    assert payload == flask_payload
+
+
+def test_role_lookup_failure_matches_flask(monkeypatch, roles):
+    def fail(user_id):
+        raise ConnectionError("IAM down")
+    monkeypatch.setattr(main.role_cache, "source", fail)
+    assert assert_same("GET", "/stats/check", headers=[("X-User-Id", "8")])[0] == 503
+
+
+def test_saturated_class_is_shed_like_flask(monkeypatch):
+    traffic_class = TrafficClass("point", concurrency=1, queue=0, timeout=1)
+    monkeypatch.setitem(main.admission.classes, "point", traffic_class)
+    assert traffic_class.acquire() is None
+    traffic_class.service_time = 2.5
+
+    status, headers, payload = asgi_request("GET", "/users/1")
+    flask_status, flask_headers, flask_payload = flask_request("GET", "/users/1")
+    assert status == flask_status == 503
+    assert payload == flask_payload
+    assert headers[b"retry-after"].decode() == flask_headers["Retry-After"] == "3"
+    assert traffic_class.rejected["queue_full"] == 2
+
+    # Unlimited routes and other classes are not affected
+    assert asgi_request("GET", "/products")[0] == 200
+
+
+def test_queued_request_runs_when_a_slot_is_released(monkeypatch):
+    traffic_class = TrafficClass("point", concurrency=1, queue=1, timeout=5)
+    monkeypatch.setitem(main.admission.classes, "point", traffic_class)
+    assert traffic_class.acquire() is None
+    threading.Timer(0.1, traffic_class.release, args=(0.01,)).start()
+
+    status, _, payload = asgi_request("GET", "/users/1")
+    assert status == 200 and payload["id"] == 1
+    assert traffic_class.active == 0 and traffic_class.waiting == 0
+
+
+def test_admission_can_be_disabled(monkeypatch):
+    traffic_class = TrafficClass("point", concurrency=1, queue=0, timeout=1)
+    monkeypatch.setitem(main.admission.classes, "point", traffic_class)
+    monkeypatch.setattr(main.admission, "enabled", False)
+    assert traffic_class.acquire() is None
+    assert assert_same("GET", "/users/1")[0] == 200
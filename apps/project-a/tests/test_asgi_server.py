@@ -0,0 +1,100 @@
+import asyncio
+import re
+
+import pytest
+
+from asgi_server import _handle_connection
+
+
+class FakeWriter:
+    def __init__(self):
+        self.data = bytearray()
+        self.closed = False
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def get_extra_info(self, name):
+        return ("127.0.0.1", 5002) if name == "sockname" else ("127.0.0.1", 40000)
+
+    def statuses(self):
+        return [int(status) for status in re.findall(rb"HTTP/1\.1 (\d{3}) ", self.data)]
+
+
+async def echo(scope, receive, send):
+    message = await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": message["body"]})
+
+
+def serve(raw, app=echo, **kwargs):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        writer = FakeWriter()
+        await asyncio.wait_for(_handle_connection(app, reader, writer, **kwargs), 5)
+        return writer
+    writer = asyncio.run(run())
+    assert writer.closed
+    return writer
+
+
+def test_keep_alive_requests_with_bodies():
+    writer = serve(b"POST /a HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello"
+                   b"GET /b HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert writer.statuses() == [200, 200]
+    assert b"\r\n\r\nhello" in writer.data
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5", b"1.5"])
+def test_malformed_content_length_is_rejected(length):
+    assert serve(b"POST / HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\nxyz").statuses() == [400]
+
+
+def test_oversized_body_is_rejected_before_reading_it():
+    writer = serve(b"POST / HTTP/1.1\r\nContent-Length: 11\r\n\r\nhello world", max_body=10)
+    assert writer.statuses() == [413]
+    assert serve(b"POST / HTTP/1.1\r\nContent-Length: 10\r\nConnection: close\r\n\r\n0123456789",
+                 max_body=10).statuses() == [200]
+
+
+def test_truncated_body_drops_the_connection():
+    writer = serve(b"POST / HTTP/1.1\r\nContent-Length: 100\r\n\r\nshort")
+    assert writer.statuses() == []
+
+
+def test_chunked_bodies_are_refused():
+    assert serve(b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n5\r\nhello\r\n0\r\n\r\n").statuses() == [411]
+
+
+def test_second_receive_does_not_hang():
+    seen = []
+
+    async def app(scope, receive, send):
+        await receive()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+        seen.append(asyncio.ensure_future(receive()))
+
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n")
+        reader.feed_eof()
+        await _handle_connection(app, reader, FakeWriter())
+        return await asyncio.wait_for(seen[0], 1)
+
+    assert asyncio.run(run()) == {"type": "http.disconnect"}
+
+
+def test_app_errors_become_500():
+    async def app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    assert serve(b"GET / HTTP/1.1\r\n\r\n", app=app).statuses() == [500]
@@ -0,0 +1,85 @@
+import json
+import random
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+from data_models import Category, Order, OrderItem, OrderStatus, Product, User, UserProfile
+
+from json_provider import ModelJSONProvider
+
+WHEN = datetime(2024, 5, 1, 12, 30, 15, 250)
+PRICES = [Decimal("0"), Decimal("0.1"), Decimal("19.99"), Decimal("1E+2"), Decimal("0.00001"), Decimal("123456789.123456789")]
+NAMES = ["Plain", "Café crème", "日本語", "quote \" and \\ backslash", "line\nbreak", "\x7f"]
+
+
+def make_models(rng):
+    """A few instances of every model, with the awkward values each field can hold."""
+    users = [User(id=user_id, username=rng.choice(NAMES), email=f"user{user_id}@example.com",
+                  first_name=rng.choice(NAMES), last_name="Doe", is_active=rng.random() < 0.5,
+                  created_at=WHEN, updated_at=rng.choice([None, WHEN]))
+             for user_id in range(1, 4)]
+    profiles = [UserProfile(user_id=1, bio=rng.choice(NAMES), date_of_birth=datetime(1990, 1, 2)), UserProfile(user_id=2)]
+    categories = [Category(id=1, name=rng.choice(NAMES), created_at=WHEN),
+                  Category(id=2, name="Child", parent_id=1, is_active=False, created_at=WHEN)]
+    products = [Product(id=product_id, name=rng.choice(NAMES), description=rng.choice(NAMES), price=rng.choice(PRICES),
+                        sku=f"SKU-{product_id}", category_id=1, stock_quantity=rng.randrange(0, 3),
+                        tags=rng.sample(NAMES, 2), weight=rng.choice([None, 0.0, 1.5, 1e-7, 1e20, 2 ** 0.5]),
+                        dimensions=rng.choice([None, "10x20"]), created_at=WHEN, updated_at=WHEN)
+                for product_id in range(1, 7)]
+    orders = []
+    for order_id, status in enumerate(OrderStatus, start=1):
+        order = Order(id=order_id, user_id=1, status=status, order_date=WHEN, notes=rng.choice([None, *NAMES]),
+                      shipped_date=rng.choice([None, WHEN]))
+        for line in range(order_id % 3):
+            order.add_item(OrderItem(id=line + 1, product_id=line + 1, product_name=rng.choice(NAMES),
+                                     product_sku=f"SKU-{line}", quantity=line + 1, unit_price=rng.choice(PRICES)))
+        orders.append(order)
+    return users + profiles + categories + products + orders + [item for order in orders for item in order.items]
+
+
+def to_dicts(obj):
+    """The document jsonify would encode without the provider."""
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    if isinstance(obj, list):
+        return [to_dicts(item) for item in obj]
+    if isinstance(obj, dict):
+        return {key: to_dicts(value) for key, value in obj.items()}
+    return obj
+
+
+def documents():
+    models = make_models(random.Random(4))
+    return [*models, models, {"items": models[:5], "count": len(models), "when": "now"}, {"b": [models[-1]], "a": None}]
+
+
+@pytest.mark.parametrize("debug,dump_args", [(False, {"separators": (",", ":")}), (True, {"indent": 2})])
+def test_responses_equal_json_dumps_of_to_dict(debug, dump_args):
+    app = Flask(__name__)
+    app.debug = debug
+    app.json = ModelJSONProvider(app)
+    with app.app_context():
+        for document in documents():
+            expected = json.dumps(to_dicts(document), sort_keys=True, ensure_ascii=True, **dump_args) + "\n"
+            assert app.json.response(document).get_data() == expected.encode(), document
+
+
+def test_responses_equal_the_default_provider():
+    app = Flask(__name__)
+    plain = Flask(__name__)
+    app.json = ModelJSONProvider(app)
+    with app.app_context():
+        for document in documents():
+            assert app.json.response(document).get_data() == plain.json.response(to_dicts(document)).get_data()
+
+
+def test_plain_values_are_written_like_to_dict_writes_them():
+    app = Flask(__name__)
+    app.json = ModelJSONProvider(app)
+    document = {"when": date(2024, 5, 1), "at": WHEN, "price": Decimal("1.5"), "status": OrderStatus.PENDING}
+    expected = {"when": "2024-05-01", "at": WHEN.isoformat(), "price": 1.5, "status": "pending"}
+    with app.app_context():
+        assert app.json.response(document).get_data() == \
+            (json.dumps(expected, sort_keys=True, separators=(",", ":")) + "\n").encode()
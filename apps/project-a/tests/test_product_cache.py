@@ -0,0 +1,40 @@
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def sample_data(fresh_main):
+    fresh_main.init_sample_data()
+
+
+def test_reservations_keep_product_lists_cached(monkeypatch):
+    built = []
+
+    def product_listing(product):
+        built.append(product.id)
+        return listing(product)
+    listing = main.product_listing
+    monkeypatch.setattr(main, "product_listing", product_listing)
+    client = main.app.test_client()
+
+    before = client.get("/products").get_json()
+    assert "stock_quantity" not in before[0] and "is_in_stock" not in before[0]
+    stock = client.get("/products/1").get_json()["stock_quantity"]
+    client.get("/categories/1/products?recursive=1")
+    built.clear()
+
+    response = client.post("/orders", json={"user_id": 1, "items": [{"product_id": 1, "quantity": 2}]})
+    assert response.status_code == 201
+    assert client.get("/products/1").get_json()["stock_quantity"] == stock - 2
+    assert client.get("/products").get_json() == before
+    client.get("/categories/1/products?recursive=1")
+    assert built == []
+
+
+def test_product_writes_still_invalidate_lists():
+    client = main.app.test_client()
+    client.get("/products")
+    main.store_product(main.Product(id=3, name="Tablet", description="A tablet", price=main.Decimal("199.00"),
+                                    sku="TAB-001", category_id=3, stock_quantity=4))
+    assert [product["id"] for product in client.get("/products").get_json()] == [1, 2, 3]
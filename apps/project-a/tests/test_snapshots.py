@@ -0,0 +1,57 @@
+from decimal import Decimal
+
+import pytest
+from common_utils import InvertedIndex
+from data_models import CategoryTree, Product
+
+import main
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, fresh_main, monkeypatch):
+    """Sample data written to snapshots, then loaded into fresh stores."""
+    fresh_main.init_sample_data()
+    fresh_main.save_snapshots(str(tmp_path))
+    for name in ("users", "products", "categories", "orders"):
+        monkeypatch.setattr(main, name, {})
+    monkeypatch.setattr(main, "category_tree", CategoryTree())
+    monkeypatch.setattr(main, "product_search", InvertedIndex({"name": 3.0, "tags": 2.0, "description": 1.0}))
+    assert fresh_main.load_snapshots(str(tmp_path))
+    yield tmp_path
+    for store in (main.products, main.users, main.orders):
+        store.snapshot.close()
+
+
+def test_product_indexes_are_built_on_first_search(snapshot_dir):
+    assert len(main.product_search) == 0
+    assert main.inventory.available(1) == 50
+
+    response = main.app.test_client().get("/products/search?q=python")
+    assert [product["id"] for product in response.get_json()] == [2]
+    assert len(main.product_search) == 2
+    assert main.category_tree.product_ids(1, recursive=True) == [1]
+
+
+def test_product_write_indexes_the_snapshot_first(snapshot_dir):
+    main.store_product(Product(id=2, name="Rust Book", description="Systems programming", price=Decimal("45.00"),
+                               sku="BOOK-002", category_id=2, stock_quantity=5, tags=["books"]))
+    assert [doc_id for doc_id, _ in main.product_search.search("python")] == []
+    assert [doc_id for doc_id, _ in main.product_search.search("rust")] == [2]
+    assert [doc_id for doc_id, _ in main.product_search.search("smartphone")] == [1]
+
+
+NEW_USER = {"username": "janedoe", "email": "jane@example.com", "first_name": "jane", "last_name": "doe"}
+
+
+def test_user_ids_continue_after_the_snapshot(snapshot_dir):
+    del main.users[1]
+    assert main.create_user(NEW_USER).id == 2
+    assert main.create_user(NEW_USER).id == 3
+    assert sorted(main.users) == [2, 3]
+
+
+def test_user_ids_never_reuse_a_gap(fresh_main):
+    fresh_main.init_sample_data()
+    assert main.create_user(NEW_USER).id == 2
+    del main.users[1]
+    assert main.create_user(NEW_USER).id == 3
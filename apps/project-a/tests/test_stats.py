@@ -0,0 +1,99 @@
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from data_models import Order, OrderItem, OrderStatus
+
+from stats import OrderStats
+
+LIFECYCLE = (OrderStatus.CONFIRMED, OrderStatus.PROCESSING, OrderStatus.SHIPPED, OrderStatus.DELIVERED)
+
+
+def make_order(order_id, user_id, lines, day=0):
+    order = Order(id=order_id, user_id=user_id, status=OrderStatus.PENDING,
+                  order_date=datetime(2024, 1, 1) + timedelta(days=day))
+    for line, (product_id, quantity) in enumerate(lines, start=1):
+        order.add_item(OrderItem(id=line, product_id=product_id, product_name=f"Product {product_id}",
+                                 product_sku=f"SKU-{product_id}", quantity=quantity,
+                                 unit_price=Decimal(product_id) / 4))
+    return order
+
+
+def change_status(stats, order, status):
+    previous = order.status
+    order.transition_to(status)
+    stats.status_changed(order, previous)
+
+
+def test_live_statistics_match_recomputed_ones():
+    rng = random.Random(7)
+    stats = OrderStats(top_n=5, low_stock_threshold=20)
+    stock = {product_id: rng.randint(0, 40) for product_id in range(1, 31)}
+    for product_id, available in stock.items():
+        stats.stock_changed(product_id, available)
+
+    orders = []
+    for order_id in range(1, 501):
+        lines = [(rng.randint(1, 30), rng.randint(1, 3)) for _ in range(rng.randint(1, 4))]
+        order = make_order(order_id, rng.randint(1, 40), lines, day=rng.randint(0, 59))
+        stats.order_created(order)
+        orders.append(order)
+        draw = rng.random()
+        if draw < 0.2:
+            change_status(stats, order, OrderStatus.CANCELLED)
+        elif draw < 0.7:
+            for status in LIFECYCLE[:rng.randint(1, 4)]:
+                change_status(stats, order, status)
+    for product_id in rng.sample(sorted(stock), 10):
+        stock[product_id] = rng.randint(0, 40)
+        stats.stock_changed(product_id, stock[product_id])
+
+    expected = OrderStats.recompute(orders, stock.items(), top_n=5, low_stock_threshold=20)
+    assert stats.compare(expected) == []
+    assert stats.snapshot() == expected.snapshot()
+
+
+def test_compare_lists_differences():
+    stats = OrderStats()
+    order = make_order(1, 1, [(3, 2)])
+    stats.order_created(order)
+    order.transition_to(OrderStatus.CANCELLED)  # the hook is never called
+
+    differences = stats.compare(OrderStats.recompute([order], []))
+    aggregates = {difference["aggregate"] for difference in differences}
+    assert {"status_counts", "status_revenue", "daily_revenue", "product_units", "top_products"} <= aggregates
+    assert {"aggregate": "product_units", "key": 3, "live": 2, "expected": None} in differences
+
+
+def test_top_products_follow_cancellations():
+    stats = OrderStats(top_n=3)
+    orders = [
+        make_order(1, 1, [(10, 5), (11, 2)]),
+        make_order(2, 2, [(12, 4), (13, 2)]),
+        make_order(3, 3, [(11, 3)]),
+    ]
+    for order in orders:
+        stats.order_created(order)
+    top = [(entry["product_id"], entry["units"]) for entry in stats.snapshot()["top_products"]]
+    assert top == [(10, 5), (11, 5), (12, 4)]
+
+    change_status(stats, orders[0], OrderStatus.CANCELLED)
+    top = [(entry["product_id"], entry["units"]) for entry in stats.snapshot()["top_products"]]
+    assert top == [(12, 4), (11, 3), (13, 2)]
+
+
+def test_snapshot_days_and_users():
+    stats = OrderStats()
+    for day in range(5):
+        stats.order_created(make_order(day + 1, 7, [(4, 1)], day=day))
+    cancelled = make_order(6, 7, [(4, 1)], day=5)
+    stats.order_created(cancelled)
+    change_status(stats, cancelled, OrderStatus.CANCELLED)
+
+    snapshot = stats.snapshot(days=2)
+    assert [entry["date"] for entry in snapshot["daily_revenue"]] == ["2024-01-04", "2024-01-05"]
+    assert snapshot["revenue"] == Decimal(5)
+    assert snapshot["by_status"]["cancelled"] == {"count": 1, "revenue": Decimal(1)}
+    assert stats.snapshot(days=0)["daily_revenue"] == []
+    assert stats.user(7) == {"user_id": 7, "orders": 6, "revenue": Decimal(5)}
+    assert stats.user(8)["orders"] == 0
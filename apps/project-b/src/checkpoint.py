@@ -0,0 +1,132 @@
+"""
+Checkpoint and manifest files for resumable processing runs.
+
+A checkpoint records how far a run got (input rows consumed, output and error
+log byte offsets, running counters). It is rewritten atomically after each
+chunk, only once the output it refers to has been flushed to disk, so a
+restarted run can truncate the output back to the checkpoint and continue
+without duplicating or losing records.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+
+STATE_VERSION = 1
+
+
+def atomic_write_json(path: str, data: Dict[str, Any]) -> None:
+    """Write JSON to ``path`` so readers see either the old or the new file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def fsync_file(f) -> None:
+    """Flush a file object and force its contents to disk."""
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def file_fingerprint(path: str) -> Dict[str, int]:
+    """Cheap identity of a file's contents (size and modification time)."""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """Progress state of one processing run.
+
+    Args:
+        path: State file location
+        run_key: Arguments identifying the run (command, input, output, ...).
+            A saved state is only resumed when its key matches exactly.
+    """
+
+    def __init__(self, path: str, run_key: Dict[str, Any]):
+        self.path = path
+        self.run_key = run_key
+        self.errors_path = f"{path}.errors"
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Return the saved state for this run, or None to start from scratch."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("version") != STATE_VERSION or state.get("run_key") != self.run_key:
+            return None
+        return state
+
+    def commit(self, **progress: Any) -> None:
+        """Atomically record progress; output must already be synced."""
+        atomic_write_json(self.path, {"version": STATE_VERSION, "run_key": self.run_key, **progress})
+
+    def clear(self) -> None:
+        """Remove the state once the run has completed."""
+        for path in (self.path, self.errors_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class Manifest:
+    """Content hashes of inputs that were fully processed.
+
+    Lets a re-run skip an input whose contents and output are unchanged.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def _key(command: str, input_file: str) -> str:
+        return f"{command}:{os.path.abspath(input_file)}"
+
+    def is_current(self, command: str, input_file: str, output_file: Optional[str],
+                   settings: Optional[Dict[str, Any]] = None) -> bool:
+        """True when the input was processed before and nothing changed since.
+
+        ``settings`` are the options that shape the output (format,
+        dedupe policy, ...); a run with other settings is never current.
+        """
+        entry = self.entries.get(self._key(command, input_file))
+        if not entry or entry.get("output") != output_file or entry.get("settings") != (settings or {}):
+            return False
+        if output_file is None or not os.path.exists(output_file):
+            return False
+        # Check the cheap fingerprint before hashing the whole file
+        if entry.get("fingerprint") == file_fingerprint(input_file):
+            return True
+        return entry.get("sha256") == file_digest(input_file)
+
+    def record(self, command: str, input_file: str, output_file: Optional[str],
+               settings: Optional[Dict[str, Any]] = None) -> None:
+        """Remember that an input was fully processed into ``output_file`` with ``settings``."""
+        self.entries[self._key(command, input_file)] = {
+            "sha256": file_digest(input_file),
+            "fingerprint": file_fingerprint(input_file),
+            "output": output_file,
+            "settings": settings or {},
+        }
+        atomic_write_json(self.path, self.entries)
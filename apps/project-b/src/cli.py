@@ -4,11 +4,19 @@ A command-line tool that demonstrates data processing using shared packages.
 """
 
 import click
+import dataclasses
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
 import pandas as pd
 import json
+from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
-from typing import List
+from typing import List, Optional
 
 # Import from shared packages
 from common_utils import (
@@ -21,6 +29,75 @@ from common_utils import (
 )
 from data_models import User, Product, Category, Order, OrderItem, OrderStatus
 
+import columnar
+from checkpoint import Checkpoint, Manifest, file_fingerprint, fsync_file
+from csv_schema import iter_csv
+from delta import DEFAULT_CHUNK_ROWS, DeltaRun
+from dedupe import DEFAULT_MEMORY_LIMIT, POLICIES, drop_rows, find_duplicates, rows_to_drop
+from memory import ChunkSizer, SAMPLE_ROWS, format_size, parse_size, peak_rss
+from processing import USERS, PRODUCTS
+from sample_data import DataQuality, generate_users, generate_products, generate_order_lines, write_chunks
+from shards import MERGE_MODES, expand_inputs, process_shards
+from writers import JsonOutputWriter
+
+# Rows per checkpoint when --checkpoint is given without --chunk-size
+DEFAULT_CHECKPOINT_CHUNK = 10_000
+
+
+@dataclass
+class RunOptions:
+    """Options shared by the CSV processing commands."""
+
+    input_file: str
+    output_file: Optional[str] = None
+    engine: str = 'auto'
+    chunk_size: Optional[int] = None
+    checkpoint_path: Optional[str] = None
+    manifest_path: Optional[str] = None
+    max_memory: Optional[str] = None
+    dedupe: Optional[str] = None
+    workers: Optional[int] = None
+    merge: str = 'ordered'
+    output_format: str = 'json'
+    compression: Optional[str] = None
+    decimal_type: str = 'decimal'
+    since_state: Optional[str] = None
+
+
+def processing_options(command):
+    """Add the RunOptions command line options to a command."""
+    options = [
+        click.option('--input-file', '-i', required=True,
+                     help='Input CSV file, or a directory or glob pattern of shard files'),
+        click.option('--output-file', '-o', help='Output file path (optional for JSON)'),
+        click.option('--format', 'output_format', type=click.Choice(('json',) + columnar.FORMATS), default='json',
+                     show_default=True, help='Output format; parquet and arrow need pyarrow'),
+        click.option('--compression',
+                     type=click.Choice(sorted(set().union(*columnar.COMPRESSIONS.values()))),
+                     help='Parquet/Arrow compression codec (default snappy for parquet, lz4 for arrow)'),
+        click.option('--decimal-type', type=click.Choice(columnar.DECIMAL_TYPES), default='decimal',
+                     show_default=True, help='Parquet/Arrow type of prices: decimal128 or int64 cents'),
+        click.option('--engine', type=click.Choice(['auto', 'c', 'pyarrow']), default='auto', show_default=True,
+                     help='CSV parser engine (auto uses pyarrow when installed)'),
+        click.option('--chunk-size', type=int, help='Process the input in chunks of this many rows'),
+        click.option('--checkpoint', 'checkpoint_path',
+                     help='State file for resuming an interrupted run (requires --output-file)'),
+        click.option('--manifest', 'manifest_path',
+                     help='Manifest of input hashes; unchanged inputs are skipped on re-runs'),
+        click.option('--max-memory',
+                     help='Memory budget such as 512M; chunk sizes are chosen to stay under it'),
+        click.option('--dedupe', type=click.Choice(POLICIES),
+                     help='Detect duplicate keys and keep the first or last row of each group, or reject all'),
+        click.option('--since-state',
+                     help='State file of the previous run; only inserted, updated and deleted records are output'),
+        click.option('--workers', type=int, help='Worker processes for sharded input (default: CPU count)'),
+        click.option('--merge', type=click.Choice(MERGE_MODES), default='ordered', show_default=True,
+                     help='Merge shard output in shard order or as shards finish'),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
 
 @click.group()
 def cli():
@@ -29,150 +106,439 @@ def cli():
     click.echo("Using shared packages: common-utils, data-models")
 
 
-@cli.command()
-@click.option('--input-file', '-i', required=True, help='Input CSV file path')
-@click.option('--output-file', '-o', help='Output JSON file path (optional)')
-def process_users(input_file, output_file):
-    """Process user data from CSV and convert to JSON using shared models."""
+def run_processing(dataset, command, options):
+    """Read, validate and convert an input file, streaming JSON, Parquet or Arrow output.
+
+    With a checkpoint, progress is committed after every chunk and a restart
+    with the same arguments resumes where the previous run stopped. With a
+    memory budget, chunk sizes are derived from the measured per-row cost and
+    output and errors are spooled to disk instead of being held in memory.
+    """
+
+    input_file = options.input_file
+    output_file = options.output_file
+    chunk_size = options.chunk_size
+
+    if options.checkpoint_path and not output_file:
+        raise click.UsageError("--checkpoint requires --output-file")
+    budget = None
+    if options.max_memory:
+        try:
+            budget = parse_size(options.max_memory)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+
+    settings = output_settings(options)
+    manifest = Manifest(options.manifest_path) if options.manifest_path else None
+    if manifest and manifest.is_current(command, input_file, output_file, settings):
+        click.echo(f"⏭️  {input_file} is unchanged since the last run, skipping")
+        return
+
+    checkpoint = None
+    state = None
+    if options.checkpoint_path:
+        chunk_size = chunk_size or DEFAULT_CHECKPOINT_CHUNK
+        checkpoint = Checkpoint(options.checkpoint_path, {
+            "command": command,
+            "input_file": os.path.abspath(input_file),
+            "input": file_fingerprint(input_file),
+            "output_file": os.path.abspath(output_file),
+            **settings,
+        })
+        state = checkpoint.load()
+
+    rows_done = state["rows_done"] if state else 0
+    total_processed = state["total_processed"] if state else 0
+    total_errors = state["total_errors"] if state else 0
+    processed_at = state["processed_at"] if state else datetime.now().isoformat()
+
+    sizer = None
+    if budget:
+        sizer = ChunkSizer(budget, max_rows=options.chunk_size)
+        sample = next(iter_csv(input_file, dataset.schema, SAMPLE_ROWS, skip_rows=rows_done), None)
+        if sample is not None:
+            sizer.calibrate(sample, lambda frame: [
+                json.dumps(obj.to_dict(), indent=2) for obj in dataset.transform(frame)[0]
+            ])
+            del sample
+        chunk_size = sizer.next_size
+
+    duplicates = []
+    dropped = {}
+    if options.dedupe:
+        duplicates = find_duplicates(input_file, dataset.schema, dataset.unique_fields,
+                                     memory_limit=budget // 4 if budget else DEFAULT_MEMORY_LIMIT)
+        dropped = rows_to_drop(duplicates, options.dedupe)
+
+    if state:
+        click.echo(f"🔁 Resuming {input_file} from row {rows_done + 1} ({options.checkpoint_path})")
+        out = open(output_file, 'r+b')
+        out.truncate(state["output_offset"])
+        out.seek(state["output_offset"])
+    elif output_file:
+        out = open(output_file, 'wb')
+    elif budget:
+        out = tempfile.TemporaryFile()
+    else:
+        out = io.BytesIO()
+
+    # Errors go to a file when they must survive a restart or memory is bounded
+    if checkpoint:
+        error_log = open(checkpoint.errors_path, 'a+b' if state else 'w+b')
+        error_log.truncate(state["errors_offset"] if state else 0)
+    elif budget:
+        error_log = tempfile.TemporaryFile()
+    else:
+        error_log = io.BytesIO()
+
+    writer = open_writer(out, dataset, options, processed_at, records_written=total_processed)
+    complete = False
 
     try:
-        # Read CSV file
-        df = pd.read_csv(input_file)
-        click.echo(f"📖 Reading {len(df)} users from {input_file}")
-
-        users = []
-        errors = []
-
-        for index, row in df.iterrows():
-            try:
-                # Validate required fields using shared utility
-                required_fields = ['username', 'email', 'first_name', 'last_name']
-                row_dict = row.to_dict()
-                validation_result = validate_required_fields(row_dict, required_fields)
-
-                if validation_result['errors']:
-                    errors.append(f"Row {index + 1}: {', '.join(validation_result['errors'])}")
-                    continue
-
-                # Validate email using shared utility
-                if not is_valid_email(row['email']):
-                    errors.append(f"Row {index + 1}: Invalid email address '{row['email']}'")
-                    continue
-
-                # Create User object using shared data model
-                user = User(
-                    id=index + 1,
-                    username=row['username'].lower(),
-                    email=row['email'].lower(),
-                    first_name=capitalize_words(str(row['first_name'])),
-                    last_name=capitalize_words(str(row['last_name'])),
-                    is_active=row.get('is_active', True)
+        click.echo(f"📖 Reading {dataset.name} from {input_file}")
+        if not state:
+            writer.write_header()
+
+        for frame in iter_csv(input_file, dataset.schema, chunk_size, options.engine, skip_rows=rows_done):
+            rows_read = len(frame)
+            frame, chunk_errors = drop_rows(frame, dropped)
+            objects, transform_errors = dataset.transform(frame)
+            chunk_errors.extend(transform_errors)
+            for obj in objects:
+                click.echo(f"✅ Processed {dataset.describe(obj)}")
+
+            writer.write_objects(objects)
+            error_log.write("".join(f"{error}\n" for error in chunk_errors).encode())
+            total_processed += len(objects)
+            total_errors += len(chunk_errors)
+            rows_done += rows_read
+
+            if checkpoint:
+                # Output and error log must be durable before the state refers to them
+                fsync_file(out)
+                fsync_file(error_log)
+                checkpoint.commit(
+                    rows_done=rows_done,
+                    total_processed=total_processed,
+                    total_errors=total_errors,
+                    output_offset=writer.position(),
+                    errors_offset=error_log.tell(),
+                    processed_at=processed_at,
                 )
+            if sizer:
+                sizer.observe(frame)
+            del frame, objects, chunk_errors
 
-                users.append(user.to_dict())
-                click.echo(f"✅ Processed user: {user.full_name}")
+        writer.write_footer(total_processed, total_errors)
 
-            except Exception as e:
-                errors.append(f"Row {index + 1}: {str(e)}")
+        complete = True
+        if checkpoint:
+            checkpoint.clear()
+        if manifest:
+            manifest.record(command, input_file, output_file, settings)
 
         # Display results
         click.echo(f"\n📊 Processing Results:")
-        click.echo(f"   ✅ Successfully processed: {len(users)} users")
-        click.echo(f"   ❌ Errors: {len(errors)}")
+        click.echo(f"   ✅ Successfully processed: {total_processed} {dataset.name}")
+        click.echo(f"   ❌ Errors: {total_errors}")
+
+        if duplicates:
+            click.echo(f"\n🔁 Duplicate groups ({len(duplicates)}, policy {options.dedupe}):")
+            for group in duplicates:
+                click.echo(f"   - {group.describe()}")
 
+        if total_errors:
+            click.echo("\n🚨 Errors encountered:")
+            error_log.seek(0)
+            for line in error_log:
+                click.echo(f"   - {line.decode().rstrip()}")
+
+        if sizer:
+            click.echo(f"\n📈 Peak memory: {format_size(peak_rss())} (budget {format_size(budget)}), "
+                       f"chunks of {sizer.smallest}-{sizer.largest} rows")
+
+        echo_output(out, output_file)
+    except BaseException:
+        # A checkpointed run resumes from its partial output; otherwise it is useless
+        if not complete and not checkpoint:
+            discard_output(out, output_file)
+        raise
+    finally:
+        out.close()
+        error_log.close()
+
+
+def output_settings(options):
+    """Options that shape the output; a checkpoint or manifest entry only matches the same ones."""
+    return {
+        "dedupe": options.dedupe,
+        "format": options.output_format,
+        "compression": options.compression,
+        "decimal_type": options.decimal_type,
+        "engine": options.engine,
+    }
+
+
+def check_output_format(options):
+    """Reject option combinations the output format cannot honour."""
+    file_format = options.output_format
+    if file_format == 'json':
+        if options.compression:
+            raise click.UsageError("--compression requires --format parquet or arrow")
+        return
+    if not columnar.available():
+        raise click.UsageError(f"--format {file_format} requires pyarrow")
+    if not options.output_file:
+        raise click.UsageError(f"--format {file_format} requires --output-file")
+    if options.checkpoint_path:
+        raise click.UsageError("--checkpoint requires --format json")
+    if options.since_state:
+        raise click.UsageError("--since-state requires --format json")
+    if options.compression and options.compression not in columnar.COMPRESSIONS[file_format]:
+        raise click.UsageError(f"--compression for {file_format} must be one of "
+                               f"{', '.join(columnar.COMPRESSIONS[file_format])}")
+
+
+def open_writer(out, dataset, options, processed_at, records_written=0):
+    """The output writer for ``--format``."""
+    if options.output_format == 'json':
+        return JsonOutputWriter(out, dataset.name, processed_at, records_written=records_written)
+    return columnar.ColumnarOutputWriter(out, dataset.model, dataset.name, processed_at, options.output_format,
+                                         options.compression, options.decimal_type)
+
+
+def discard_output(out, output_file):
+    """Close and remove an output file left incomplete by a failed run."""
+    out.close()
+    if output_file and os.path.isfile(output_file):
+        os.remove(output_file)
+
+
+def echo_output(out, output_file):
+    """Report where the output went, or print it when there is no output file."""
+    if output_file:
+        click.echo(f"💾 Output saved to {output_file}")
+    else:
+        click.echo(f"\n📄 JSON Output:")
+        out.seek(0)
+        sys.stdout.flush()
+        shutil.copyfileobj(out, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+        click.echo()
+
+
+def run_sharded(dataset, command, options, paths):
+    """Process shard files concurrently and merge them into one output.
+
+    Record ids continue across shards in merge order (shard order unless
+    ``--merge unordered``); error row numbers count from 1 per shard and are
+    reported with the shard they came from.
+    """
+    for flag, value in (('--checkpoint', options.checkpoint_path), ('--dedupe', options.dedupe),
+                        ('--max-memory', options.max_memory), ('--since-state', options.since_state)):
+        if value:
+            raise click.UsageError(f"{flag} requires a single input file")
+
+    output_file = options.output_file
+    settings = {**output_settings(options), "merge": options.merge}
+    manifest = Manifest(options.manifest_path) if options.manifest_path else None
+    if manifest and all(manifest.is_current(command, path, output_file, settings) for path in paths):
+        click.echo(f"⏭️  {len(paths)} shards of {options.input_file} are unchanged since the last run, skipping")
+        return
+
+    out = open(output_file, 'wb') if output_file else io.BytesIO()
+    writer = open_writer(out, dataset, options, datetime.now().isoformat())
+    spool_dir = os.path.dirname(os.path.abspath(output_file)) if output_file else None
+    total_rows = 0
+    errors = []
+    failures = []
+    start = time.perf_counter()
+    complete = False
+
+    try:
+        click.echo(f"📖 Reading {dataset.name} from {len(paths)} shards ({options.merge} merge)")
+        writer.write_header()
+        with tempfile.TemporaryDirectory(prefix='shards-', dir=spool_dir) as spool:
+            for result in process_shards(dataset.name, paths, spool, options.workers, options.merge,
+                                         options.chunk_size, options.engine, options.output_format,
+                                         options.decimal_type):
+                shard = os.path.basename(result.path)
+                with open(result.spool_path, 'rb') as fragments:
+                    # Shard-local ids continue after the rows merged so far
+                    writer.append_fragments(fragments, result.processed, id_offset=total_rows)
+                os.remove(result.spool_path)
+                total_rows += result.rows
+                errors.extend(f"{shard}: {error}" for error in result.errors)
+                if result.failure:
+                    failures.append(f"{shard}: {result.failure}")
+                    click.echo(f"❌ {shard}: {result.failure}")
+                else:
+                    click.echo(f"✅ {shard}: {result.processed} {dataset.name}, "
+                               f"{len(result.errors)} errors ({result.seconds:.2f}s)")
+
+        writer.write_footer(writer.records_written, len(errors) + len(failures))
+        complete = True
+        if manifest:
+            for path in paths:
+                manifest.record(command, path, output_file, settings)
+
+        seconds = time.perf_counter() - start
+        click.echo(f"\n📊 Processing Results ({len(paths)} shards, {total_rows} rows in {seconds:.2f}s):")
+        click.echo(f"   ✅ Successfully processed: {writer.records_written} {dataset.name}")
+        click.echo(f"   ❌ Errors: {len(errors) + len(failures)}")
+
+        if failures:
+            click.echo("\n🚨 Shards that could not be read:")
+            for failure in failures:
+                click.echo(f"   - {failure}")
         if errors:
             click.echo("\n🚨 Errors encountered:")
             for error in errors:
                 click.echo(f"   - {error}")
 
-        # Save output
-        output_data = {
-            "processed_at": datetime.now().isoformat(),
-            "total_processed": len(users),
-            "total_errors": len(errors),
-            "users": users
-        }
-
-        if output_file:
-            with open(output_file, 'w') as f:
-                json.dump(output_data, f, indent=2)
-            click.echo(f"💾 Output saved to {output_file}")
-        else:
-            click.echo(f"\n📄 JSON Output:")
-            click.echo(json.dumps(output_data, indent=2))
+        echo_output(out, output_file)
+    except BaseException:
+        if not complete:
+            discard_output(out, output_file)
+        raise
+    finally:
+        out.close()
+
+
+def run_delta(dataset, options):
+    """Output only the records inserted, updated or deleted since the run that wrote ``--since-state``.
+
+    Records carry a ``change`` field; deleted records consist of the change
+    and the key. A key given more than once keeps its last row unless
+    ``--dedupe`` picks another policy. The state file is replaced only after the output is
+    complete, so an interrupted run repeats the same delta.
+    """
+    for flag, value in (('--checkpoint', options.checkpoint_path), ('--manifest', options.manifest_path)):
+        if value:
+            raise click.UsageError(f"{flag} cannot be combined with --since-state")
+    budget = None
+    if options.max_memory:
+        try:
+            budget = parse_size(options.max_memory)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+
+    input_file = options.input_file
+    output_file = options.output_file
+    memory_limit = budget // 4 if budget else DEFAULT_MEMORY_LIMIT
+    key_field = dataset.key_field
+    delta = DeltaRun(options.since_state, dataset.name, dataset.schema, key_field,
+                     dataset.unique_fields[key_field], memory_limit)
+
+    # One row per key: a repeated key keeps its last row, like the state does
+    unique_fields = dataset.unique_fields if options.dedupe else {key_field: dataset.unique_fields[key_field]}
+    policy = options.dedupe or "keep-last"
+    duplicates = find_duplicates(input_file, dataset.schema, unique_fields, memory_limit=memory_limit)
+    dropped = rows_to_drop(duplicates, policy)
+
+    if output_file:
+        out = open(output_file, 'wb')
+    elif budget:
+        out = tempfile.TemporaryFile()
+    else:
+        out = io.BytesIO()
+    error_log = tempfile.TemporaryFile() if budget else io.BytesIO()
+    writer = JsonOutputWriter(out, dataset.name, datetime.now().isoformat())
+    total_errors = 0
+    complete = False
 
-    except Exception as e:
-        click.echo(f"❌ Error processing file: {e}")
+    try:
+        click.echo(f"📖 Reading {dataset.name} from {input_file} (changes since {options.since_state})")
+        writer.write_header()
+
+        for frame in iter_csv(input_file, delta.scan_schema, options.chunk_size or DEFAULT_CHUNK_ROWS,
+                              options.engine):
+            frame, chunk_errors = drop_rows(frame, dropped)
+            changes, transform_errors = delta.process(frame, dataset.transform_rows)
+            chunk_errors.extend(transform_errors)
+            for change, obj in changes:
+                click.echo(f"✅ {change.capitalize()} {dataset.describe(obj)}")
+
+            writer.write_records({"change": change, **obj.to_dict()} for change, obj in changes)
+            error_log.write("".join(f"{error}\n" for error in chunk_errors).encode())
+            total_errors += len(chunk_errors)
+            del frame, changes, chunk_errors
+
+        for keys in delta.deleted():
+            for key in keys:
+                click.echo(f"🗑️  Delete {key_field} '{key}'")
+            writer.write_records({"change": "delete", key_field: key} for key in keys)
+
+        writer.write_footer(writer.records_written, total_errors)
+        if output_file and os.path.isfile(output_file):
+            fsync_file(out)
+        delta.commit()
+        complete = True
+
+        counts = delta.counts
+        click.echo(f"\n📊 Changes since the previous run:")
+        click.echo(f"   ➕ Inserted: {counts['insert']} {dataset.name}")
+        click.echo(f"   ✏️  Updated: {counts['update']} {dataset.name}")
+        click.echo(f"   🗑️  Deleted: {counts['delete']} {dataset.name}")
+        click.echo(f"   ⏸️  Unchanged: {counts['unchanged']} {dataset.name}")
+        click.echo(f"   ❌ Errors: {total_errors}")
+
+        if duplicates:
+            click.echo(f"\n🔁 Duplicate groups ({len(duplicates)}, policy {policy}):")
+            for group in duplicates:
+                click.echo(f"   - {group.describe()}")
+
+        if total_errors:
+            click.echo("\n🚨 Errors encountered:")
+            error_log.seek(0)
+            for line in error_log:
+                click.echo(f"   - {line.decode().rstrip()}")
+
+        echo_output(out, output_file)
+    except BaseException:
+        if not complete:
+            discard_output(out, output_file)
+        raise
+    finally:
+        delta.close()
+        out.close()
+        error_log.close()
+
+
+def run_command(dataset, command, options):
+    """Process a single input file, or a directory or glob of shards."""
+    check_output_format(options)
+    paths = expand_inputs(options.input_file)
+    if len(paths) == 1 and options.since_state:
+        run_delta(dataset, dataclasses.replace(options, input_file=paths[0]))
+    elif len(paths) == 1:
+        run_processing(dataset, command, dataclasses.replace(options, input_file=paths[0]))
+    else:
+        run_sharded(dataset, command, options, paths)
 
 
 @cli.command()
-@click.option('--input-file', '-i', required=True, help='Input CSV file path')
-@click.option('--output-file', '-o', help='Output JSON file path (optional)')
-def process_products(input_file, output_file):
-    """Process product data from CSV and convert to JSON using shared models."""
+@processing_options
+def process_users(**options):
+    """Process user data from CSV and convert to JSON using shared models."""
 
     try:
-        df = pd.read_csv(input_file)
-        click.echo(f"📖 Reading {len(df)} products from {input_file}")
-
-        products = []
-        errors = []
-
-        for index, row in df.iterrows():
-            try:
-                # Validate required fields
-                required_fields = ['name', 'description', 'price', 'sku', 'category_id']
-                row_dict = row.to_dict()
-                validation_result = validate_required_fields(row_dict, required_fields)
-
-                if validation_result['errors']:
-                    errors.append(f"Row {index + 1}: {', '.join(validation_result['errors'])}")
-                    continue
-
-                # Create Product object using shared data model
-                product = Product(
-                    id=index + 1,
-                    name=capitalize_words(str(row['name'])),
-                    description=truncate_string(str(row['description']), 200),
-                    price=Decimal(str(row['price'])),
-                    sku=str(row['sku']).upper(),
-                    category_id=int(row['category_id']),
-                    stock_quantity=int(row.get('stock_quantity', 0)),
-                    tags=[tag.strip() for tag in str(row.get('tags', '')).split(',') if tag.strip()]
-                )
-
-                products.append(product.to_dict())
-                click.echo(f"✅ Processed product: {product.name} (${product.price})")
-
-            except Exception as e:
-                errors.append(f"Row {index + 1}: {str(e)}")
-
-        # Display results
-        click.echo(f"\n📊 Processing Results:")
-        click.echo(f"   ✅ Successfully processed: {len(products)} products")
-        click.echo(f"   ❌ Errors: {len(errors)}")
+        run_command(USERS, 'process-users', RunOptions(**options))
+    except click.UsageError:
+        raise
+    except Exception as e:
+        click.echo(f"❌ Error processing file: {e}")
 
-        if errors:
-            click.echo("\n🚨 Errors encountered:")
-            for error in errors:
-                click.echo(f"   - {error}")
 
-        # Save output
-        output_data = {
-            "processed_at": datetime.now().isoformat(),
-            "total_processed": len(products),
-            "total_errors": len(errors),
-            "products": products
-        }
-
-        if output_file:
-            with open(output_file, 'w') as f:
-                json.dump(output_data, f, indent=2)
-            click.echo(f"💾 Output saved to {output_file}")
-        else:
-            click.echo(f"\n📄 JSON Output:")
-            click.echo(json.dumps(output_data, indent=2))
+@cli.command()
+@processing_options
+def process_products(**options):
+    """Process product data from CSV and convert to JSON using shared models."""
 
+    try:
+        run_command(PRODUCTS, 'process-products', RunOptions(**options))
+    except click.UsageError:
+        raise
     except Exception as e:
         click.echo(f"❌ Error processing file: {e}")
 
@@ -213,8 +579,56 @@ def validate_email_cmd(email):
 
 
 @cli.command()
-def generate_sample_data():
-    """Generate sample CSV files for testing."""
+@click.option('--users', 'num_users', type=int, help='Number of synthetic users to generate')
+@click.option('--products', 'num_products', type=int, help='Number of synthetic products to generate')
+@click.option('--orders', 'num_orders', type=int, help='Number of synthetic orders to generate')
+@click.option('--seed', type=int, default=42, show_default=True, help='Random seed for deterministic output')
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'ndjson']), default='csv', show_default=True,
+              help='Output file format')
+@click.option('--invalid-email-rate', type=float, default=0.01, show_default=True,
+              help='Fraction of users with an invalid email')
+@click.option('--missing-rate', type=float, default=0.005, show_default=True,
+              help='Fraction of rows with a missing field')
+@click.option('--duplicate-rate', type=float, default=0.001, show_default=True,
+              help='Fraction of products reusing an existing SKU')
+def generate_sample_data(num_users, num_products, num_orders, seed, file_format,
+                         invalid_email_rate, missing_rate, duplicate_rate):
+    """Generate sample CSV files for testing.
+
+    Without size options a small hand-written fixture is written. With
+    --users/--products/--orders, deterministic synthetic data is streamed to
+    disk in chunks, so large files are generated in constant memory.
+    """
+
+    if num_users is None and num_products is None and num_orders is None:
+        _write_fixture_samples()
+        return
+
+    quality = DataQuality(invalid_email_rate, missing_rate, duplicate_rate)
+    num_users = num_users or 0
+    num_products = num_products or 0
+    num_orders = num_orders or 0
+
+    outputs = [
+        ('users', num_users, lambda: generate_users(num_users, seed, quality)),
+        ('products', num_products, lambda: generate_products(num_products, seed, quality)),
+        ('orders', num_orders,
+         lambda: generate_order_lines(num_orders, num_users, num_products, seed)),
+    ]
+
+    for name, count, make_chunks in outputs:
+        if not count:
+            continue
+        file_name = f"sample_{name}.{file_format}"
+        with open(file_name, 'w', newline='') as f:
+            rows = write_chunks(make_chunks(), f, file_format)
+        click.echo(f"📄 Generated {file_name} ({rows} rows)")
+
+    click.echo(f"\n✨ Synthetic data generated with seed {seed}")
+
+
+def _write_fixture_samples():
+    """Write the small hand-written sample CSV files."""
 
     # Generate sample users CSV
     users_data = [
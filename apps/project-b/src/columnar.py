@@ -0,0 +1,249 @@
+"""
+Columnar Parquet and Arrow IPC output for processed records (needs pyarrow).
+
+Column types come from the model's dataclass fields: integers, floats,
+booleans and strings map to their Arrow types, ``Decimal`` to
+``decimal128(18, 2)`` or int64 cents, and datetimes to timestamps. Enums,
+``List[str]`` fields and the SKU prefix column are dictionary-encoded.
+Parquet files hold ``List[str]`` fields as lists of plain strings instead:
+pyarrow cannot read list-of-dictionary columns back across row groups, and
+Parquet dictionary-encodes each column chunk anyway.
+Every processed chunk becomes one Parquet row group or Arrow record batch.
+The dictionaries grow across chunks, so Arrow files carry dictionary
+deltas rather than replacements.
+"""
+
+import dataclasses
+import enum
+from datetime import datetime
+from decimal import ROUND_HALF_EVEN, Decimal
+from operator import attrgetter
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, NamedTuple, Union, get_args, get_origin, \
+    get_type_hints
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+FORMATS = ("parquet", "arrow")
+COMPRESSIONS = {
+    "parquet": ("snappy", "zstd", "gzip", "brotli", "lz4", "none"),
+    "arrow": ("lz4", "zstd", "none"),
+}
+DEFAULT_COMPRESSION = {"parquet": "snappy", "arrow": "lz4"}
+DECIMAL_TYPES = ("decimal", "cents")
+DECIMAL_PRECISION = 18
+DECIMAL_SCALE = 2
+_CENT = Decimal(1).scaleb(-DECIMAL_SCALE)
+
+# Extra dictionary-encoded columns derived from a field: source -> (name, function)
+DERIVED_COLUMNS = {
+    "sku": ("sku_prefix", lambda sku: sku.split("-", 1)[0]),
+}
+
+
+def available() -> bool:
+    """Whether pyarrow is installed."""
+    return pa is not None
+
+
+class Column(NamedTuple):
+    """How one output column is read from a model object and typed."""
+
+    name: str
+    kind: str  # "plain", "decimal", "cents", "dictionary", "dictionary_list" or "list"
+    type: Any
+    read: Callable[[Any], Any]
+
+
+def _unwrap_optional(hint):
+    if get_origin(hint) is Union:
+        args = [arg for arg in get_args(hint) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return hint
+
+
+def model_columns(model: type, decimal_type: str = "decimal") -> List[Column]:
+    """Derive the output columns of a dataclass model.
+
+    Raises:
+        TypeError: If a field has a type without a column mapping
+    """
+    if decimal_type not in DECIMAL_TYPES:
+        raise ValueError(f"decimal_type must be one of {DECIMAL_TYPES}")
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    hints = get_type_hints(model)
+    columns = []
+    for field in dataclasses.fields(model):
+        hint = _unwrap_optional(hints[field.name])
+        read = attrgetter(field.name)
+        if hint is bool:
+            column = Column(field.name, "plain", pa.bool_(), read)
+        elif hint is int:
+            column = Column(field.name, "plain", pa.int64(), read)
+        elif hint is float:
+            column = Column(field.name, "plain", pa.float64(), read)
+        elif hint is str:
+            column = Column(field.name, "plain", pa.string(), read)
+        elif hint is datetime:
+            column = Column(field.name, "plain", pa.timestamp("us"), read)
+        elif hint is Decimal and decimal_type == "cents":
+            column = Column(f"{field.name}_cents", "cents", pa.int64(), read)
+        elif hint is Decimal:
+            column = Column(field.name, "decimal", pa.decimal128(DECIMAL_PRECISION, DECIMAL_SCALE), read)
+        elif isinstance(hint, type) and issubclass(hint, enum.Enum):
+            column = Column(field.name, "dictionary", dictionary,
+                            lambda obj, read=read: None if read(obj) is None else read(obj).value)
+        elif get_origin(hint) is list and get_args(hint) == (str,):
+            column = Column(field.name, "dictionary_list", pa.list_(dictionary), read)
+        else:
+            raise TypeError(f"No column type for {model.__name__}.{field.name} ({hints[field.name]})")
+        columns.append(column)
+
+        if field.name in DERIVED_COLUMNS:
+            name, derive = DERIVED_COLUMNS[field.name]
+            columns.append(Column(name, "dictionary", dictionary,
+                                  lambda obj, read=read, derive=derive: derive(read(obj))))
+    return columns
+
+
+class _Dictionary:
+    """Dictionary of one column, shared by all batches of a file."""
+
+    def __init__(self):
+        self.indices: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, values: Iterable[str]) -> List[int]:
+        indices = self.indices
+        encoded = []
+        for value in values:
+            if value is None:
+                encoded.append(None)
+                continue
+            index = indices.get(value)
+            if index is None:
+                index = indices[value] = len(self.values)
+                self.values.append(value)
+            encoded.append(index)
+        return encoded
+
+    def remap(self, array) -> Any:
+        """Re-encode a dictionary array built with another dictionary."""
+        mapping = pa.array(self.encode(array.dictionary.to_pylist()), type=pa.int32())
+        return self.wrap(pc.take(mapping, array.indices))
+
+    def wrap(self, indices) -> Any:
+        if not isinstance(indices, pa.Array):
+            indices = pa.array(indices, type=pa.int32())
+        return pa.DictionaryArray.from_arrays(indices, pa.array(self.values, type=pa.string()))
+
+
+class ColumnarOutputWriter:
+    """Write records as a Parquet or Arrow IPC file, one row group or batch per chunk.
+
+    Mirrors ``JsonOutputWriter``: ``write_header``, ``write_objects`` and
+    ``append_fragments`` per chunk, then ``write_footer``, which closes the
+    file. The collection name and processing time are stored in the schema
+    metadata.
+    """
+
+    def __init__(self, stream: BinaryIO, model: type, collection: str, processed_at: str,
+                 file_format: str = "parquet", compression: str = None, decimal_type: str = "decimal"):
+        if pa is None:
+            raise RuntimeError(f"{file_format} output requires pyarrow")
+        if file_format not in FORMATS:
+            raise ValueError(f"file_format must be one of {FORMATS}")
+        compression = compression or DEFAULT_COMPRESSION[file_format]
+        if compression not in COMPRESSIONS[file_format]:
+            raise ValueError(f"{file_format} compression must be one of {', '.join(COMPRESSIONS[file_format])}")
+        self.stream = stream
+        self.file_format = file_format
+        self.compression = None if compression == "none" else compression
+        self.columns = model_columns(model, decimal_type)
+        if file_format == "parquet":
+            self.columns = [column._replace(kind="list", type=pa.list_(pa.string()))
+                            if column.kind == "dictionary_list" else column for column in self.columns]
+        self.dictionaries = {column.name: _Dictionary() for column in self.columns
+                             if column.kind in ("dictionary", "dictionary_list")}
+        self.schema = pa.schema(
+            [pa.field(column.name, column.type) for column in self.columns],
+            metadata={"collection": collection, "processed_at": processed_at},
+        )
+        self.records_written = 0
+        self._writer = None
+
+    def write_header(self) -> None:
+        """Open the file."""
+        if self.file_format == "parquet":
+            self._writer = pq.ParquetWriter(self.stream, self.schema, compression=self.compression)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=self.compression, emit_dictionary_deltas=True)
+            self._writer = pa.ipc.new_file(self.stream, self.schema, options=options)
+
+    def _array(self, column: Column, objects: List[Any]):
+        values = [column.read(obj) for obj in objects]
+        if column.kind == "decimal":
+            values = [None if value is None else value.quantize(_CENT, ROUND_HALF_EVEN) for value in values]
+        elif column.kind == "cents":
+            values = [None if value is None else int(value.scaleb(DECIMAL_SCALE).to_integral_value(ROUND_HALF_EVEN))
+                      for value in values]
+        elif column.kind == "dictionary":
+            return self.dictionaries[column.name].wrap(self.dictionaries[column.name].encode(values))
+        elif column.kind == "dictionary_list":
+            offsets = [0]
+            for items in values:
+                offsets.append(offsets[-1] + len(items))
+            dictionary = self.dictionaries[column.name]
+            flat = dictionary.wrap(dictionary.encode(item for items in values for item in items))
+            return pa.ListArray.from_arrays(pa.array(offsets, type=pa.int32()), flat, type=column.type)
+        return pa.array(values, type=column.type)
+
+    def _write_batch(self, batch) -> None:
+        if self.file_format == "parquet":
+            self._writer.write_batch(batch, row_group_size=max(batch.num_rows, 1))
+        else:
+            self._writer.write_batch(batch)
+        self.records_written += batch.num_rows
+
+    def write_objects(self, objects: List[Any]) -> None:
+        """Write one chunk of model objects."""
+        if not objects:
+            return
+        arrays = [self._array(column, objects) for column in self.columns]
+        self._write_batch(pa.record_batch(arrays, schema=self.schema))
+
+    def append_fragments(self, source: BinaryIO, count: int, id_offset: int = 0) -> None:
+        """Append the batches of an Arrow file written by another writer of the same model.
+
+        Its dictionary columns are re-encoded against this file's dictionaries,
+        and its ``id`` column is shifted by ``id_offset``.
+        """
+        if not count:
+            return
+        reader = pa.ipc.open_file(source)
+        for number in range(reader.num_record_batches):
+            batch = reader.get_batch(number)
+            arrays = []
+            for column, array in zip(self.columns, batch.columns):
+                if column.name == "id" and id_offset:
+                    array = pc.add(array, pa.scalar(id_offset, type=array.type))
+                elif column.kind == "dictionary":
+                    array = self.dictionaries[column.name].remap(array)
+                elif column.kind == "dictionary_list":
+                    values = self.dictionaries[column.name].remap(array.values)
+                    array = pa.ListArray.from_arrays(array.offsets, values, type=column.type)
+                elif column.kind == "list":
+                    array = array.cast(column.type)
+                arrays.append(array)
+            self._write_batch(pa.record_batch(arrays, schema=self.schema))
+
+    def write_footer(self, total_processed: int, total_errors: int) -> None:
+        """Close the file (totals are reported by the caller, not stored)."""
+        if self._writer is None:
+            self.write_header()
+        self._writer.close()
@@ -0,0 +1,363 @@
+"""
+Schema-driven CSV reading for shared data models.
+
+Builds pandas read options (usecols, dtypes, post-parse converters) from the
+fields and type hints of a ``data_models`` dataclass, so columns are parsed
+once into their final types instead of being cast again for every row.
+
+Integer, float and boolean columns are parsed by ``read_csv`` itself (Int64,
+float64 and boolean dtypes). When a cell does not parse, the file (or the rest
+of it, for chunked reads) is read again as text and cast column by column: a
+column with a bad cell keeps its text (and unparseable cells of converted
+columns keep theirs), so the row validator reports the bad rows instead of the
+whole read failing.
+"""
+
+import dataclasses
+import importlib.util
+import typing
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from common_utils import parse_date
+
+
+_BOOL_TOKENS = {
+    **dict.fromkeys(("true", "1", "yes", "y", "t"), True),
+    **dict.fromkeys(("false", "0", "no", "n", "f"), False),
+}
+_INTEGER = r"[+-]?\d+"
+
+# Errors of converters and casts that mean "this cell does not parse"
+_PARSE_ERRORS = (ValueError, TypeError, ArithmeticError)
+
+
+def _parse_bool(value: str) -> bool:
+    """Parse a CSV boolean token ("True", "false", "1", ...).
+
+    Raises:
+        ValueError: If the token is not a boolean
+    """
+    try:
+        return _BOOL_TOKENS[str(value).strip().lower()]
+    except KeyError:
+        raise ValueError(f"Not a boolean: {value!r}") from None
+
+
+def _parse_tags(value: str) -> List[str]:
+    """Split a comma separated tag cell into a list of tags."""
+    return [tag.strip() for tag in value.split(',') if tag.strip()]
+
+
+def _keep_unparseable(converter: Callable[[str], Any]) -> Callable[[str], Any]:
+    """Wrap ``converter`` to return cells it cannot parse unchanged."""
+    def convert(value: str) -> Any:
+        try:
+            return converter(value)
+        except _PARSE_ERRORS:
+            return value
+    return convert
+
+
+def _cast_int(values: pd.Series) -> Optional[pd.Series]:
+    stripped = values.str.strip()
+    if not stripped.str.fullmatch(_INTEGER).fillna(True).all():
+        return None
+    return pd.to_numeric(stripped).astype("Int64")
+
+
+def _cast_float(values: pd.Series) -> Optional[pd.Series]:
+    result = pd.to_numeric(values.str.strip(), errors="coerce")
+    if (result.isna() & values.notna()).any():
+        return None
+    return result.astype("float64")
+
+
+def _cast_bool(values: pd.Series) -> Optional[pd.Series]:
+    result = values.str.strip().str.lower().map(_BOOL_TOKENS)
+    if (result.isna() & values.notna()).any():
+        return None
+    return result.astype("boolean")
+
+
+# Python type -> (pandas dtype to read with, converter applied after parsing)
+_TYPE_MAP: Dict[Any, tuple] = {
+    int: ("Int64", None),
+    float: ("float64", None),
+    bool: ("boolean", None),
+    str: ("string", None),
+    Decimal: ("string", _keep_unparseable(Decimal)),
+    datetime: ("string", _keep_unparseable(parse_date)),
+}
+
+# Cast of a whole text column to its final dtype, for reads that fell back to
+# text; None when a cell does not parse
+_COLUMN_CASTS: Dict[Any, Callable[[pd.Series], Optional[pd.Series]]] = {
+    int: _cast_int,
+    float: _cast_float,
+    bool: _cast_bool,
+}
+
+# Cast applied to the (string) categories of a categorical column
+_CATEGORY_CASTS: Dict[Any, Callable[[str], Any]] = {
+    int: int,
+    float: float,
+    bool: _parse_bool,
+}
+
+
+@dataclass
+class ReadSchema:
+    """Read options for loading a model's columns from CSV."""
+
+    model: type
+    columns: List[str]
+    dtype: Dict[str, Any]
+    converters: Dict[str, Callable[[Any], Any]] = field(default_factory=dict)
+    casts: Dict[str, Callable[[pd.Series], Optional[pd.Series]]] = field(default_factory=dict)
+    category_casts: Dict[str, Callable[[str], Any]] = field(default_factory=dict)
+    defaults: Dict[str, Any] = field(default_factory=dict)
+
+    def text_dtype(self) -> Dict[str, Any]:
+        """Read dtypes with every typed column read as text (categories stay)."""
+        return {k: v if v == "category" else "string" for k, v in self.dtype.items()}
+
+    def for_columns(self, available: Sequence[str]) -> "ReadSchema":
+        """Restrict the schema to the columns actually present in a file."""
+        available = set(available)
+        present = [column for column in self.columns if column in available]
+        return ReadSchema(
+            model=self.model,
+            columns=present,
+            dtype={k: v for k, v in self.dtype.items() if k in present},
+            converters={k: v for k, v in self.converters.items() if k in present},
+            casts={k: v for k, v in self.casts.items() if k in present},
+            category_casts={k: v for k, v in self.category_casts.items() if k in present},
+            defaults=dict(self.defaults),
+        )
+
+
+def _unwrap_optional(hint: Any) -> Any:
+    """Return X for Optional[X], otherwise the hint unchanged."""
+    if typing.get_origin(hint) is typing.Union:
+        args = [arg for arg in typing.get_args(hint) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return hint
+
+
+def build_read_schema(
+    model: type,
+    exclude: Sequence[str] = ("id", "created_at", "updated_at"),
+    categorical: Sequence[str] = (),
+) -> ReadSchema:
+    """Build CSV read options from a dataclass's fields and type hints.
+
+    Args:
+        model: A dataclass such as ``User`` or ``Product``
+        exclude: Fields that are never read from input files
+        categorical: Low-cardinality fields to read with the category dtype
+
+    Returns:
+        ReadSchema describing usecols, dtypes and converters
+    """
+    hints = typing.get_type_hints(model)
+    columns = []
+    dtype = {}
+    converters = {}
+    casts = {}
+    category_casts = {}
+    defaults = {}
+
+    for model_field in dataclasses.fields(model):
+        name = model_field.name
+        if name in exclude:
+            continue
+
+        hint = _unwrap_optional(hints[name])
+        if typing.get_origin(hint) in (list, List):
+            read_dtype, converter = "string", _parse_tags
+        else:
+            read_dtype, converter = _TYPE_MAP.get(hint, ("string", None))
+
+        if name in categorical:
+            read_dtype = "category"
+            if hint in _CATEGORY_CASTS:
+                category_casts[name] = _CATEGORY_CASTS[hint]
+        elif hint in _COLUMN_CASTS:
+            casts[name] = _COLUMN_CASTS[hint]
+
+        columns.append(name)
+        dtype[name] = read_dtype
+        if converter is not None:
+            converters[name] = converter
+
+        if model_field.default is not dataclasses.MISSING:
+            defaults[name] = model_field.default
+        elif model_field.default_factory is not dataclasses.MISSING:
+            defaults[name] = model_field.default_factory
+
+    return ReadSchema(model, columns, dtype, converters, casts, category_casts, defaults)
+
+
+def resolve_engine(engine: str = "auto") -> str:
+    """Pick the pandas CSV engine, preferring pyarrow when it is installed."""
+    if engine == "auto":
+        return "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+    return engine
+
+
+def read_header(path: str) -> List[str]:
+    """Read only the header row of a CSV file."""
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def _cast_categories(series: pd.Series, cast: Callable[[str], Any]) -> Optional[pd.Series]:
+    """Cast the categories of ``series``, merging those that cast equal ("True", "true").
+
+    Returns None when a category does not parse.
+    """
+    try:
+        categories = [cast(category) for category in series.cat.categories]
+    except _PARSE_ERRORS:
+        return None
+    if not categories:
+        return series
+    unique = list(dict.fromkeys(categories))
+    position = {category: index for index, category in enumerate(unique)}
+    remap = np.array([position[category] for category in categories])
+    codes = series.cat.codes.to_numpy()
+    codes = np.where(codes >= 0, remap[np.maximum(codes, 0)], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, unique), index=series.index, name=series.name)
+
+
+def apply_schema(frame: pd.DataFrame, schema: ReadSchema) -> pd.DataFrame:
+    """Apply casts, category casts and converters to a freshly parsed frame.
+
+    Casts only run on columns that were read as text. Columns with a cell
+    that does not parse are left as text, so the row validator reports each
+    bad row.
+    """
+    for column, cast in schema.casts.items():
+        if not isinstance(frame[column].dtype, pd.StringDtype):
+            continue
+        try:
+            result = cast(frame[column])
+        except _PARSE_ERRORS:
+            result = None
+        if result is not None:
+            frame[column] = result
+    for column, cast in schema.category_casts.items():
+        result = _cast_categories(frame[column], cast)
+        if result is not None:
+            frame[column] = result
+    for column, converter in schema.converters.items():
+        frame[column] = frame[column].astype(object).map(converter, na_action="ignore")
+    return frame
+
+
+def read_csv(path: str, schema: ReadSchema, engine: str = "auto", **kwargs) -> pd.DataFrame:
+    """Read a CSV file using the columns and types described by ``schema``.
+
+    Columns of the schema missing from the file are skipped, and columns of
+    the file unknown to the schema are never loaded.
+    """
+    schema = schema.for_columns(read_header(path))
+    try:
+        frame = pd.read_csv(path, usecols=schema.columns, dtype=schema.dtype, engine=resolve_engine(engine), **kwargs)
+    except ValueError:
+        # A cell does not parse as its column's dtype
+        frame = pd.read_csv(path, usecols=schema.columns, dtype=schema.text_dtype(),
+                            engine=resolve_engine(engine), **kwargs)
+    return apply_schema(frame, schema)
+
+
+def _skip(rows: int) -> Optional[Callable[[int], bool]]:
+    """``skiprows`` value skipping the first ``rows`` data rows (keeps the header)."""
+    # A callable, not a range: pandas would turn the range into a set of every skipped row
+    return (lambda row: 0 < row <= rows) if rows else None
+
+
+def _chunk_reader(path: str, schema: ReadSchema, dtype: Dict[str, Any], skip_rows: int):
+    return pd.read_csv(path, usecols=schema.columns, dtype=dtype, engine="c", iterator=True,
+                       skiprows=_skip(skip_rows))
+
+
+def iter_csv(
+    path: str,
+    schema: ReadSchema,
+    chunk_size: Union[int, Callable[[], int], None] = None,
+    engine: str = "auto",
+    skip_rows: int = 0,
+) -> Iterator[pd.DataFrame]:
+    """Read a CSV file as a sequence of typed frames.
+
+    Args:
+        path: CSV file path
+        schema: Read schema for the target model
+        chunk_size: Rows per frame, or a callable asked for the size of each
+            next frame; ``None`` reads the whole file at once
+        engine: CSV parser engine (pyarrow cannot stream, so chunked reads use "c")
+        skip_rows: Number of data rows to skip, e.g. when resuming a run
+
+    Yields:
+        Frames whose index continues the row numbering of the file
+    """
+    if chunk_size is None:
+        frame = read_csv(path, schema, engine="c" if skip_rows else engine, skiprows=_skip(skip_rows))
+        frame.index += skip_rows
+        yield frame
+        return
+
+    schema = schema.for_columns(read_header(path))
+    dtype = schema.dtype
+    # Row number of the reader's first row, and of the next row to read
+    start = next_row = skip_rows
+    reader = _chunk_reader(path, schema, dtype, start)
+    try:
+        while True:
+            size = chunk_size() if callable(chunk_size) else chunk_size
+            try:
+                frame = reader.get_chunk(size)
+            except StopIteration:
+                return
+            except ValueError:
+                if dtype is not schema.dtype:
+                    raise
+                # A cell of this chunk does not parse: read the rest of the file as text
+                reader.close()
+                dtype = schema.text_dtype()
+                start = next_row
+                reader = _chunk_reader(path, schema, dtype, start)
+                frame = reader.get_chunk(size)
+            frame.index += start
+            next_row += len(frame)
+            yield apply_schema(frame, schema)
+    finally:
+        reader.close()
+
+
+def iter_records(frame: pd.DataFrame, schema: ReadSchema) -> Iterator[Dict[str, Any]]:
+    """Yield rows as dicts of native Python values.
+
+    Missing cells become ``None`` unless the model field has a default, in
+    which case the default is used.
+    """
+    columns = list(frame.columns)
+    values = []
+    for column in columns:
+        series = frame[column]
+        values.append(series.astype(object).where(series.notna(), None).tolist())
+
+    defaults = {k: v for k, v in schema.defaults.items() if k in columns}
+    for row in zip(*values):
+        record = dict(zip(columns, row))
+        for name, default in defaults.items():
+            if record[name] is None:
+                record[name] = default() if callable(default) else default
+        yield record
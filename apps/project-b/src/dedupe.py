@@ -0,0 +1,210 @@
+"""
+Duplicate detection for unique fields (usernames, emails, SKUs).
+
+Detection runs as a separate pass over only the key columns, before records
+are processed, so every policy (including keep-last) can be applied while the
+main pass streams. Keys are normalized the same way the transforms normalize
+them and reduced to 64-bit hashes:
+
+- while the hashes fit in the memory limit they are kept in NumPy arrays and
+  duplicates are found with one sort;
+- beyond that, ``(hash, row)`` pairs are spilled to disk, partitioned into
+  hash buckets, and each bucket is checked on its own.
+
+Only rows whose hash occurs more than once are then re-read to compare the
+actual key values, so the common all-unique case costs one scan of the key
+columns and one sort, and hash collisions never produce false duplicates.
+"""
+
+import os
+import tempfile
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from csv_schema import ReadSchema, iter_csv
+
+
+POLICIES = ("keep-first", "keep-last", "reject")
+
+SCAN_CHUNK_ROWS = 500_000
+DEFAULT_MEMORY_LIMIT = 256 << 20
+NUM_BUCKETS = 64
+# Bytes per (hash, row) pair
+_PAIR_BYTES = 16
+
+
+@dataclass
+class DuplicateGroup:
+    """Rows (1-based) sharing the same value of a unique field."""
+
+    field: str
+    key: str
+    rows: List[int]
+
+    def describe(self) -> str:
+        return f"{self.field} '{self.key}' in rows {', '.join(str(row) for row in self.rows)}"
+
+
+class HashIndex:
+    """Collect ``(hash, row)`` pairs and find hashes that occur more than once."""
+
+    def __init__(self, memory_limit: int = DEFAULT_MEMORY_LIMIT):
+        self.memory_limit = memory_limit
+        self.hashes: List[np.ndarray] = []
+        self.rows: List[np.ndarray] = []
+        self.size = 0
+        self.spill_dir: Optional[tempfile.TemporaryDirectory] = None
+
+    @property
+    def spilled(self) -> bool:
+        return self.spill_dir is not None
+
+    def add(self, hashes: np.ndarray, rows: np.ndarray) -> None:
+        self.hashes.append(hashes)
+        self.rows.append(rows)
+        self.size += len(hashes) * _PAIR_BYTES
+        if self.spilled or self.size > self.memory_limit:
+            self._spill()
+
+    def _bucket_path(self, bucket: int) -> str:
+        return os.path.join(self.spill_dir.name, f"bucket-{bucket:03d}.bin")
+
+    def _spill(self) -> None:
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.TemporaryDirectory(prefix="dedupe-")
+        hashes = np.concatenate(self.hashes)
+        rows = np.concatenate(self.rows)
+        buckets = (hashes % NUM_BUCKETS).astype(np.int64)
+        order = np.argsort(buckets, kind="stable")
+        pairs = np.column_stack([hashes[order], rows[order].astype(np.uint64)])
+        bounds = np.searchsorted(buckets[order], np.arange(NUM_BUCKETS + 1))
+        for bucket in range(NUM_BUCKETS):
+            start, end = bounds[bucket], bounds[bucket + 1]
+            if start < end:
+                with open(self._bucket_path(bucket), "ab") as f:
+                    pairs[start:end].tofile(f)
+        self.hashes, self.rows, self.size = [], [], 0
+
+    @staticmethod
+    def _repeated(hashes: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        if len(hashes) < 2:
+            return rows[:0]
+        unique, counts = np.unique(hashes, return_counts=True)
+        repeated = unique[counts > 1]
+        if not len(repeated):
+            return rows[:0]
+        return rows[np.isin(hashes, repeated)]
+
+    def candidate_rows(self) -> np.ndarray:
+        """Row numbers whose hash is shared with at least one other row."""
+        if not self.spilled:
+            if not self.hashes:
+                return np.empty(0, dtype=np.int64)
+            return self._repeated(np.concatenate(self.hashes), np.concatenate(self.rows))
+
+        if self.hashes:
+            self._spill()
+        found = []
+        for bucket in range(NUM_BUCKETS):
+            path = self._bucket_path(bucket)
+            if os.path.exists(path):
+                pairs = np.fromfile(path, dtype=np.uint64).reshape(-1, 2)
+                found.append(self._repeated(pairs[:, 0], pairs[:, 1].astype(np.int64)))
+        self.spill_dir.cleanup()
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+
+def _key_frames(path: str, schema: ReadSchema, fields: List[str]) -> Iterator[pd.DataFrame]:
+    """Read only the key columns of a file, in large chunks."""
+    key_schema = ReadSchema(
+        model=schema.model,
+        columns=[column for column in schema.columns if column in fields],
+        dtype={k: v for k, v in schema.dtype.items() if k in fields},
+    )
+    return iter_csv(path, key_schema, SCAN_CHUNK_ROWS)
+
+
+def find_duplicates(
+    path: str,
+    schema: ReadSchema,
+    unique_fields: Dict[str, Callable[[pd.Series], pd.Series]],
+    memory_limit: int = DEFAULT_MEMORY_LIMIT,
+) -> List[DuplicateGroup]:
+    """Find every group of rows sharing a value of one of ``unique_fields``.
+
+    Args:
+        path: CSV file path
+        schema: Read schema of the dataset
+        unique_fields: Field name -> normalization applied before comparing
+        memory_limit: Memory for hashes per field before spilling to disk
+
+    Returns:
+        Duplicate groups ordered by first row
+    """
+    fields = list(unique_fields)
+    indexes = {field: HashIndex(memory_limit // max(len(fields), 1)) for field in fields}
+
+    for frame in _key_frames(path, schema, fields):
+        for field, index in indexes.items():
+            if field not in frame:
+                continue
+            keys = unique_fields[field](frame[field]).dropna()
+            hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+            index.add(hashes, keys.index.to_numpy(dtype=np.int64))
+
+    candidates = {field: index.candidate_rows() for field, index in indexes.items()}
+    if not any(len(rows) for rows in candidates.values()):
+        return []
+
+    # Compare actual key values of the (few) rows with a repeated hash
+    members: Dict[tuple, List[int]] = defaultdict(list)
+    for frame in _key_frames(path, schema, fields):
+        for field, rows in candidates.items():
+            if not len(rows) or field not in frame:
+                continue
+            keys = unique_fields[field](frame[field])
+            keys = keys[keys.index.isin(rows)].dropna()
+            for row, key in zip(keys.index, keys.tolist()):
+                members[(field, key)].append(row + 1)
+
+    groups = [DuplicateGroup(field, key, rows) for (field, key), rows in members.items() if len(rows) > 1]
+    groups.sort(key=lambda group: (group.rows[0], group.field))
+    return groups
+
+
+def rows_to_drop(groups: List[DuplicateGroup], policy: str) -> Dict[int, str]:
+    """Map 0-based row indexes removed by ``policy`` to an error message."""
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown dedupe policy: '{policy}'")
+
+    dropped: Dict[int, str] = {}
+    for group in groups:
+        if policy == "keep-first":
+            losers = group.rows[1:]
+        elif policy == "keep-last":
+            losers = group.rows[:-1]
+        else:
+            losers = group.rows
+        for row in losers:
+            dropped.setdefault(row - 1, f"Row {row}: Duplicate {group.describe()}")
+    return dropped
+
+
+def drop_rows(frame: pd.DataFrame, dropped: Dict[int, str]) -> tuple:
+    """Remove dropped rows from a chunk.
+
+    Returns:
+        The remaining frame and the error messages of the removed rows
+    """
+    if not dropped:
+        return frame, []
+    mask = frame.index.isin(list(dropped))
+    if not mask.any():
+        return frame, []
+    errors = [dropped[row] for row in frame.index[mask]]
+    return frame[~mask], errors
+
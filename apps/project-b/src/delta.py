@@ -0,0 +1,305 @@
+"""
+Delta processing against the state of a previous run (``--since-state``).
+
+The state file holds one fixed-width entry per record key (the normalized
+``username`` or ``sku``): a 64-bit hash of the key, a 64-bit hash of the
+row's CSV values and the location of the key text. Entries are sorted by key
+hash and the file is memory-mapped, so looking up the keys of a chunk only
+touches the pages it needs and the state never has to fit in memory.
+
+Every input row is hashed as it is read, before any conversion. Rows whose
+hash matches the state are skipped; only inserted and updated rows are
+converted, validated and serialized. The entries of the new state are
+collected like the duplicate-detection hashes: sorted in memory while they
+fit, otherwise spilled to key-hash range buckets and sorted one bucket at a
+time. Merging each bucket with the same key range of the old state yields
+the deleted keys and the new state file, which replaces the old one once the
+output is complete.
+"""
+
+import dataclasses
+import os
+import shutil
+import struct
+import tempfile
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from csv_schema import ReadSchema, apply_schema
+
+
+CHANGES = ("insert", "update", "delete")
+
+DEFAULT_CHUNK_ROWS = 100_000
+NUM_BUCKETS = 64
+_BUCKET_SHIFT = np.uint64(64 - 6)
+
+_MAGIC = b"PBDELTA1"
+# Magic, dataset name, number of entries
+_HEADER = struct.Struct("<8s24sQ")
+# Per entry, after the sorted key hashes: content hash and key text location.
+# A content hash of 0 marks a key whose record was never emitted (real
+# content hashes always have their lowest bit set).
+_ENTRY = np.dtype([("content", "<u8"), ("offset", "<u8"), ("length", "<u8")])
+_RECORD = np.dtype([("key", "<u8"), ("content", "<u8"), ("offset", "<u8"), ("length", "<u8")])
+
+
+def _bucket_start(bucket: int) -> np.uint64:
+    return np.uint64(bucket) << _BUCKET_SHIFT
+
+
+class PreviousState:
+    """Memory-mapped state of the previous run; empty when ``path`` does not exist.
+
+    Raises:
+        ValueError: If the file is not a state file of ``dataset``
+    """
+
+    def __init__(self, path: str, dataset: str):
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.entries = np.empty(0, dtype=_ENTRY)
+        self.heap = b""
+        if not os.path.exists(path):
+            return
+
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"{path} is not a delta state file")
+        magic, name, count = _HEADER.unpack(header)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a delta state file")
+        name = name.rstrip(b"\0").decode()
+        if name != dataset:
+            raise ValueError(f"{path} holds the state of {name}, not {dataset}")
+        if not count:
+            return
+
+        offset = _HEADER.size
+        self.keys = np.memmap(path, dtype=np.uint64, mode='r', offset=offset, shape=(count,))
+        offset += self.keys.nbytes
+        self.entries = np.memmap(path, dtype=_ENTRY, mode='r', offset=offset, shape=(count,))
+        offset += self.entries.nbytes
+        if os.path.getsize(path) > offset:
+            self.heap = np.memmap(path, dtype=np.uint8, mode='r', offset=offset)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def lookup(self, keys: np.ndarray) -> np.ndarray:
+        """Content hashes stored for ``keys``, 0 where a key is unknown."""
+        contents = np.zeros(len(keys), dtype=np.uint64)
+        if not len(self.keys) or not len(keys):
+            return contents
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = np.asarray(self.keys[positions]) == keys
+        contents[found] = self.entries["content"][positions[found]]
+        return contents
+
+    def key_text(self, index: int) -> str:
+        entry = self.entries[index]
+        start = int(entry["offset"])
+        return bytes(self.heap[start:start + int(entry["length"])]).decode()
+
+
+class StateBuilder:
+    """Collect the entries of the new state and write it next to ``path``.
+
+    Key texts go straight to a spool file. Entries stay in memory up to
+    ``memory_limit`` bytes and are then spilled to key-hash range buckets.
+    """
+
+    def __init__(self, path: str, dataset: str, memory_limit: int):
+        self.path = path
+        self.dataset = dataset
+        self.memory_limit = memory_limit
+        self.spool = tempfile.TemporaryDirectory(prefix="delta-", dir=os.path.dirname(os.path.abspath(path)))
+        self.heap = open(os.path.join(self.spool.name, "keys.bin"), 'w+b')
+        self.heap_size = 0
+        self.parts: List[np.ndarray] = []
+        self.size = 0
+        self.spilled = False
+        self.count = 0
+
+    def add(self, keys: np.ndarray, contents: np.ndarray, texts: List[str]) -> None:
+        encoded = [text.encode() for text in texts]
+        lengths = np.fromiter(map(len, encoded), dtype=np.uint64, count=len(encoded))
+        records = np.empty(len(keys), dtype=_RECORD)
+        records["key"] = keys
+        records["content"] = contents
+        records["length"] = lengths
+        records["offset"] = self.heap_size + np.cumsum(lengths) - lengths
+        self.heap.write(b"".join(encoded))
+        self.heap_size += int(lengths.sum())
+
+        self.parts.append(records)
+        self.size += records.nbytes
+        if self.spilled or self.size > self.memory_limit:
+            self._spill()
+
+    def _bucket_path(self, bucket: int) -> str:
+        return os.path.join(self.spool.name, f"bucket-{bucket:03d}.bin")
+
+    def _spill(self) -> None:
+        self.spilled = True
+        records = np.concatenate(self.parts)
+        buckets = (records["key"] >> _BUCKET_SHIFT).astype(np.int64)
+        order = np.argsort(buckets, kind="stable")
+        records, buckets = records[order], buckets[order]
+        bounds = np.searchsorted(buckets, np.arange(NUM_BUCKETS + 1))
+        for bucket in range(NUM_BUCKETS):
+            start, end = bounds[bucket], bounds[bucket + 1]
+            if start < end:
+                with open(self._bucket_path(bucket), 'ab') as f:
+                    records[start:end].tofile(f)
+        self.parts, self.size = [], 0
+
+    @staticmethod
+    def _sorted(records: np.ndarray) -> np.ndarray:
+        records = records[np.argsort(records["key"], kind="stable")]
+        # A key given more than once keeps its last row
+        keys = records["key"]
+        return records[np.append(keys[1:] != keys[:-1], True)] if len(records) else records
+
+    def _ranges(self) -> Iterator[Tuple[int, int, np.ndarray]]:
+        """Sorted entries per range of buckets ``[first, last)``."""
+        if not self.spilled:
+            records = np.concatenate(self.parts) if self.parts else np.empty(0, dtype=_RECORD)
+            yield 0, NUM_BUCKETS, self._sorted(records)
+            return
+        if self.parts:
+            self._spill()
+        for bucket in range(NUM_BUCKETS):
+            path = self._bucket_path(bucket)
+            records = np.fromfile(path, dtype=_RECORD) if os.path.exists(path) else np.empty(0, dtype=_RECORD)
+            yield bucket, bucket + 1, self._sorted(records)
+
+    def merge(self, previous: PreviousState) -> Iterator[List[str]]:
+        """Write the new state to a temporary file, yielding the deleted keys per key range."""
+        tmp_path = f"{self.path}.tmp"
+        entries_path = os.path.join(self.spool.name, "entries.bin")
+        with open(tmp_path, 'wb') as out, open(entries_path, 'w+b') as entries:
+            out.write(_HEADER.pack(_MAGIC, self.dataset.encode(), 0))
+            for first, last, records in self._ranges():
+                start = np.searchsorted(previous.keys, _bucket_start(first)) if first else 0
+                end = np.searchsorted(previous.keys, _bucket_start(last)) if last < NUM_BUCKETS else len(previous)
+                if start < end:
+                    yield self._deleted(previous, start, end, records["key"])
+
+                records["key"].tofile(out)
+                entry = np.empty(len(records), dtype=_ENTRY)
+                for name in _ENTRY.names:
+                    entry[name] = records[name]
+                entry.tofile(entries)
+                self.count += len(records)
+
+            entries.seek(0)
+            shutil.copyfileobj(entries, out)
+            self.heap.seek(0)
+            shutil.copyfileobj(self.heap, out)
+            out.seek(0)
+            out.write(_HEADER.pack(_MAGIC, self.dataset.encode(), self.count))
+            out.flush()
+            os.fsync(out.fileno())
+
+    @staticmethod
+    def _deleted(previous: PreviousState, start: int, end: int, keys: np.ndarray) -> List[str]:
+        old_keys = np.asarray(previous.keys[start:end])
+        kept = np.zeros(len(old_keys), dtype=bool)
+        if len(keys):
+            positions = np.minimum(np.searchsorted(keys, old_keys), len(keys) - 1)
+            kept = keys[positions] == old_keys
+        # Keys never emitted need no delete record
+        emitted = np.asarray(previous.entries["content"][start:end]) != 0
+        return [previous.key_text(start + index) for index in np.flatnonzero(~kept & emitted)]
+
+    def commit(self) -> None:
+        """Replace the state file with the one written by ``merge``."""
+        os.replace(f"{self.path}.tmp", self.path)
+        self.close()
+
+    def close(self) -> None:
+        self.heap.close()
+        self.spool.cleanup()
+        if os.path.exists(f"{self.path}.tmp"):
+            os.remove(f"{self.path}.tmp")
+
+
+class DeltaRun:
+    """Compare an input with the state of the previous run, chunk by chunk.
+
+    Args:
+        path: State file; created on the first run
+        dataset: Dataset name stored in the state file
+        schema: Read schema of the dataset
+        key_field: Field identifying a record across runs
+        normalize: Normalization applied to the key before hashing
+        memory_limit: Memory for new state entries before spilling to disk
+    """
+
+    def __init__(self, path: str, dataset: str, schema: ReadSchema, key_field: str,
+                 normalize: Callable[[pd.Series], pd.Series], memory_limit: int):
+        self.key_field = key_field
+        self.normalize = normalize
+        # Rows are hashed as read (text); casts and converters only run for changed rows
+        self.scan_schema = dataclasses.replace(schema, dtype=schema.text_dtype(), converters={}, casts={},
+                                               category_casts={})
+        self.convert_schema = schema
+        self.previous = PreviousState(path, dataset)
+        self.builder = StateBuilder(path, dataset, memory_limit)
+        self.counts = dict.fromkeys(CHANGES + ("unchanged",), 0)
+
+    def process(self, frame: pd.DataFrame,
+                transform_rows: Callable[[pd.DataFrame], Tuple[List[Tuple[Any, Any]], List[str]]],
+                ) -> Tuple[List[Tuple[str, Any]], List[str]]:
+        """Transform the inserted and updated rows of a chunk read with ``scan_schema``.
+
+        ``transform_rows`` returns ``(row, object)`` pairs, ``row`` being the
+        frame index the object was built from. A changed row that fails
+        validation keeps its previous state entry, so it is retried on the
+        next run.
+
+        Returns:
+            ``(change, object)`` pairs and the errors of the changed rows
+        """
+        keys = self.normalize(frame[self.key_field])
+        has_key = keys.notna().to_numpy()
+        keys = keys[has_key]
+        key_hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+        contents = pd.util.hash_pandas_object(frame, index=False).to_numpy() | np.uint64(1)
+
+        previous = np.zeros(len(frame), dtype=np.uint64)
+        previous[has_key] = self.previous.lookup(key_hashes)
+        changed = previous != contents
+        self.counts["unchanged"] += int((~changed).sum())
+
+        changed_frame = frame[changed]
+        rows, errors = transform_rows(apply_schema(changed_frame.copy(),
+                                                   self.convert_schema.for_columns(frame.columns)))
+
+        applied = np.isin(frame.index.to_numpy(), [row for row, _ in rows])
+        stored = np.where(changed & ~applied, previous, contents)
+        self.builder.add(key_hashes, stored[has_key], keys.tolist())
+
+        previous_by_row = dict(zip(changed_frame.index, previous[changed]))
+        results = []
+        for row, obj in rows:
+            change = "update" if previous_by_row[row] else "insert"
+            self.counts[change] += 1
+            results.append((change, obj))
+        return results, errors
+
+    def deleted(self) -> Iterator[List[str]]:
+        """Keys of the previous state missing from the input, in batches."""
+        for keys in self.builder.merge(self.previous):
+            self.counts["delete"] += len(keys)
+            yield keys
+
+    def commit(self) -> None:
+        """Make the new state current; call once the output is durable."""
+        self.builder.commit()
+
+    def close(self) -> None:
+        self.builder.close()
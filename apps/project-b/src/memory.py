@@ -0,0 +1,164 @@
+"""
+Memory-bounded chunk sizing for the CSV processing commands.
+
+The per-row cost of a run (parsed frame, model objects, dicts and serialized
+JSON) is estimated once on a small sample with ``tracemalloc``. Chunk sizes are
+then derived from the memory left between the process RSS before each chunk
+and the budget, less a headroom for memory no estimate sees. Every chunk that
+raises the peak RSS of the process measures what a row really costs, and the
+estimate is raised to match; chunks also follow the row width when it drifts
+from the sample. Chunks never go below a small floor, so a tight budget makes a
+run slower, not fail.
+"""
+
+import os
+import re
+import resource
+import sys
+import tracemalloc
+from typing import Callable, Optional
+
+import pandas as pd
+
+
+SAMPLE_ROWS = 1_000
+# Below this, per-chunk parser overhead dominates while the memory saved is negligible
+MIN_CHUNK_ROWS = 100
+MAX_CHUNK_ROWS = 1_000_000
+
+# The sampled cost is divided by this until chunks have been measured: parser
+# buffers and allocator fragmentation are invisible to tracemalloc
+SAFETY_FACTOR = 0.5
+# Share of the budget kept free for memory no estimate sees (modules imported
+# lazily, allocator arenas that are not returned, page cache of the output)
+HEADROOM = 0.1
+# Relative change in row width that triggers a new chunk size
+DRIFT_TOLERANCE = 0.25
+
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def parse_size(text: str) -> int:
+    """Parse a human readable size such as ``512M`` or ``2G`` into bytes."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*", text.upper())
+    if not match:
+        raise ValueError(f"Invalid memory size: '{text}'")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def format_size(num_bytes: int) -> str:
+    """Format a byte count as MiB."""
+    return f"{num_bytes / (1 << 20):.1f}M"
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss()
+
+
+def peak_rss() -> int:
+    """Peak resident set size of this process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def frame_bytes_per_row(frame: pd.DataFrame) -> float:
+    """Average in-memory size of one parsed row."""
+    if frame.empty:
+        return 0.0
+    return float(frame.memory_usage(deep=True, index=False).sum()) / len(frame)
+
+
+class ChunkSizer:
+    """Pick chunk sizes that keep a run under a memory budget.
+
+    Args:
+        budget: Maximum resident memory for the process, in bytes
+        max_rows: Upper bound for a chunk (e.g. an explicit --chunk-size)
+        rss: Reads the current resident set size, in bytes
+        peak: Reads the peak resident set size, in bytes
+    """
+
+    def __init__(self, budget: int, max_rows: Optional[int] = None,
+                 rss: Callable[[], int] = current_rss, peak: Callable[[], int] = peak_rss):
+        self.budget = budget
+        self._rss = rss
+        self._peak_rss = peak
+        self.max_rows = max_rows or MAX_CHUNK_ROWS
+        # RSS growth per row of a chunk, at its peak
+        self.row_cost = 0.0
+        self.frame_row_bytes = 0.0
+        self.overhead_ratio = 1.0
+        self.chunk_rows = MIN_CHUNK_ROWS
+        # RSS and peak RSS before the current chunk
+        self.baseline = rss()
+        self.peak = peak()
+        self.smallest = None
+        self.largest = None
+
+    @property
+    def limit(self) -> int:
+        """RSS that chunks are sized to stay under."""
+        return int(self.budget * (1 - HEADROOM))
+
+    def calibrate(self, sample: pd.DataFrame, process: Callable[[pd.DataFrame], None]) -> None:
+        """Estimate the full per-row cost of processing a sample frame."""
+        if sample.empty:
+            return
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        process(sample)
+        _, peak = tracemalloc.get_traced_memory()
+        if not tracing:
+            tracemalloc.stop()
+
+        self.frame_row_bytes = frame_bytes_per_row(sample)
+        traced = max(peak - baseline, 1) / len(sample) + self.frame_row_bytes
+        self.row_cost = traced / SAFETY_FACTOR
+        self.overhead_ratio = self.row_cost / max(self.frame_row_bytes, 1.0)
+        self.baseline = self._rss()
+        self._resize()
+
+    def observe(self, frame: pd.DataFrame) -> None:
+        """Learn from a chunk that has just been processed."""
+        peak = self._peak_rss()
+        if peak > self.peak:
+            # This chunk set the process peak, so it shows what its rows cost
+            measured = (peak - self.baseline) / self.chunk_rows
+            if measured > self.row_cost:
+                self.row_cost = measured
+                self.overhead_ratio = self.row_cost / max(self.frame_row_bytes, 1.0)
+            self.peak = peak
+
+        row_bytes = frame_bytes_per_row(frame)
+        if row_bytes and self.frame_row_bytes:
+            drift = abs(row_bytes - self.frame_row_bytes) / self.frame_row_bytes
+            if drift > DRIFT_TOLERANCE:
+                self.frame_row_bytes = row_bytes
+                self.row_cost = row_bytes * self.overhead_ratio
+
+    def next_size(self) -> int:
+        """Rows to read for the next chunk."""
+        # Whatever the previous chunks left resident is no longer free
+        self.baseline = self._rss()
+        self.peak = max(self.peak, self._peak_rss())
+        self._resize()
+        self.smallest = self.chunk_rows if self.smallest is None else min(self.smallest, self.chunk_rows)
+        self.largest = self.chunk_rows if self.largest is None else max(self.largest, self.chunk_rows)
+        return self.chunk_rows
+
+    def _resize(self) -> None:
+        free = self.limit - self.baseline
+        if free <= 0 or not self.row_cost:
+            self.chunk_rows = MIN_CHUNK_ROWS
+            return
+        rows = int(free / self.row_cost)
+        self.chunk_rows = max(MIN_CHUNK_ROWS, min(rows, self.max_rows))
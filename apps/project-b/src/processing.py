@@ -0,0 +1,148 @@
+"""
+Record transformations for the CSV processing commands.
+
+Each dataset bundles the shared model, its read schema and a transform that
+validates one chunk of parsed rows and turns it into model objects.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from common_utils import FieldError, capitalize_words, schema_from_dataclass, truncate_string
+from data_models import User, Product
+
+from csv_schema import ReadSchema, build_read_schema, iter_records
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """A processable input type (users, products)."""
+
+    name: str
+    model: type
+    schema: ReadSchema
+    transform: Callable[[pd.DataFrame], Tuple[List[Any], List[str]]]
+    # Like transform, but pairs every object with the frame index of its row
+    transform_rows: Callable[[pd.DataFrame], Tuple[List[Tuple[Any, Any]], List[str]]]
+    describe: Callable[[Any], str]
+    # Fields that must be unique, with the normalization the transform applies
+    unique_fields: Dict[str, Callable[[pd.Series], pd.Series]] = field(default_factory=dict)
+    # Unique field identifying a record across runs (--since-state)
+    key_field: Optional[str] = None
+
+
+def format_errors(index: int, errors: List[FieldError]) -> str:
+    """Format the validation errors of a row for the error log."""
+    return f"Row {index + 1}: {', '.join(error.message for error in errors)}"
+
+
+def objects_only(transform_rows: Callable[[pd.DataFrame], Tuple[List[Tuple[Any, Any]], List[str]]],
+                 ) -> Callable[[pd.DataFrame], Tuple[List[Any], List[str]]]:
+    """Turn a transform of ``(row, object)`` pairs into one of objects."""
+    def transform(frame: pd.DataFrame) -> Tuple[List[Any], List[str]]:
+        rows, errors = transform_rows(frame)
+        return [obj for _, obj in rows], errors
+    return transform
+
+
+def transform_user_rows(frame: pd.DataFrame) -> Tuple[List[Tuple[Any, User]], List[str]]:
+    """Validate a chunk of user rows and build ``(row, User)`` pairs.
+
+    Row numbers in error messages (and user ids) come from the frame index,
+    so they stay stable when a file is processed in chunks.
+    """
+    users = []
+    errors = []
+    validate = USER_SCHEMA.compile()
+
+    for index, row in zip(frame.index, iter_records(frame, USERS.schema)):
+        # Required fields, types and email format in one compiled check
+        values, row_errors = validate(row)
+        if row_errors:
+            errors.append(format_errors(index, row_errors))
+            continue
+
+        try:
+            # Create User object using shared data model
+            users.append((index, User(
+                id=index + 1,
+                username=values['username'].lower(),
+                email=values['email'].lower(),
+                first_name=capitalize_words(values['first_name']),
+                last_name=capitalize_words(values['last_name']),
+                is_active=values['is_active']
+            )))
+
+        except Exception as e:
+            errors.append(f"Row {index + 1}: {str(e)}")
+
+    return users, errors
+
+
+def transform_product_rows(frame: pd.DataFrame) -> Tuple[List[Tuple[Any, Product]], List[str]]:
+    """Validate a chunk of product rows and build ``(row, Product)`` pairs."""
+    products = []
+    errors = []
+    validate = PRODUCT_SCHEMA.compile()
+
+    for index, row in zip(frame.index, iter_records(frame, PRODUCTS.schema)):
+        values, row_errors = validate(row)
+        if row_errors:
+            errors.append(format_errors(index, row_errors))
+            continue
+
+        try:
+            # Create Product object using shared data model
+            products.append((index, Product(
+                id=index + 1,
+                name=capitalize_words(values['name']),
+                description=truncate_string(values['description'], 200),
+                price=values['price'],
+                sku=values['sku'].upper(),
+                category_id=values['category_id'],
+                stock_quantity=values['stock_quantity'],
+                tags=values['tags']
+            )))
+
+        except Exception as e:
+            errors.append(f"Row {index + 1}: {str(e)}")
+
+    return products, errors
+
+
+# Record validators compiled from the shared models (required fields, types, formats, ranges)
+USER_SCHEMA = schema_from_dataclass(User, include=("username", "email", "first_name", "last_name", "is_active"))
+PRODUCT_SCHEMA = schema_from_dataclass(
+    Product,
+    include=("name", "description", "price", "sku", "category_id", "stock_quantity", "tags"),
+)
+
+# Read schemas derived from the shared models (dtypes, usecols, converters)
+USERS = Dataset(
+    name="users",
+    model=User,
+    schema=build_read_schema(User, categorical=("is_active",)),
+    transform=objects_only(transform_user_rows),
+    transform_rows=transform_user_rows,
+    describe=lambda user: f"user: {user.full_name}",
+    unique_fields={
+        "username": lambda values: values.str.lower(),
+        "email": lambda values: values.str.lower(),
+    },
+    key_field="username",
+)
+
+PRODUCTS = Dataset(
+    name="products",
+    model=Product,
+    schema=build_read_schema(Product, categorical=("category_id", "is_active")),
+    transform=objects_only(transform_product_rows),
+    transform_rows=transform_product_rows,
+    describe=lambda product: f"product: {product.name} (${product.price})",
+    unique_fields={"sku": lambda values: values.str.upper()},
+    key_field="sku",
+)
+
+DATASETS = {dataset.name: dataset for dataset in (USERS, PRODUCTS)}
@@ -0,0 +1,209 @@
+"""
+Synthetic sample data generation for load and performance testing.
+
+Rows are generated with vectorized NumPy sampling one chunk at a time and
+streamed to disk, so memory use stays constant regardless of the row count.
+Each chunk is drawn from its own generator seeded with ``(seed, stream,
+chunk_index)``, which keeps the output deterministic for a given seed.
+"""
+
+from dataclasses import dataclass
+from typing import Iterator, TextIO
+
+import numpy as np
+import pandas as pd
+
+from data_models import OrderStatus
+
+
+CHUNK_ROWS = 100_000
+
+FIRST_NAMES = np.array([
+    "john", "jane", "bob", "alice", "maria", "li", "ahmed", "olga", "carlos", "yuki",
+    "emma", "noah", "liam", "sofia", "ivan", "fatima", "chen", "anna", "lucas", "mia",
+])
+LAST_NAMES = np.array([
+    "doe", "smith", "wilson", "nguyen", "garcia", "kim", "ivanova", "khan", "silva", "tanaka",
+    "brown", "jones", "miller", "davis", "lopez", "wang", "muller", "rossi", "novak", "lee",
+])
+EMAIL_DOMAINS = np.array(["example.com", "mail.com", "corp.example.org", "shop.test"])
+
+ADJECTIVES = np.array([
+    "wireless", "smart", "compact", "premium", "portable", "classic", "ultra", "eco",
+    "pro", "mini", "deluxe", "rugged",
+])
+NOUNS = np.array([
+    "headphones", "smartphone", "laptop", "cookbook", "speaker", "camera", "backpack",
+    "keyboard", "monitor", "novel", "watch", "charger",
+])
+SKU_PREFIXES = np.array(["PHONE", "LAPTOP", "BOOK", "AUDIO", "CAM", "BAG", "KEY", "MON"])
+TAGS = np.array([
+    "electronics", "books", "audio", "mobile", "computer", "programming", "python",
+    "outdoor", "gaming", "office", "kitchen", "travel", "kids", "sale", "new", "gift",
+])
+
+NUM_CATEGORIES = 50
+MAX_TAGS = 4
+MAX_ORDER_LINES = 5
+ORDER_EPOCH = np.datetime64("2024-01-01T00:00:00")
+ORDER_SPAN_SECONDS = 2 * 365 * 24 * 3600
+
+STATUS_VALUES = np.array([status.value for status in OrderStatus])
+STATUS_WEIGHTS = np.array([0.10, 0.10, 0.10, 0.15, 0.50, 0.05])
+
+
+@dataclass
+class DataQuality:
+    """Fractions of deliberately bad rows mixed into generated data."""
+
+    invalid_email_rate: float = 0.01
+    missing_rate: float = 0.005
+    duplicate_rate: float = 0.001
+
+
+def _zipf_weights(size: int, exponent: float = 1.2) -> np.ndarray:
+    """Normalized Zipf-like weights, so a few values dominate."""
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _rng(seed: int, stream: int, chunk_index: int) -> np.random.Generator:
+    return np.random.default_rng([seed, stream, chunk_index])
+
+
+def _chunk_bounds(total: int) -> Iterator[tuple]:
+    for chunk_index, start in enumerate(range(0, total, CHUNK_ROWS)):
+        yield chunk_index, start, min(start + CHUNK_ROWS, total)
+
+
+def _blank_out(frame: pd.DataFrame, columns: list, rate: float, rng: np.random.Generator) -> None:
+    """Clear one random column in a ``rate`` fraction of rows."""
+    mask = rng.random(len(frame)) < rate
+    if not mask.any():
+        return
+    targets = rng.integers(len(columns), size=int(mask.sum()))
+    rows = np.flatnonzero(mask)
+    for column_index, column in enumerate(columns):
+        frame.loc[frame.index[rows[targets == column_index]], column] = None
+
+
+def _concat(*parts) -> np.ndarray:
+    result = parts[0]
+    for part in parts[1:]:
+        result = np.char.add(result, part)
+    return result
+
+
+def generate_users(total: int, seed: int, quality: DataQuality) -> Iterator[pd.DataFrame]:
+    """Yield chunks of synthetic user rows (CSV columns of ``User``)."""
+    for chunk_index, start, end in _chunk_bounds(total):
+        rng = _rng(seed, 1, chunk_index)
+        n = end - start
+        ids = np.arange(start + 1, end + 1).astype(str)
+
+        first = FIRST_NAMES[rng.integers(len(FIRST_NAMES), size=n)]
+        last = LAST_NAMES[rng.integers(len(LAST_NAMES), size=n)]
+        username = _concat(first, "_", last, ids)
+        domain = EMAIL_DOMAINS[rng.choice(len(EMAIL_DOMAINS), size=n, p=_zipf_weights(len(EMAIL_DOMAINS)))]
+
+        # Invalid emails drop the "@" separator
+        invalid = rng.random(n) < quality.invalid_email_rate
+        separator = np.where(invalid, "", "@")
+        email = _concat(first, ".", last, ids, separator, domain)
+
+        frame = pd.DataFrame({
+            "username": username,
+            "email": email,
+            "first_name": first,
+            "last_name": last,
+            "is_active": rng.random(n) >= 0.1,
+        })
+        _blank_out(frame, ["email", "first_name", "last_name"], quality.missing_rate, rng)
+        yield frame
+
+
+def generate_products(total: int, seed: int, quality: DataQuality) -> Iterator[pd.DataFrame]:
+    """Yield chunks of synthetic product rows (CSV columns of ``Product``)."""
+    category_weights = _zipf_weights(NUM_CATEGORIES)
+    tag_weights = _zipf_weights(len(TAGS))
+
+    for chunk_index, start, end in _chunk_bounds(total):
+        rng = _rng(seed, 2, chunk_index)
+        n = end - start
+        ids = np.arange(start + 1, end + 1)
+
+        adjective = ADJECTIVES[rng.integers(len(ADJECTIVES), size=n)]
+        noun = NOUNS[rng.integers(len(NOUNS), size=n)]
+        category_id = rng.choice(NUM_CATEGORIES, size=n, p=category_weights) + 1
+
+        # Duplicate SKUs reuse the SKU of a random earlier product
+        sku_ids = ids.copy()
+        duplicate = (rng.random(n) < quality.duplicate_rate) & (ids > 1)
+        if duplicate.any():
+            sku_ids[duplicate] = rng.integers(1, ids[duplicate])
+        sku_prefix = SKU_PREFIXES[sku_ids % len(SKU_PREFIXES)]
+        sku = _concat(sku_prefix, "-", np.char.zfill(sku_ids.astype(str), 7))
+
+        tag_count = rng.integers(1, MAX_TAGS + 1, size=n)
+        # Weighted sampling without replacement: the MAX_TAGS largest u ** (1 / weight) of each row
+        tag_keys = rng.random((n, len(TAGS))) ** (1 / tag_weights)
+        tag_picks = TAGS[np.argsort(-tag_keys, axis=1)[:, :MAX_TAGS]]
+        tags = tag_picks[:, 0]
+        for position in range(1, MAX_TAGS):
+            tags = np.where(tag_count > position, _concat(tags, ",", tag_picks[:, position]), tags)
+
+        cents = np.round(rng.lognormal(mean=3.5, sigma=1.0, size=n) * 100).astype(np.int64) + 99
+        frame = pd.DataFrame({
+            "name": _concat(adjective, " ", noun),
+            "description": _concat("A ", adjective, " ", noun, " for everyday use"),
+            "price": cents / 100,
+            "sku": sku,
+            "category_id": category_id,
+            "stock_quantity": rng.integers(0, 500, size=n),
+            "tags": tags,
+        })
+        _blank_out(frame, ["name", "description", "price"], quality.missing_rate, rng)
+        yield frame
+
+
+def generate_order_lines(total: int, num_users: int, num_products: int, seed: int) -> Iterator[pd.DataFrame]:
+    """Yield chunks of synthetic order lines, one row per ordered product."""
+    for chunk_index, start, end in _chunk_bounds(total):
+        rng = _rng(seed, 3, chunk_index)
+        n = end - start
+        order_ids = np.arange(start + 1, end + 1)
+
+        line_counts = rng.integers(1, MAX_ORDER_LINES + 1, size=n)
+        user_id = rng.integers(1, max(num_users, 1) + 1, size=n)
+        status = STATUS_VALUES[rng.choice(len(STATUS_VALUES), size=n, p=STATUS_WEIGHTS)]
+        seconds = rng.integers(0, ORDER_SPAN_SECONDS, size=n)
+        order_date = (ORDER_EPOCH + seconds.astype("timedelta64[s]")).astype(str)
+
+        lines = int(line_counts.sum())
+        # Popular products are ordered far more often than the long tail
+        product_id = (rng.zipf(1.3, size=lines) - 1) % max(num_products, 1) + 1
+
+        yield pd.DataFrame({
+            "order_id": np.repeat(order_ids, line_counts),
+            "user_id": np.repeat(user_id, line_counts),
+            "status": np.repeat(status, line_counts),
+            "order_date": np.repeat(order_date, line_counts),
+            "product_id": product_id,
+            "quantity": rng.integers(1, 4, size=lines),
+        })
+
+
+def write_chunks(chunks: Iterator[pd.DataFrame], output: TextIO, file_format: str = "csv") -> int:
+    """Stream data frame chunks to an open text file as CSV or NDJSON.
+
+    Returns:
+        Number of rows written
+    """
+    rows = 0
+    for chunk_index, frame in enumerate(chunks):
+        if file_format == "ndjson":
+            output.write(frame.to_json(orient="records", lines=True))
+        else:
+            frame.to_csv(output, index=False, header=chunk_index == 0)
+        rows += len(frame)
+    return rows
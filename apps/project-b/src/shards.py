@@ -0,0 +1,170 @@
+"""
+Concurrent processing of sharded inputs.
+
+An input given as a directory or glob pattern is expanded into its shard
+files, which are processed in a process pool. Each worker parses, validates
+and encodes one shard into a spool file of JSON record fragments (or Arrow
+record batches for columnar output); the parent
+only appends finished spool files to the output, either in shard order or in
+completion order. Workers ask the kernel to read their shard (and the next
+one) ahead, so disk reads overlap with parsing instead of stalling it.
+
+Workers number records within their shard (the first row is id 1) and report
+how many rows they read; the parent shifts the ids of each spool file by the
+rows merged before it, so ids continue across shards without a counting pass.
+"""
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, List, NamedTuple, Optional
+
+from columnar import ColumnarOutputWriter
+from csv_schema import iter_csv
+from processing import DATASETS
+from writers import JsonOutputWriter
+
+MERGE_MODES = ("ordered", "unordered")
+_GLOB_CHARS = "*?["
+
+
+def expand_inputs(pattern: str) -> List[str]:
+    """Resolve an input argument into the files it names.
+
+    A directory stands for the CSV files in it, and a pattern containing
+    ``*``, ``?`` or ``[`` is expanded; both are returned sorted. Any other
+    argument is returned as the single input file.
+    """
+    if os.path.isdir(pattern):
+        paths = glob.glob(os.path.join(pattern, "*.csv"))
+    elif any(char in pattern for char in _GLOB_CHARS):
+        paths = [path for path in glob.glob(pattern) if os.path.isfile(path)]
+    else:
+        return [pattern]
+    if not paths:
+        raise FileNotFoundError(f"No CSV files match '{pattern}'")
+    return sorted(paths)
+
+
+def readahead(path: str) -> None:
+    """Ask the kernel to start reading a whole file into the page cache."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+class ShardTask(NamedTuple):
+    """One shard to process (must be picklable)."""
+
+    dataset: str
+    path: str
+    spool_path: str
+    chunk_size: Optional[int]
+    engine: str
+    next_path: Optional[str]
+    output_format: str = "json"
+    decimal_type: str = "decimal"
+
+
+class ShardResult(NamedTuple):
+    """Outcome of one shard."""
+
+    path: str
+    spool_path: str
+    rows: int
+    processed: int
+    errors: List[str]
+    seconds: float
+    failure: Optional[str] = None
+
+
+def process_shard(task: ShardTask) -> ShardResult:
+    """Process one shard into a spool file (runs in a worker process).
+
+    Row numbers in errors and record ids count within the shard.
+    """
+    start = time.perf_counter()
+    readahead(task.path)
+    if task.next_path:
+        readahead(task.next_path)
+
+    dataset = DATASETS[task.dataset]
+    rows = 0
+    errors = []
+    with open(task.spool_path, "wb") as spool:
+        if task.output_format == "json":
+            # Pretend records precede, so every fragment starts with its separator
+            writer = JsonOutputWriter(spool, dataset.name, "", records_written=1)
+        else:
+            # Uncompressed Arrow batches, re-encoded into the output file by the parent
+            writer = ColumnarOutputWriter(spool, dataset.model, dataset.name, "", "arrow", "none",
+                                          task.decimal_type)
+            writer.write_header()
+        preceding = writer.records_written
+        try:
+            for frame in iter_csv(task.path, dataset.schema, task.chunk_size, task.engine):
+                rows += len(frame)
+                objects, frame_errors = dataset.transform(frame)
+                writer.write_objects(objects)
+                errors.extend(frame_errors)
+            if task.output_format != "json":
+                writer.write_footer(0, 0)
+        except Exception as e:
+            # An unreadable shard contributes nothing rather than part of its records
+            spool.truncate(0)
+            return ShardResult(task.path, task.spool_path, rows, 0, errors,
+                               time.perf_counter() - start, failure=str(e))
+    return ShardResult(task.path, task.spool_path, rows, writer.records_written - preceding, errors,
+                       time.perf_counter() - start)
+
+
+def process_shards(
+    dataset: str,
+    paths: List[str],
+    spool_dir: str,
+    workers: Optional[int] = None,
+    merge: str = "ordered",
+    chunk_size: Optional[int] = None,
+    engine: str = "auto",
+    output_format: str = "json",
+    decimal_type: str = "decimal",
+) -> Iterator[ShardResult]:
+    """Process shards in a process pool.
+
+    Args:
+        dataset: Name of the dataset ("users" or "products")
+        paths: Shard files
+        spool_dir: Directory for the per-shard spool files
+        workers: Number of worker processes (defaults to the CPU count)
+        merge: "ordered" yields results in shard order, "unordered" as soon
+            as each shard is done
+        chunk_size: Rows per frame within a shard (whole shard by default)
+        engine: CSV parser engine
+        output_format: "json" for JSON fragments, or a columnar format for
+            Arrow spool files
+        decimal_type: Decimal column type of columnar output
+
+    Yields:
+        ShardResult per shard; the caller appends its spool file to the output,
+        shifting its ids by the rows of the shards appended before it
+    """
+    if merge not in MERGE_MODES:
+        raise ValueError(f"merge must be one of {MERGE_MODES}")
+    spool_extension = "json" if output_format == "json" else "arrow"
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        tasks = [
+            ShardTask(dataset, path, os.path.join(spool_dir, f"{number:06d}.{spool_extension}"), chunk_size,
+                      engine, paths[number + 1] if number + 1 < len(paths) else None, output_format, decimal_type)
+            for number, path in enumerate(paths)
+        ]
+        futures = [pool.submit(process_shard, task) for task in tasks]
+        for future in (futures if merge == "ordered" else as_completed(futures)):
+            yield future.result()
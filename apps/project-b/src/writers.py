@@ -0,0 +1,102 @@
+"""
+Streaming output writers for processed records.
+
+Records are written as they are produced instead of being collected into one
+large document first, and every writer can report a byte position that is
+safe to truncate back to when a run is resumed.
+"""
+
+import json
+import re
+import shutil
+from typing import Any, BinaryIO, Dict, Iterable
+
+# Start of a record in the list, up to its "id" value (ids come first in to_dict)
+_RECORD_START = b"\n    {"
+_RECORD_ID = re.compile(rb'(\n    \{\n      "id": )(\d+)')
+_COPY_BLOCK = 1 << 20
+
+
+class JsonOutputWriter:
+    """Write ``{"processed_at": ..., "<collection>": [...], totals}`` incrementally.
+
+    The layout matches ``json.dump(..., indent=2)`` of the same document,
+    except that the totals follow the record list since they are only known
+    once all records have been written.
+    """
+
+    def __init__(self, stream: BinaryIO, collection: str, processed_at: str, records_written: int = 0):
+        self.stream = stream
+        self.collection = collection
+        self.processed_at = processed_at
+        self.records_written = records_written
+
+    def write_header(self) -> None:
+        """Write the document opening up to the start of the record list."""
+        header = (
+            "{\n"
+            f"  \"processed_at\": {json.dumps(self.processed_at)},\n"
+            f"  {json.dumps(self.collection)}: ["
+        )
+        self.stream.write(header.encode())
+
+    def write_records(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Append records to the list."""
+        parts = []
+        for record in records:
+            separator = ",\n    " if self.records_written else "\n    "
+            parts.append(separator + json.dumps(record, indent=2).replace("\n", "\n    "))
+            self.records_written += 1
+        if parts:
+            self.stream.write("".join(parts).encode())
+
+    def write_objects(self, objects: Iterable[Any]) -> None:
+        """Append model objects, serialized with ``to_dict()``."""
+        self.write_records(obj.to_dict() for obj in objects)
+
+    def append_fragments(self, source: BinaryIO, count: int, id_offset: int = 0) -> None:
+        """Append ``count`` records written by another writer.
+
+        ``source`` must have been written by a writer that started with
+        ``records_written=1``, so every record carries its leading separator.
+        With ``id_offset``, the ``id`` of every record is shifted by it.
+        """
+        if not count:
+            return
+        if not self.records_written:
+            source.read(1)  # the first record of the list has no comma
+        if id_offset:
+            self._copy_shifted(source, id_offset)
+        else:
+            shutil.copyfileobj(source, self.stream)
+        self.records_written += count
+
+    def _copy_shifted(self, source: BinaryIO, id_offset: int) -> None:
+        def shift(match):
+            return match.group(1) + str(int(match.group(2)) + id_offset).encode()
+
+        # Rewrite whole records only, so an id is never split across blocks
+        pending = b""
+        for block in iter(lambda: source.read(_COPY_BLOCK), b""):
+            pending += block
+            cut = pending.rfind(_RECORD_START)
+            if cut > 0:
+                self.stream.write(_RECORD_ID.sub(shift, pending[:cut]))
+                pending = pending[cut:]
+        self.stream.write(_RECORD_ID.sub(shift, pending))
+
+    def write_footer(self, total_processed: int, total_errors: int) -> None:
+        """Close the record list and the document."""
+        closing = "\n  ]" if self.records_written else "]"
+        footer = (
+            f"{closing},\n"
+            f"  \"total_processed\": {total_processed},\n"
+            f"  \"total_errors\": {total_errors}\n"
+            "}"
+        )
+        self.stream.write(footer.encode())
+
+    def position(self) -> int:
+        """Byte offset of everything written so far."""
+        self.stream.flush()
+        return self.stream.tell()
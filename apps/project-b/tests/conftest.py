@@ -0,0 +1,26 @@
+import csv
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+USER_FIELDS = ["username", "email", "first_name", "last_name", "is_active"]
+
+
+@pytest.fixture
+def write_users(tmp_path):
+    """Write user rows (tuples in USER_FIELDS order) to a CSV file and return its path."""
+    def write(rows, name="users.csv"):
+        path = tmp_path / name
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(USER_FIELDS)
+            writer.writerows(rows)
+        return str(path)
+    return write
+
+
+def user_rows(count, start=0):
+    return [(f"user{i}", f"user{i}@example.com", "first", "last", "True") for i in range(start, start + count)]
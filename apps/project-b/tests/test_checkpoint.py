@@ -0,0 +1,95 @@
+import json
+
+from click.testing import CliRunner
+
+import cli
+from checkpoint import Checkpoint, Manifest
+from conftest import user_rows
+
+
+def without_timestamps(records):
+    return [{k: v for k, v in record.items() if k not in ("created_at", "updated_at")} for record in records]
+
+
+def run(*args):
+    return CliRunner().invoke(cli.cli, list(args))
+
+
+def interrupt_after(frames):
+    """An iter_csv that raises KeyboardInterrupt once ``frames`` chunks were yielded."""
+    real_iter_csv = cli.iter_csv
+
+    def iter_csv(*args, **kwargs):
+        for number, frame in enumerate(real_iter_csv(*args, **kwargs)):
+            if number == frames:
+                raise KeyboardInterrupt
+            yield frame
+    return iter_csv
+
+
+def test_resumed_run_matches_uninterrupted_run(write_users, tmp_path, monkeypatch):
+    rows = user_rows(9)
+    rows[4] = ("user4", "not-an-email", "first", "last", "True")
+    path = write_users(rows)
+    output, state = str(tmp_path / "out.json"), str(tmp_path / "run.ckpt")
+    args = ["process-users", "-i", path, "-o", output, "--checkpoint", state, "--chunk-size", "2"]
+
+    with monkeypatch.context() as patch:
+        patch.setattr(cli, "iter_csv", interrupt_after(3))
+        assert run(*args).exit_code != 0
+    assert json.load(open(state))["rows_done"] == 6
+
+    result = run(*args)
+    assert result.exit_code == 0, result.output
+    assert "Resuming" in result.output
+    resumed = json.load(open(output))
+
+    reference = str(tmp_path / "reference.json")
+    assert run("process-users", "-i", path, "-o", reference).exit_code == 0
+    expected = json.load(open(reference))
+
+    assert without_timestamps(resumed["users"]) == without_timestamps(expected["users"])
+    assert [user["id"] for user in resumed["users"]] == [1, 2, 3, 4, 6, 7, 8, 9]
+    assert (resumed["total_processed"], resumed["total_errors"]) == (8, 1)
+    assert not (tmp_path / "run.ckpt").exists()
+    assert not (tmp_path / "run.ckpt.errors").exists()
+
+
+def test_changed_output_options_restart_from_scratch(write_users, tmp_path, monkeypatch):
+    path = write_users(user_rows(6))
+    output, state = str(tmp_path / "out.json"), str(tmp_path / "run.ckpt")
+    args = ["process-users", "-i", path, "-o", output, "--checkpoint", state, "--chunk-size", "2"]
+
+    with monkeypatch.context() as patch:
+        patch.setattr(cli, "iter_csv", interrupt_after(1))
+        run(*args)
+
+    result = run(*args, "--dedupe", "keep-first")
+    assert result.exit_code == 0, result.output
+    assert "Resuming" not in result.output
+    assert json.load(open(output))["total_processed"] == 6
+
+
+def test_checkpoint_loads_only_matching_run_key(tmp_path):
+    path = str(tmp_path / "state")
+    Checkpoint(path, {"input_file": "a.csv", "format": "json"}).commit(rows_done=10)
+
+    assert Checkpoint(path, {"input_file": "a.csv", "format": "json"}).load()["rows_done"] == 10
+    assert Checkpoint(path, {"input_file": "a.csv", "format": "parquet"}).load() is None
+
+
+def test_manifest_is_current_only_for_same_content_and_settings(write_users, tmp_path):
+    path = write_users(user_rows(3))
+    output = tmp_path / "out.json"
+    output.write_text("{}")
+    manifest = Manifest(str(tmp_path / "manifest.json"))
+    manifest.record("process-users", path, str(output), {"format": "json"})
+
+    reloaded = Manifest(str(tmp_path / "manifest.json"))
+    assert reloaded.is_current("process-users", path, str(output), {"format": "json"})
+    assert not reloaded.is_current("process-users", path, str(output), {"format": "arrow"})
+    assert not reloaded.is_current("process-products", path, str(output), {"format": "json"})
+
+    with open(path, "a") as f:
+        f.write("extra,extra@example.com,first,last,True\n")
+    assert not reloaded.is_current("process-users", path, str(output), {"format": "json"})
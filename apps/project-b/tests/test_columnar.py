@@ -0,0 +1,140 @@
+import io
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import List, Optional
+
+import pytest
+
+import columnar
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+START = datetime(2024, 5, 1, 12, 30)
+
+
+class Color(Enum):
+    RED = "red"
+    GREEN = "green"
+    BLUE = "blue"
+
+
+@dataclass
+class Item:
+    id: int
+    sku: str
+    price: Decimal
+    color: Optional[Color]
+    in_stock: bool
+    weight: Optional[float]
+    created_at: datetime
+    tags: List[str] = field(default_factory=list)
+
+
+def make_items(start, count, colors, tags):
+    return [Item(id=item_id, sku=f"{colors[item_id % len(colors)].name[:2]}-{item_id}",
+                 price=Decimal(item_id) / 8, color=None if item_id % 5 == 4 else colors[item_id % len(colors)],
+                 in_stock=item_id % 2 == 0, weight=None if item_id % 3 else item_id / 4, created_at=START,
+                 tags=tags[:item_id % (len(tags) + 1)])
+            for item_id in range(start, start + count)]
+
+
+# Later chunks bring colors, SKU prefixes and tags the earlier ones did not have
+CHUNKS = [
+    make_items(0, 4, [Color.RED], ["new"]),
+    make_items(4, 5, [Color.RED, Color.GREEN], ["new", "sale"]),
+    make_items(9, 3, [Color.BLUE], ["clearance", "new", "sale"]),
+]
+ITEMS = [item for chunk in CHUNKS for item in chunk]
+
+
+def write(chunks, file_format, **options):
+    stream = io.BytesIO()
+    writer = columnar.ColumnarOutputWriter(stream, Item, "items", "2024-05-01T12:30:00", file_format, **options)
+    writer.write_header()
+    for chunk in chunks:
+        writer.write_objects(chunk)
+    writer.write_footer(writer.records_written, 0)
+    assert writer.records_written == sum(len(chunk) for chunk in chunks)
+    return io.BytesIO(stream.getvalue())
+
+
+def read(stream, file_format):
+    if file_format == "parquet":
+        parquet = pq.ParquetFile(stream)
+        return parquet.read(), [parquet.read_row_group(number) for number in range(parquet.num_row_groups)]
+    reader = pa.ipc.open_file(stream)
+    return reader.read_all(), [reader.get_batch(number) for number in range(reader.num_record_batches)]
+
+
+def expected_rows(items):
+    return [{"id": item.id, "sku": item.sku, "sku_prefix": item.sku.split("-", 1)[0],
+             "price": item.price.quantize(Decimal("0.01")), "color": item.color and item.color.value,
+             "in_stock": item.in_stock, "weight": item.weight, "created_at": item.created_at, "tags": item.tags}
+            for item in items]
+
+
+@pytest.mark.parametrize("file_format", columnar.FORMATS)
+def test_round_trip(file_format):
+    table, chunks = read(write(CHUNKS, file_format), file_format)
+    assert table.num_rows == len(ITEMS)
+    assert [chunk.num_rows for chunk in chunks] == [len(chunk) for chunk in CHUNKS]
+    assert table.schema.metadata == {b"collection": b"items", b"processed_at": b"2024-05-01T12:30:00"}
+
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    tags = pa.list_(dictionary) if file_format == "arrow" else pa.list_(pa.string())
+    assert {name: table.schema.field(name).type for name in table.column_names} == {
+        "id": pa.int64(), "sku": pa.string(), "sku_prefix": dictionary, "price": pa.decimal128(18, 2),
+        "color": dictionary, "in_stock": pa.bool_(), "weight": pa.float64(), "created_at": pa.timestamp("us"),
+        "tags": tags,
+    }
+    assert table.select(list(expected_rows(ITEMS[:1])[0])).to_pylist() == expected_rows(ITEMS)
+
+
+def test_arrow_files_carry_dictionary_deltas():
+    # The file reader resolves every dictionary up front; reading the file body as a
+    # stream shows the dictionaries each batch was written against
+    reader = pa.ipc.open_stream(write(CHUNKS, "arrow").getvalue()[8:])
+    batches = list(reader)
+    assert [batch.column("color").dictionary.to_pylist() for batch in batches] == [
+        ["red"], ["red", "green"], ["red", "green", "blue"]]
+    assert [batch.column("sku_prefix").dictionary.to_pylist() for batch in batches] == [
+        ["RE"], ["RE", "GR"], ["RE", "GR", "BL"]]
+    assert [batch.column("tags").values.dictionary.to_pylist() for batch in batches] == [
+        ["new"], ["new", "sale"], ["new", "sale", "clearance"]]
+    # Two new entries for each of the three dictionary columns, none sent as a replacement
+    assert reader.stats.num_dictionary_deltas == 6
+    assert reader.stats.num_replaced_dictionaries == 0
+
+
+def test_cents():
+    table, _ = read(write(CHUNKS, "parquet", decimal_type="cents"), "parquet")
+    assert table.schema.field("price_cents").type == pa.int64()
+    assert table.column("price_cents").to_pylist() == [
+        int((item.price * 100).quantize(Decimal(1))) for item in ITEMS]
+
+
+def test_parquet_reads_back_with_pandas():
+    frame = pytest.importorskip("pandas").read_parquet(write(CHUNKS, "parquet"))
+    assert len(frame) == len(ITEMS)
+    assert [list(tags) for tags in frame["tags"]] == [item.tags for item in ITEMS]
+    assert str(frame["color"].dtype) == "category"
+
+
+@pytest.mark.parametrize("file_format", columnar.FORMATS)
+def test_appended_fragments_are_re_encoded(file_format):
+    # Fragments are written like shard spools: each with dictionaries of its own
+    fragments = [write([chunk], "arrow", compression="none") for chunk in reversed(CHUNKS[1:])]
+    stream = io.BytesIO()
+    writer = columnar.ColumnarOutputWriter(stream, Item, "items", "", file_format)
+    writer.write_header()
+    writer.write_objects(CHUNKS[0])
+    for fragment, chunk in zip(fragments, reversed(CHUNKS[1:])):
+        writer.append_fragments(fragment, len(chunk), id_offset=100)
+    writer.write_footer(writer.records_written, 0)
+
+    table, _ = read(io.BytesIO(stream.getvalue()), file_format)
+    shifted = [*CHUNKS[0], *(Item(**{**vars(item), "id": item.id + 100}) for item in CHUNKS[2] + CHUNKS[1])]
+    assert table.select(list(expected_rows(ITEMS[:1])[0])).to_pylist() == expected_rows(shifted)
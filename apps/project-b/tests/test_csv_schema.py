@@ -0,0 +1,81 @@
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import List, Optional
+
+import pandas as pd
+import pytest
+
+from csv_schema import apply_schema, build_read_schema, iter_csv, iter_records, read_csv
+
+
+@dataclass
+class Item:
+    id: int
+    name: str
+    price: Decimal
+    quantity: int
+    weight: Optional[float] = None
+    is_active: bool = True
+    category_id: int = 0
+    tags: List[str] = field(default_factory=list)
+
+
+SCHEMA = build_read_schema(Item, categorical=("category_id",))
+HEADER = "name,price,quantity,weight,is_active,category_id,tags\n"
+
+
+def write_csv(tmp_path, rows):
+    path = tmp_path / "items.csv"
+    path.write_text(HEADER + "".join(row + "\n" for row in rows))
+    return str(path)
+
+
+def clean_rows(count):
+    return [f"item {row},{row}.25,{row * 3},{row / 2},{'true' if row % 2 else 'False'},{row % 3},\"a, b\""
+            for row in range(count)]
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_typed_columns_are_parsed_by_the_reader(tmp_path, engine):
+    frame = read_csv(write_csv(tmp_path, clean_rows(4) + [",,,,,,"]), SCHEMA, engine=engine)
+    assert frame["quantity"].dtype == "Int64"
+    assert frame["weight"].dtype == "float64"
+    assert frame["is_active"].dtype == "boolean"
+    assert frame["category_id"].dtype == "category"
+    assert frame["price"].tolist()[:2] == [Decimal("0.25"), Decimal("1.25")]
+    assert frame["tags"][0] == ["a", "b"]
+    assert frame["quantity"].tolist() == [0, 3, 6, 9, pd.NA]
+
+
+def test_typed_and_text_reads_agree(tmp_path):
+    path = write_csv(tmp_path, clean_rows(6))
+    typed = read_csv(path, SCHEMA, engine="c")
+    text = apply_schema(pd.read_csv(path, dtype=SCHEMA.text_dtype()), SCHEMA)
+    pd.testing.assert_frame_equal(typed, text)
+
+
+def test_bad_cell_falls_back_to_text(tmp_path):
+    rows = clean_rows(3)
+    rows[1] = "item 1,oops,lots,0.5,maybe,1,"
+    frame = read_csv(write_csv(tmp_path, rows), SCHEMA)
+    # Columns with a bad cell keep their text; the others are still typed
+    assert frame["quantity"].tolist() == ["0", "lots", "6"]
+    assert frame["is_active"].tolist() == ["False", "maybe", "False"]
+    assert frame["weight"].dtype == "float64"
+    assert frame["price"].tolist() == [Decimal("0.25"), "oops", Decimal("2.25")]
+    records = list(iter_records(frame, SCHEMA))
+    assert records[1]["quantity"] == "lots" and records[1]["weight"] == 0.5
+
+
+def test_chunked_read_falls_back_for_the_rest_of_the_file(tmp_path):
+    rows = clean_rows(9)
+    rows[5] = "item 5,5.25,fifteen,2.5,true,2,"
+    path = write_csv(tmp_path, rows)
+    sizes = iter([2, 2, 3, 3, 3])
+    frames = list(iter_csv(path, SCHEMA, chunk_size=lambda: next(sizes), skip_rows=1))
+
+    assert [frame.index.tolist() for frame in frames] == [[1, 2], [3, 4], [5, 6, 7], [8]]
+    assert [str(frame["quantity"].dtype) for frame in frames] == ["Int64", "Int64", "string", "Int64"]
+    quantities = [value for frame in frames for value in frame["quantity"].tolist()]
+    assert quantities == [3, 6, 9, 12, "fifteen", "18", "21", 24]
+    assert all(frame["is_active"].dtype == "boolean" for frame in frames)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import dedupe
+from conftest import user_rows
+from dedupe import DuplicateGroup, HashIndex, drop_rows, find_duplicates, rows_to_drop
+from processing import USERS
+
+
+@pytest.fixture
+def users_with_duplicates(write_users):
+    rows = user_rows(300)
+    rows[9] = ("USER2", "other9@example.com", "first", "last", "True")
+    rows[119] = ("other119", "user49@example.com", "first", "last", "True")
+    rows[249] = ("other249", "User49@Example.com", "first", "last", "True")
+    return write_users(rows)
+
+
+EXPECTED = [
+    DuplicateGroup("username", "user2", [3, 10]),
+    DuplicateGroup("email", "user49@example.com", [50, 120, 250]),
+]
+
+
+def spill_counter(monkeypatch):
+    calls = []
+    real_spill = HashIndex._spill
+
+    def spill(self):
+        calls.append(len(self.hashes))
+        real_spill(self)
+    monkeypatch.setattr(HashIndex, "_spill", spill)
+    return calls
+
+
+def test_in_memory_detection(users_with_duplicates, monkeypatch):
+    spills = spill_counter(monkeypatch)
+    assert find_duplicates(users_with_duplicates, USERS.schema, USERS.unique_fields) == EXPECTED
+    assert not spills
+
+
+def test_spilled_detection_finds_the_same_groups(users_with_duplicates, monkeypatch):
+    monkeypatch.setattr(dedupe, "SCAN_CHUNK_ROWS", 64)
+    spills = spill_counter(monkeypatch)
+    groups = find_duplicates(users_with_duplicates, USERS.schema, USERS.unique_fields, memory_limit=256)
+    assert groups == EXPECTED
+    assert len(spills) > 2  # every chunk appends to the bucket files
+
+
+def test_hash_collisions_are_not_duplicates(users_with_duplicates, monkeypatch):
+    monkeypatch.setattr(dedupe, "SCAN_CHUNK_ROWS", 64)
+    monkeypatch.setattr(pd.util, "hash_pandas_object",
+                        lambda keys, index=False: pd.Series(np.zeros(len(keys), dtype=np.uint64)))
+    for memory_limit in (dedupe.DEFAULT_MEMORY_LIMIT, 256):
+        assert find_duplicates(users_with_duplicates, USERS.schema, USERS.unique_fields,
+                               memory_limit=memory_limit) == EXPECTED
+
+
+@pytest.mark.parametrize("policy, dropped", [
+    ("keep-first", [9, 119, 249]),
+    ("keep-last", [2, 49, 119]),
+    ("reject", [2, 9, 49, 119, 249]),
+])
+def test_rows_to_drop(policy, dropped):
+    assert sorted(rows_to_drop(EXPECTED, policy)) == dropped
+
+
+def test_drop_rows_reports_removed_rows():
+    frame = pd.DataFrame({"username": ["a", "b", "c"]}, index=[8, 9, 10])
+    kept, errors = drop_rows(frame, rows_to_drop(EXPECTED, "keep-first"))
+    assert kept.index.tolist() == [8, 10]
+    assert errors == ["Row 10: Duplicate username 'user2' in rows 3, 10"]
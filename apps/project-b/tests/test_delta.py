@@ -0,0 +1,111 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+import cli
+from conftest import user_rows
+from csv_schema import iter_csv
+from delta import DeltaRun
+from processing import USERS, transform_user_rows
+
+
+@pytest.fixture(params=["in-memory", "spilled"])
+def delta_run(request, tmp_path, monkeypatch):
+    """Run process-users --since-state and return the output document."""
+    if request.param == "spilled":
+        monkeypatch.setattr(cli, "DEFAULT_MEMORY_LIMIT", 64)
+    state = str(tmp_path / "users.state")
+
+    def run(path):
+        output = str(tmp_path / "changes.json")
+        result = CliRunner().invoke(cli.cli, ["process-users", "-i", path, "-o", output,
+                                              "--since-state", state, "--chunk-size", "3"])
+        assert result.exit_code == 0, result.output
+        return json.load(open(output))
+    return run
+
+
+def changes(document):
+    return sorted((record["change"], record["username"]) for record in document["users"])
+
+
+def test_first_run_inserts_everything(write_users, delta_run):
+    document = delta_run(write_users(user_rows(8)))
+    assert changes(document) == [("insert", f"user{i}") for i in range(8)]
+    assert document["total_errors"] == 0
+
+
+def test_inserts_updates_and_deletes(write_users, delta_run):
+    rows = user_rows(8)
+    delta_run(write_users(rows))
+
+    rows[2] = ("user2", "user2@example.com", "changed", "last", "True")
+    rows[5] = ("USER5", "user5@example.com", "first", "last", "True")  # the normalized key matches
+    del rows[6]
+    rows.append(("user8", "user8@example.com", "first", "last", "True"))
+    document = delta_run(write_users(rows))
+
+    assert changes(document) == [("delete", "user6"), ("insert", "user8"), ("update", "user2"), ("update", "user5")]
+    updated = next(record for record in document["users"] if record["username"] == "user2")
+    assert updated["first_name"] == "Changed"
+
+    assert changes(delta_run(write_users(rows))) == []
+
+
+def test_invalid_change_is_retried_until_fixed(write_users, delta_run):
+    rows = user_rows(4)
+    delta_run(write_users(rows))
+
+    rows[1] = ("user1", "not-an-email", "first", "last", "True")
+    for _ in range(2):
+        document = delta_run(write_users(rows))
+        assert changes(document) == []
+        assert document["total_errors"] == 1
+
+    rows[1] = ("user1", "fixed@example.com", "first", "last", "True")
+    assert changes(delta_run(write_users(rows))) == [("update", "user1")]
+
+
+def test_repeated_key_keeps_last_row(write_users, delta_run):
+    rows = user_rows(4) + [("user1", "second@example.com", "first", "last", "True")]
+    document = delta_run(write_users(rows))
+
+    assert changes(document) == [("insert", f"user{i}") for i in range(4)]
+    assert next(record for record in document["users"] if record["username"] == "user1")["email"] \
+        == "second@example.com"
+    assert document["total_errors"] == 1
+    assert changes(delta_run(write_users(rows))) == []
+
+
+def renumbered_user_rows(frame):
+    """Users with ids unrelated to their row numbers, as a transform is free to assign them."""
+    rows, errors = transform_user_rows(frame)
+    for row, user in rows:
+        user.id = 1000 - row
+    return rows, errors
+
+
+def test_changes_follow_the_rows_objects_were_built_from(write_users, tmp_path):
+    state = str(tmp_path / "users.state")
+
+    def run(path):
+        delta = DeltaRun(state, "users", USERS.schema, "username", USERS.unique_fields["username"], 1 << 20)
+        results, errors = [], []
+        for frame in iter_csv(path, delta.scan_schema, 3):
+            chunk_results, chunk_errors = delta.process(frame, renumbered_user_rows)
+            results.extend(chunk_results)
+            errors.extend(chunk_errors)
+        list(delta.deleted())
+        delta.commit()
+        return sorted((change, user.username) for change, user in results), errors
+
+    rows = user_rows(5)
+    rows[3] = ("user3", "broken", "first", "last", "True")
+    assert run(write_users(rows)) == ([("insert", f"user{i}") for i in (0, 1, 2, 4)],
+                                      ["Row 4: Invalid email address 'broken'"])
+
+    rows[1] = ("user1", "user1@example.com", "changed", "last", "True")
+    rows[3] = ("user3", "user3@example.com", "first", "last", "True")
+    assert run(write_users(rows)) == ([("insert", "user3"), ("update", "user1")], [])
+    assert run(write_users(rows)) == ([], [])
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from memory import MIN_CHUNK_ROWS, SAFETY_FACTOR, ChunkSizer, frame_bytes_per_row, parse_size
+
+MIB = 1 << 20
+BUDGET = 100 * MIB
+
+
+class FakeMemory:
+    """Resident and peak memory the test sets by hand."""
+
+    def __init__(self, rss):
+        self.rss = rss
+        self.peak = rss
+
+    def grow(self, num_bytes):
+        """Allocate ``num_bytes`` for a moment: the peak rises, the RSS does not."""
+        self.peak = max(self.peak, self.rss + num_bytes)
+
+    def set_rss(self, rss):
+        self.rss = rss
+        self.peak = max(self.peak, rss)
+
+
+def rows_frame(count, width):
+    """A frame of ``count`` rows taking ``width * 8`` bytes each."""
+    return pd.DataFrame(np.zeros((count, width), dtype=np.int64))
+
+
+@pytest.fixture
+def memory():
+    return FakeMemory(10 * MIB)
+
+
+@pytest.fixture
+def sizer(memory):
+    sizer = ChunkSizer(BUDGET, rss=lambda: memory.rss, peak=lambda: memory.peak)
+    sizer.calibrate(rows_frame(1000, 125), lambda frame: None)
+    return sizer
+
+
+def free_rows(sizer, rss):
+    return int((sizer.limit - rss) / sizer.row_cost)
+
+
+def test_calibration_sizes_chunks_from_the_sampled_cost(sizer):
+    assert sizer.frame_row_bytes == 1000
+    assert sizer.row_cost == pytest.approx(1000 / SAFETY_FACTOR, rel=0.01)
+    assert sizer.next_size() == free_rows(sizer, 10 * MIB)
+
+
+def test_chunk_that_raises_the_peak_shrinks_the_next_one(sizer, memory):
+    rows = sizer.next_size()
+    memory.grow(rows * 8000)
+    sizer.observe(rows_frame(rows, 125))
+    assert sizer.row_cost == 8000
+    assert sizer.next_size() == free_rows(sizer, 10 * MIB) < rows // 3
+
+
+def test_chunk_below_the_peak_keeps_the_estimate(sizer, memory):
+    rows = sizer.next_size()
+    memory.grow(rows * 8000)
+    sizer.observe(rows_frame(rows, 125))
+    cost = sizer.row_cost
+
+    # A cheaper chunk under the recorded peak teaches nothing
+    memory.grow(rows * 100)
+    sizer.observe(rows_frame(rows, 125))
+    assert sizer.row_cost == cost
+
+
+def test_retained_memory_shrinks_chunks_and_released_memory_grows_them(sizer, memory):
+    first = sizer.next_size()
+    memory.set_rss(60 * MIB)
+    shrunk = sizer.next_size()
+    memory.set_rss(20 * MIB)
+    grown = sizer.next_size()
+
+    assert shrunk == free_rows(sizer, 60 * MIB) < grown == free_rows(sizer, 20 * MIB) < first
+    assert (sizer.smallest, sizer.largest) == (shrunk, first)
+
+
+def test_narrower_rows_grow_chunks(sizer):
+    rows = sizer.next_size()
+    sizer.observe(rows_frame(rows, 50))
+    assert sizer.frame_row_bytes == 400
+    assert sizer.row_cost == pytest.approx(400 / SAFETY_FACTOR, rel=0.01)
+    assert sizer.next_size() == free_rows(sizer, 10 * MIB) > 2 * rows
+
+
+def test_small_drift_is_ignored(sizer):
+    cost = sizer.row_cost
+    sizer.observe(rows_frame(10, 110))
+    assert sizer.row_cost == cost
+
+
+def test_chunks_stay_between_the_floor_and_max_rows(memory):
+    sizer = ChunkSizer(BUDGET, max_rows=500, rss=lambda: memory.rss, peak=lambda: memory.peak)
+    assert sizer.next_size() == MIN_CHUNK_ROWS  # not calibrated yet
+    sizer.calibrate(rows_frame(1000, 1), lambda frame: None)
+    assert sizer.next_size() == 500
+
+    memory.set_rss(BUDGET)
+    assert sizer.next_size() == MIN_CHUNK_ROWS
+
+
+def test_frame_bytes_per_row():
+    assert frame_bytes_per_row(rows_frame(10, 3)) == 24
+    assert frame_bytes_per_row(rows_frame(0, 3)) == 0
+
+
+@pytest.mark.parametrize("text,size", [("512", 512), ("2K", 2048), ("1.5M", 3 * MIB // 2), ("2gb", 2 << 30)])
+def test_parse_size(text, size):
+    assert parse_size(text) == size
+
+
+def test_parse_size_rejects_garbage():
+    with pytest.raises(ValueError, match="Invalid memory size"):
+        parse_size("lots")
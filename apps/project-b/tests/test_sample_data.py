@@ -0,0 +1,89 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+from data_models import OrderStatus
+
+import sample_data
+from csv_schema import read_csv
+from processing import PRODUCTS, USERS
+from sample_data import DataQuality, generate_order_lines, generate_products, generate_users, write_chunks
+
+CLEAN = DataQuality(invalid_email_rate=0, missing_rate=0, duplicate_rate=0)
+NOISY = DataQuality(invalid_email_rate=0.2, missing_rate=0.1, duplicate_rate=0.1)
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    """Generate several chunks from a few hundred rows."""
+    monkeypatch.setattr(sample_data, "CHUNK_ROWS", 64)
+
+
+def generate(chunks, file_format="csv"):
+    output = io.StringIO()
+    rows = write_chunks(chunks, output, file_format)
+    return rows, output.getvalue()
+
+
+@pytest.mark.parametrize("make_chunks", [
+    lambda seed: generate_users(300, seed, NOISY),
+    lambda seed: generate_products(300, seed, NOISY),
+    lambda seed: generate_order_lines(100, 30, 40, seed),
+], ids=["users", "products", "orders"])
+def test_output_is_deterministic_for_a_seed(make_chunks):
+    rows, text = generate(make_chunks(7))
+    assert generate(make_chunks(7)) == (rows, text)
+    assert generate(make_chunks(8))[1] != text
+    # One header, however many chunks
+    assert len(text.splitlines()) == rows + 1
+
+
+@pytest.mark.parametrize("dataset,make_chunks", [
+    (USERS, lambda quality: generate_users(300, 3, quality)),
+    (PRODUCTS, lambda quality: generate_products(300, 3, quality)),
+], ids=["users", "products"])
+def test_clean_output_parses_under_the_schema(tmp_path, dataset, make_chunks):
+    path = tmp_path / f"{dataset.name}.csv"
+    path.write_text(generate(make_chunks(CLEAN))[1])
+    objects, errors = dataset.transform(read_csv(str(path), dataset.schema))
+    assert errors == []
+    assert [obj.id for obj in objects] == list(range(1, 301))
+
+
+def test_bad_users_are_exactly_the_rows_that_fail(tmp_path):
+    frame = pd.concat(list(generate_users(300, 3, NOISY)), ignore_index=True)
+    path = tmp_path / "users.csv"
+    with open(path, "w", newline="") as f:
+        write_chunks(iter([frame]), f)
+
+    users, errors = USERS.transform(read_csv(str(path), USERS.schema))
+    bad = frame.isna().any(axis=1) | ~frame["email"].fillna("@").str.contains("@")
+    assert 0 < bad.sum() < len(frame)
+    assert [user.id - 1 for user in users] == frame.index[~bad].tolist()
+    assert [int(error.split(":")[0].split()[1]) - 1 for error in errors] == frame.index[bad].tolist()
+
+
+def test_products_reuse_earlier_skus():
+    frame = pd.concat(list(generate_products(300, 3, NOISY)), ignore_index=True)
+    numbers = frame["sku"].str.split("-").str[1].astype(int)
+    duplicated = numbers != frame.index + 1
+    assert duplicated.any()
+    assert (numbers[duplicated] < frame.index[duplicated] + 1).all()
+    assert frame["sku"].duplicated().sum() > 0
+
+
+def test_order_lines_reference_generated_rows():
+    frame = pd.concat(list(generate_order_lines(100, 30, 40, 3)), ignore_index=True)
+    assert sorted(frame["order_id"].unique()) == list(range(1, 101))
+    assert frame.groupby("order_id").size().between(1, sample_data.MAX_ORDER_LINES).all()
+    assert frame["user_id"].between(1, 30).all() and frame["product_id"].between(1, 40).all()
+    assert set(frame["status"]) <= {status.value for status in OrderStatus}
+    assert pd.to_datetime(frame["order_date"]).between("2024-01-01", "2026-01-01").all()
+
+
+def test_ndjson_lines_hold_the_csv_columns():
+    rows, text = generate(generate_users(100, 3, CLEAN), "ndjson")
+    records = [json.loads(line) for line in text.splitlines()]
+    assert len(records) == rows == 100
+    assert all(set(record) == {"username", "email", "first_name", "last_name", "is_active"} for record in records)
@@ -0,0 +1,72 @@
+import io
+import json
+
+import pytest
+from click.testing import CliRunner
+
+import cli
+import columnar
+from conftest import user_rows
+from writers import JsonOutputWriter
+
+
+def process(*args):
+    result = CliRunner().invoke(cli.cli, ["process-users", *args])
+    assert result.exit_code == 0, result.output
+    return result
+
+
+def test_ids_continue_across_shards_in_shard_order(write_users, tmp_path):
+    rows = user_rows(25)
+    rows[12] = ("user12", "not-an-email", "first", "last", "True")
+    for number, (start, end) in enumerate([(0, 7), (7, 20), (20, 25)]):
+        write_users(rows[start:end], name=f"shard-{number}.csv")
+    whole = write_users(rows, name="whole.csv")
+
+    process("-i", whole, "-o", str(tmp_path / "whole.json"))
+    process("-i", str(tmp_path / "shard-*.csv"), "-o", str(tmp_path / "sharded.json"), "--workers", "2")
+
+    expected = [(user["id"], user["username"]) for user in json.load(open(tmp_path / "whole.json"))["users"]]
+    document = json.load(open(tmp_path / "sharded.json"))
+    assert [(user["id"], user["username"]) for user in document["users"]] == expected
+    assert document["total_errors"] == 1
+
+
+def test_unordered_merge_ids_are_unique(write_users, tmp_path):
+    for number in range(4):
+        write_users(user_rows(6, start=number * 6), name=f"shard-{number}.csv")
+    process("-i", str(tmp_path / "shard-*.csv"), "-o", str(tmp_path / "out.json"), "--merge", "unordered")
+    ids = sorted(user["id"] for user in json.load(open(tmp_path / "out.json"))["users"])
+    assert ids == list(range(1, 25))
+
+
+@pytest.mark.skipif(not columnar.available(), reason="needs pyarrow")
+def test_arrow_shard_ids_are_shifted(write_users, tmp_path):
+    import pyarrow as pa
+
+    for number in range(3):
+        write_users(user_rows(4, start=number * 4), name=f"shard-{number}.csv")
+    output = str(tmp_path / "users.arrow")
+    process("-i", str(tmp_path / "shard-*.csv"), "-o", output, "--format", "arrow")
+    table = pa.ipc.open_file(output).read_all()
+    assert table.column("id").to_pylist() == list(range(1, 13))
+    assert table.column("username").to_pylist() == [f"user{i}" for i in range(12)]
+
+
+def test_json_fragments_shift_only_record_ids():
+    spool = io.BytesIO()
+    writer = JsonOutputWriter(spool, "items", "", records_written=1)
+    writer.write_records([{"id": 1, "nested": {"id": 1}, "text": "\n    {\n      \"id\": 1"},
+                          {"id": 2, "nested": None, "text": ""}])
+
+    out = io.BytesIO()
+    merged = JsonOutputWriter(out, "items", "")
+    merged.write_header()
+    spool.seek(0)
+    merged.append_fragments(spool, 2, id_offset=40)
+    merged.write_footer(2, 0)
+
+    records = json.loads(out.getvalue())["items"]
+    assert [record["id"] for record in records] == [41, 42]
+    assert records[0]["nested"] == {"id": 1}
+    assert records[0]["text"] == "\n    {\n      \"id\": 1"
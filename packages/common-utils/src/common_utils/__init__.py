@@ -4,6 +4,8 @@ from .string_utils import capitalize_words, slugify, truncate_string
 from .date_utils import format_date, parse_date, days_between
 from .validation_utils import is_valid_email, is_valid_url, validate_required_fields
 from .config_utils import load_config, get_env_var
+from .search_utils import tokenize, InvertedIndex
+from .schema import FieldError, FieldSpec, Schema, SchemaValidationError, schema_from_dataclass
 
 __version__ = "0.1.0"
 __all__ = [
@@ -18,4 +20,11 @@ __all__ = [
     "validate_required_fields",
     "load_config",
     "get_env_var",
+    "tokenize",
+    "InvertedIndex",
+    "FieldError",
+    "FieldSpec",
+    "Schema",
+    "SchemaValidationError",
+    "schema_from_dataclass",
 ]
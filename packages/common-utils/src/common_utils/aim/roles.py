@@ -0,0 +1,158 @@
+"""Cached role resolution in front of a (slow) role source."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, Hashable, Iterable, Optional
+
+RoleSource = Callable[[Hashable], Optional[Iterable[str]]]
+
+
+class _Lookup:
+    """A source call in progress; concurrent callers for the same user wait on it."""
+
+    __slots__ = ("done", "roles", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.roles: Optional[FrozenSet[str]] = None
+        self.error: Optional[BaseException] = None
+
+
+class RoleCache:
+    """Bounded LRU + TTL cache of user roles with single-flight lookups.
+
+    Users the source knows nothing about (it returns ``None`` or no roles,
+    or raises ``LookupError``) are cached as having no roles for the shorter
+    ``negative_ttl``. Concurrent misses for the same user share one source
+    call. Other source errors are passed to every waiting caller and are not
+    cached.
+
+    Args:
+        source: Returns the roles of a user id
+        max_entries: Users kept before the least recently used is evicted
+        ttl: Seconds a user's roles are reused
+        negative_ttl: Seconds a "no roles" answer is reused
+        clock: Monotonic time function (for tests)
+    """
+
+    def __init__(self, source: RoleSource, max_entries: int = 10_000, ttl: float = 300.0,
+                 negative_ttl: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.source = source
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # user -> (roles, expires)
+        self._lookups: Dict[Hashable, _Lookup] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.lookups = 0
+        self.lookup_errors = 0
+        self.lookup_seconds = 0.0
+        self.max_lookup_seconds = 0.0
+
+    def get(self, user_id: Hashable) -> FrozenSet[str]:
+        """Roles of a user, from the cache or the source."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                if entry[1] > self.clock():
+                    self._entries.move_to_end(user_id)
+                    if entry[0]:
+                        self.hits += 1
+                    else:
+                        self.negative_hits += 1
+                    return entry[0]
+                del self._entries[user_id]
+            self.misses += 1
+            lookup = self._lookups.get(user_id)
+            if lookup is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                lookup = self._lookups[user_id] = _Lookup()
+                generation = self._generation
+                leader = True
+
+        if not leader:
+            lookup.done.wait()
+            if lookup.error is not None:
+                raise lookup.error
+            return lookup.roles
+
+        start = time.perf_counter()
+        try:
+            roles = frozenset(self.source(user_id) or ())
+        except LookupError:
+            roles = frozenset()
+        except BaseException as e:
+            lookup.error = e
+        seconds = time.perf_counter() - start
+
+        with self._lock:
+            del self._lookups[user_id]
+            self.lookups += 1
+            self.lookup_seconds += seconds
+            self.max_lookup_seconds = max(self.max_lookup_seconds, seconds)
+            if lookup.error is not None:
+                self.lookup_errors += 1
+            elif generation == self._generation:
+                # Not cached if an invalidation happened while the source was asked
+                lookup.roles = roles
+                self._entries[user_id] = (roles, self.clock() + (self.ttl if roles else self.negative_ttl))
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            else:
+                lookup.roles = roles
+        lookup.done.set()
+        if lookup.error is not None:
+            raise lookup.error
+        return roles
+
+    def has_roles(self, user_id: Hashable, required: FrozenSet[str]) -> bool:
+        """Check that a user has every role in ``required``."""
+        return required <= self.get(user_id)
+
+    def invalidate(self, user_id: Hashable = None) -> None:
+        """Forget one user's roles, or everyone's when no user is given.
+
+        Lookups already in progress when this is called are not cached.
+        """
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Counters, hit rate and source latency."""
+        with self._lock:
+            requests = self.hits + self.negative_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.negative_hits) / requests, 4) if requests else 0.0,
+                "lookups": self.lookups,
+                "lookup_errors": self.lookup_errors,
+                "lookup_ms_avg": round(self.lookup_seconds / self.lookups * 1000, 3) if self.lookups else 0.0,
+                "lookup_ms_max": round(self.max_lookup_seconds * 1000, 3),
+            }
@@ -0,0 +1,516 @@
+"""
+Declarative record validation.
+
+A ``Schema`` lists the fields of a record with their type, whether they are
+required, and constraints (format, numeric range, length). It is compiled
+once into a single generated function that checks and coerces a dict
+without looping over field specs at runtime. ``schema_from_dataclass``
+derives a schema from a dataclass: fields without a default are required,
+type hints give the coercion, and ``field(metadata=...)`` carries
+constraints such as ``{"format": "email"}`` or ``{"min": 0}``.
+"""
+
+import dataclasses
+import math
+import operator
+import re
+import typing
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from enum import Enum
+from typing import Any, Callable, Collection, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .date_utils import parse_date
+from .validation_utils import EMAIL_PATTERN, URL_PATTERN
+
+FORMATS = {"email": EMAIL_PATTERN, "url": URL_PATTERN}
+# Keys of dataclass field metadata that become FieldSpec constraints
+CONSTRAINTS = ("format", "min", "max", "min_length", "max_length")
+
+_TRUE = frozenset({"true", "1", "yes", "y", "t"})
+_FALSE = frozenset({"false", "0", "no", "n", "f"})
+
+
+class FieldError(NamedTuple):
+    """One validation failure.
+
+    ``field`` is a path such as ``"email"`` or ``"items[2].quantity"``
+    (``None`` when the record itself is not an object) and ``code`` is one of
+    required, type, format, min, max, min_length, max_length.
+    """
+
+    field: Optional[str]
+    code: str
+    message: str
+
+    def to_dict(self) -> dict:
+        """Convert the error to a dictionary."""
+        return self._asdict()
+
+
+class SchemaValidationError(ValueError):
+    """A record failed validation."""
+
+    def __init__(self, errors: List[FieldError]):
+        self.errors = errors
+        super().__init__(", ".join(error.message for error in errors))
+
+
+@dataclasses.dataclass
+class FieldSpec:
+    """A field of a schema.
+
+    Args:
+        name: Key in the record
+        type: Expected type (int, float, Decimal, bool, str, datetime, an Enum,
+            list); ``None`` accepts any value
+        required: Reject the record when the field is missing, ``None`` or ""
+        default: Value used when an optional field is missing
+        default_factory: Called for the value of a missing optional field
+        items: Element type of a list, or a Schema for a list of objects
+        format: "email" or "url"
+        min: Smallest allowed number
+        max: Largest allowed number
+        min_length: Shortest allowed string or list
+        max_length: Longest allowed string or list
+    """
+
+    name: str
+    type: Any = None
+    required: bool = True
+    default: Any = None
+    default_factory: Optional[Callable[[], Any]] = None
+    items: Any = None
+    format: Optional[str] = None
+    min: Optional[Union[int, float, Decimal]] = None
+    max: Optional[Union[int, float, Decimal]] = None
+    min_length: Optional[int] = None
+    max_length: Optional[int] = None
+
+
+Validator = Callable[..., Tuple[Optional[Dict[str, Any]], List[FieldError]]]
+
+
+@dataclasses.dataclass
+class Schema:
+    """Named list of fields, compiled lazily into one validator function."""
+
+    name: str
+    fields: List[FieldSpec]
+    _validator: Optional[Validator] = dataclasses.field(default=None, init=False, repr=False, compare=False)
+
+    def compile(self) -> Validator:
+        """Return the compiled validator (built on first use).
+
+        The validator is called as ``validate(data)`` and returns
+        ``(values, errors)``: the coerced values of every schema field
+        (defaults filled in, unknown keys dropped) and a list of FieldError.
+        """
+        if self._validator is None:
+            self._validator = _compile(self)
+        return self._validator
+
+    def validate(self, data: Any) -> Tuple[Optional[Dict[str, Any]], List[FieldError]]:
+        """Validate and coerce one record.
+
+        Returns:
+            ``(values, errors)``; the record is valid if ``errors`` is empty
+        """
+        return self.compile()(data)
+
+    def parse(self, data: Any) -> Dict[str, Any]:
+        """Validate one record and return its coerced values.
+
+        Raises:
+            SchemaValidationError: If the record is invalid
+        """
+        values, errors = self.compile()(data)
+        if errors:
+            raise SchemaValidationError(errors)
+        return values
+
+    def field(self, name: str) -> FieldSpec:
+        """Get a field spec by name."""
+        for spec in self.fields:
+            if spec.name == name:
+                return spec
+        raise KeyError(name)
+
+
+def _unwrap_optional(hint: Any) -> Any:
+    """Return X for Optional[X], otherwise the hint unchanged."""
+    if typing.get_origin(hint) is Union:
+        args = [arg for arg in typing.get_args(hint) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return hint
+
+
+def schema_from_dataclass(
+    model: type,
+    include: Optional[Sequence[str]] = None,
+    exclude: Collection[str] = ("id", "created_at", "updated_at"),
+    overrides: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    name: Optional[str] = None,
+) -> Schema:
+    """Derive a schema from a dataclass's fields, type hints and metadata.
+
+    Args:
+        model: A dataclass such as ``User`` or ``Product``
+        include: Only these fields (in this order); ``exclude`` is ignored
+        exclude: Fields that are not part of the input, e.g. generated ids
+        overrides: FieldSpec attributes to change per field, e.g.
+            ``{"items": {"items": line_schema}}``
+        name: Schema name (defaults to the class name)
+
+    Returns:
+        Schema with one FieldSpec per selected field
+    """
+    hints = typing.get_type_hints(model)
+    model_fields = {model_field.name: model_field for model_field in dataclasses.fields(model)}
+    if include is not None:
+        unknown = [field_name for field_name in include if field_name not in model_fields]
+        if unknown:
+            raise ValueError(f"{model.__name__} has no fields {unknown}")
+        names = list(include)
+    else:
+        names = [field_name for field_name in model_fields if field_name not in exclude]
+
+    overrides = overrides or {}
+    specs = []
+    for field_name in names:
+        model_field = model_fields[field_name]
+        hint = _unwrap_optional(hints[field_name])
+        spec = FieldSpec(field_name, hint)
+        if typing.get_origin(hint) in (list, List):
+            spec.type = list
+            (spec.items,) = typing.get_args(hint) or (None,)
+
+        if model_field.default is not dataclasses.MISSING:
+            spec.required = False
+            spec.default = model_field.default
+        elif model_field.default_factory is not dataclasses.MISSING:
+            spec.required = False
+            spec.default_factory = model_field.default_factory
+
+        for key in CONSTRAINTS:
+            if key in model_field.metadata:
+                setattr(spec, key, model_field.metadata[key])
+        for key, value in overrides.get(field_name, {}).items():
+            setattr(spec, key, value)
+        specs.append(spec)
+
+    return Schema(name or model.__name__, specs)
+
+
+# Coercion: each function returns the converted value or _INVALID
+
+_INVALID = object()
+
+
+def _to_int(value):
+    if isinstance(value, bool):
+        return _INVALID
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            return _INVALID
+    try:
+        return operator.index(value)  # int subclasses, numpy integers
+    except TypeError:
+        pass
+    if isinstance(value, (float, Decimal)) and math.isfinite(value) and value == int(value):
+        return int(value)
+    return _INVALID
+
+
+def _to_float(value):
+    if isinstance(value, bool):
+        return _INVALID
+    try:
+        result = float(value.strip() if isinstance(value, str) else value)
+    except (TypeError, ValueError):
+        return _INVALID
+    return result if math.isfinite(result) else _INVALID
+
+
+def _to_decimal(value):
+    if isinstance(value, bool):
+        return _INVALID
+    if isinstance(value, float):
+        value = repr(value)
+    elif isinstance(value, str):
+        value = value.strip()
+    try:
+        result = Decimal(value)
+    except (TypeError, ValueError, InvalidOperation):
+        return _INVALID
+    return result if result.is_finite() else _INVALID
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        token = value.strip().lower()
+        if token in _TRUE:
+            return True
+        if token in _FALSE:
+            return False
+        return _INVALID
+    if isinstance(value, (list, tuple, dict)):
+        return _INVALID
+    if value == 1 or value == 0:  # ints and numpy booleans
+        return bool(value)
+    return _INVALID
+
+
+def _to_str(value):
+    return str(value) if isinstance(value, str) else _INVALID
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, str):
+        try:
+            return parse_date(value)
+        except (ValueError, OverflowError):
+            return _INVALID
+    return _INVALID
+
+
+def _to_enum(enum_type):
+    def to_enum(value):
+        try:
+            return enum_type(value)
+        except (TypeError, ValueError):
+            return _INVALID
+    return to_enum
+
+
+def _to_list(item_type):
+    coerce = _coercer(item_type)
+
+    def to_list(value):
+        if not isinstance(value, (list, tuple)):
+            return _INVALID
+        if coerce is None:
+            return list(value)
+        for item in value:
+            if item.__class__ is not item_type:
+                break
+        else:
+            return list(value)
+        result = []
+        for item in value:
+            if item.__class__ is not item_type:
+                item = coerce(item)
+                if item is _INVALID:
+                    return _INVALID
+            result.append(item)
+        return result
+    return to_list
+
+
+_COERCERS = {
+    int: _to_int,
+    float: _to_float,
+    Decimal: _to_decimal,
+    bool: _to_bool,
+    str: _to_str,
+    datetime: _to_datetime,
+}
+
+_TYPE_NAMES = {
+    int: "an integer",
+    float: "a number",
+    Decimal: "a number",
+    bool: "a boolean",
+    str: "a string",
+    datetime: "a date/time",
+    list: "a list",
+}
+
+
+def _coercer(field_type: Any) -> Optional[Callable[[Any], Any]]:
+    if field_type in _COERCERS:
+        return _COERCERS[field_type]
+    if isinstance(field_type, type) and issubclass(field_type, Enum):
+        return _to_enum(field_type)
+    return None
+
+
+def _expected(spec: FieldSpec) -> str:
+    if isinstance(spec.type, type) and issubclass(spec.type, Enum):
+        return f"one of {[member.value for member in spec.type]}"
+    if spec.type is list and isinstance(spec.items, Schema):
+        return "a list of objects"
+    if spec.type is list and spec.items in _TYPE_NAMES and spec.items is not list:
+        return f"a list of {_TYPE_NAMES[spec.items].split(' ', 1)[1]} values"
+    return _TYPE_NAMES.get(spec.type, spec.type.__name__ if isinstance(spec.type, type) else str(spec.type))
+
+
+def _error(spec: FieldSpec, path: str, code: str, value: Any = None) -> FieldError:
+    """Build the FieldError for a failed check (only runs on the error path)."""
+    if code == "required":
+        message = f"Field '{path}' is required"
+    elif code == "type":
+        message = f"Field '{path}' must be {_expected(spec)}"
+    elif code == "format" and spec.format == "email":
+        message = f"Invalid email address '{value}'"
+    elif code == "format":
+        message = f"Field '{path}' must be a valid {spec.format}"
+    elif code == "min":
+        message = f"Field '{path}' must be at least {spec.min}"
+    elif code == "max":
+        message = f"Field '{path}' must be at most {spec.max}"
+    elif code == "min_length":
+        message = f"Field '{path}' must have a length of at least {spec.min_length}"
+    else:
+        message = f"Field '{path}' must have a length of at most {spec.max_length}"
+    return FieldError(path, code, message)
+
+
+def _object_list(schema: Schema):
+    """Validate a list of objects against a nested schema."""
+    validate_item = schema.compile()
+
+    def validate_items(value, path, errors):
+        if not isinstance(value, (list, tuple)):
+            return _INVALID
+        result = []
+        failed = False
+        for index, item in enumerate(value):
+            values, item_errors = validate_item(item, f"{path}[{index}].")
+            if item_errors:
+                errors.extend(item_errors)
+                failed = True
+            else:
+                result.append(values)
+        return None if failed else result
+    return validate_items
+
+
+def _check_block(checks, key: str, spec_name: str, path: str) -> List[str]:
+    """Source that reports the first failing check or keeps the value."""
+    if not checks:
+        return [f"        out[{key}] = value"]
+    block = []
+    for position, (condition, code) in enumerate(checks):
+        block.append(f"        {'if' if position == 0 else 'elif'} {condition}:")
+        if code is None:
+            block.append("            pass")
+        else:
+            block.append(f"            errors.append(_error({spec_name}, {path}, {code!r}, value))")
+    return block + ["        else:", f"            out[{key}] = value"]
+
+
+def _compile(schema: Schema) -> Validator:
+    """Generate the validator function of a schema."""
+    namespace = {
+        "_INVALID": _INVALID,
+        "_Mapping": Mapping,
+        "_error": _error,
+        "FieldError": FieldError,
+    }
+    lines = [
+        "def validate(data, prefix=''):",
+        "    errors = []",
+        "    if data.__class__ is not dict and not isinstance(data, _Mapping):",
+        "        errors.append(FieldError(prefix[:-1] or None, 'type', 'Expected an object'))",
+        "        return None, errors",
+        "    out = {}",
+        "    get = data.get",
+    ]
+
+    for index, spec in enumerate(schema.fields):
+        spec_name = f"_spec{index}"
+        namespace[spec_name] = spec
+        key = repr(spec.name)
+        path = f"prefix + {key}"
+
+        def limit(attribute):
+            # Plain numbers become literals; others are converted to the field's type once
+            value = getattr(spec, attribute)
+            if type(value) in (int, float) and spec.type is not Decimal:
+                return repr(value)
+            namespace[f"_{attribute}{index}"] = Decimal(value) if spec.type is Decimal else value
+            return f"_{attribute}{index}"
+
+        constraints = []
+        if spec.min is not None:
+            constraints.append((f"value < {limit('min')}", "min"))
+        if spec.max is not None:
+            constraints.append((f"value > {limit('max')}", "max"))
+        if spec.min_length is not None:
+            constraints.append((f"len(value) < {limit('min_length')}", "min_length"))
+        if spec.max_length is not None:
+            constraints.append((f"len(value) > {limit('max_length')}", "max_length"))
+        if spec.format is not None:
+            if spec.format not in FORMATS:
+                raise ValueError(f"Unknown format {spec.format!r} for field {spec.name!r}")
+            namespace[f"_match{index}"] = FORMATS[spec.format].match
+            constraints.append((f"_match{index}(value) is None", "format"))
+
+        if spec.required:
+            missing = f"        errors.append(_error({spec_name}, {path}, 'required'))"
+        elif spec.default_factory in (list, dict):
+            missing = f"        out[{key}] = {'[]' if spec.default_factory is list else '{}'}"
+        elif spec.default_factory is not None:
+            missing = f"        out[{key}] = {spec_name}.default_factory()"
+        elif spec.default is None or type(spec.default) in (bool, int, float, str):
+            missing = f"        out[{key}] = {spec.default!r}"
+        else:
+            missing = f"        out[{key}] = {spec_name}.default"
+
+        lines.append(f"    value = get({key})")
+        fast_path = False
+        if spec.type is list and isinstance(spec.items, Schema):
+            namespace[f"_items{index}"] = _object_list(spec.items)
+            coercion = [f"        value = _items{index}(value, {path}, errors)"]
+            checks = [("value is None", None), ("value is _INVALID", "type")]  # item errors already reported
+        elif spec.type is list:
+            namespace[f"_coerce{index}"] = _to_list(spec.items)
+            coercion = [f"        value = _coerce{index}(value)"]
+            checks = [("value is _INVALID", "type")]
+            if _coercer(spec.items) is not None:
+                # Lists whose elements already have the right type are kept as they are
+                namespace[f"_item{index}"] = spec.items
+                lines += [
+                    "    if value.__class__ is list:",
+                    "        for item in value:",
+                    f"            if item.__class__ is not _item{index}:",
+                    f"                value = _coerce{index}(value)",
+                    "                break",
+                    *_check_block(checks + constraints, key, spec_name, path),
+                ]
+                fast_path = True
+        elif _coercer(spec.type) is not None:
+            # Values that already have the field's type skip coercion entirely
+            namespace[f"_type{index}"] = spec.type
+            namespace[f"_coerce{index}"] = _coercer(spec.type)
+            fast = f"value.__class__ is _type{index}" + (" and value" if spec.type is str else "")
+            lines.append(f"    if {fast}:")
+            lines += _check_block(constraints, key, spec_name, path)
+            fast_path = True
+            coercion = [f"        value = _coerce{index}(value)"]
+            checks = [("value is _INVALID", "type")]
+        else:
+            coercion = []
+            checks = []
+
+        lines += [
+            f"    {'elif' if fast_path else 'if'} value is None or value == '':",
+            missing,
+            "    else:",
+            *coercion,
+            *_check_block(checks + constraints, key, spec_name, path),
+        ]
+
+    lines.append("    return out, errors")
+    function_name = "validate_" + re.sub(r"\W", "_", schema.name)
+    lines[0] = lines[0].replace("validate", function_name, 1)
+    exec("\n".join(lines) + "\n", namespace)
+    return namespace[function_name]
@@ -0,0 +1,286 @@
+"""Full-text search utility functions."""
+
+import heapq
+from array import array
+from bisect import bisect_left, insort
+from itertools import groupby, islice, product
+from math import log
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .string_utils import slugify
+
+# Doc ids are passed around as sorted sequences: posting arrays themselves,
+# or lists built from them
+_EMPTY = array('I')
+# From this size ratio on, sorted sequences are combined by binary search
+# from the smaller side instead of hashing one of them
+GALLOP_RATIO = 16
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into normalized search terms.
+
+    Args:
+        text: The input text to tokenize
+
+    Returns:
+        Lowercase terms, normalized the same way as ``slugify``
+    """
+    return [term for term in slugify(text or "").split('-') if term]
+
+
+def _intersect(small: Sequence[int], large: Sequence[int]) -> Sequence[int]:
+    """Sorted ids in both sorted sequences (``small`` should be the shorter)."""
+    if not small or not large:
+        return _EMPTY
+    if len(large) < GALLOP_RATIO * len(small):
+        return sorted(set(small).intersection(large))
+    found = []
+    position, end = 0, len(large)
+    for doc_id in small:
+        position = bisect_left(large, doc_id, position)
+        if position == end:
+            break
+        if large[position] == doc_id:
+            found.append(doc_id)
+    return found
+
+
+def _difference(docs: Sequence[int], removed: Sequence[int]) -> Sequence[int]:
+    """Sorted ids of ``docs`` missing from ``removed`` (both sorted)."""
+    if not docs or not removed:
+        return docs
+    if docs == removed:
+        return _EMPTY
+    if len(removed) < GALLOP_RATIO * len(docs):
+        return sorted(set(docs).difference(removed))
+    kept = []
+    position, end = 0, len(removed)
+    for doc_id in docs:
+        position = bisect_left(removed, doc_id, position)
+        if position == end or removed[position] != doc_id:
+            kept.append(doc_id)
+    return kept
+
+
+def _union(first: Sequence[int], second: Sequence[int]) -> Sequence[int]:
+    if not first:
+        return second
+    if not second:
+        return first
+    return sorted(set(first).union(second))
+
+
+class InvertedIndex:
+    """Incrementally updatable in-memory inverted index.
+
+    Terms are interned to integer ids, and postings are kept per term and
+    field as sorted ``array`` of document ids, so memory stays at a few bytes
+    per posting. A document's score is the sum, over query terms, of the
+    term's idf times the weight of the heaviest field it occurs in. Because
+    scores only depend on which field each term matched, results are
+    produced one score class at a time, best class first, and ranking stops
+    as soon as ``limit`` results are found. Posting arrays are combined as
+    sorted sequences (by binary search when their sizes differ a lot), so a
+    query does not copy every posting it touches into a set.
+
+    Args:
+        field_weights: Field name -> relevance weight
+    """
+
+    # Queries enumerate up to fields ** terms (AND) or (fields + 1) ** terms
+    # (OR) score classes; beyond this many, documents are scored one by one.
+    MAX_SCORE_CLASSES = 256
+
+    def __init__(self, field_weights: Dict[str, float]):
+        self._fields = sorted(field_weights, key=lambda name: -field_weights[name])
+        self._weights = [field_weights[name] for name in self._fields]
+        self._slots = {name: slot for slot, name in enumerate(self._fields)}
+        self._term_ids: Dict[str, int] = {}
+        self._terms: List[str] = []
+        # Sorted vocabulary for prefix lookups, kept sorted as terms are interned
+        self._sorted_terms: List[str] = []
+        # term_id * num_fields + slot -> sorted doc ids
+        self._postings: List[Optional[array]] = []
+        # doc id -> posting keys, used for removal
+        self._doc_postings: Dict[int, Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._doc_postings)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._doc_postings
+
+    @property
+    def num_terms(self) -> int:
+        return len(self._terms)
+
+    def _intern(self, term: str) -> int:
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = len(self._terms)
+            self._term_ids[term] = term_id
+            self._terms.append(term)
+            insort(self._sorted_terms, term)
+            self._postings.extend([None] * len(self._fields))
+        return term_id
+
+    def add(self, doc_id: int, fields: Dict[str, Optional[str]]) -> None:
+        """Add or replace a document.
+
+        Args:
+            doc_id: Non-negative integer document id
+            fields: Field name -> text; fields without a weight are ignored
+        """
+        if doc_id in self._doc_postings:
+            self.remove(doc_id)
+
+        num_fields = len(self._fields)
+        keys = set()
+        for name, text in fields.items():
+            slot = self._slots.get(name)
+            if slot is None or not text:
+                continue
+            for term in tokenize(text):
+                keys.add(self._intern(term) * num_fields + slot)
+
+        for key in keys:
+            postings = self._postings[key]
+            if postings is None:
+                self._postings[key] = array('I', (doc_id,))
+            elif not postings or postings[-1] < doc_id:
+                # Ids usually grow, so appending is the common case
+                postings.append(doc_id)
+            else:
+                postings.insert(bisect_left(postings, doc_id), doc_id)
+        self._doc_postings[doc_id] = tuple(keys)
+
+    def remove(self, doc_id: int) -> None:
+        """Remove a document if it is indexed."""
+        for key in self._doc_postings.pop(doc_id, ()):
+            postings = self._postings[key]
+            position = bisect_left(postings, doc_id)
+            if position < len(postings) and postings[position] == doc_id:
+                del postings[position]
+
+    def _prefix_term_ids(self, prefix: str) -> List[int]:
+        sorted_terms = self._sorted_terms
+        position = bisect_left(sorted_terms, prefix)
+        term_ids = []
+        while position < len(sorted_terms) and sorted_terms[position].startswith(prefix):
+            term_ids.append(self._term_ids[sorted_terms[position]])
+            position += 1
+        return term_ids
+
+    def _term_matches(self, term: str, prefix: bool) -> List[Sequence[int]]:
+        """Sorted docs whose heaviest field matching ``term`` is each field slot."""
+        if prefix:
+            term_ids = self._prefix_term_ids(term)
+        else:
+            term_ids = [self._term_ids[term]] if term in self._term_ids else []
+
+        num_fields = len(self._fields)
+        matched: Sequence[int] = _EMPTY
+        by_slot = []
+        for slot in range(num_fields):
+            postings = [self._postings[term_id * num_fields + slot] for term_id in term_ids]
+            postings = [docs for docs in postings if docs]
+            if len(postings) > 1:
+                # A doc can occur under several of the prefix's terms
+                docs = [doc_id for doc_id, _ in groupby(heapq.merge(*postings))]
+            else:
+                docs = postings[0] if postings else _EMPTY
+            docs = _difference(docs, matched)
+            matched = _union(matched, docs)
+            by_slot.append(docs)
+        return by_slot
+
+    def search(self, query: str, mode: str = "and", limit: int = 10, prefix: bool = True) -> List[Tuple[int, float]]:
+        """Find documents matching a query.
+
+        Args:
+            query: Free text query
+            mode: "and" requires every term, "or" any term
+            limit: Maximum number of results
+            prefix: Treat the last query term as a prefix (autocomplete)
+
+        Returns:
+            ``(doc_id, score)`` pairs, best first (ties by ascending id)
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        limit = min(limit, len(self._doc_postings))
+        if not terms or limit <= 0:
+            return []
+
+        matches = [
+            self._term_matches(term, prefix and position == len(terms) - 1)
+            for position, term in enumerate(terms)
+        ]
+        total = max(len(self._doc_postings), 1)
+        idfs = [log(1 + total / max(sum(len(docs) for docs in by_slot), 1)) for by_slot in matches]
+
+        # Per term, the field slots it can match (None = term absent, OR only)
+        options = []
+        for by_slot in matches:
+            slots = [slot for slot, docs in enumerate(by_slot) if docs]
+            if mode == "and":
+                if not slots:
+                    return []
+            else:
+                slots.append(None)
+            options.append(slots)
+
+        num_classes = 1
+        for slots in options:
+            num_classes *= len(slots)
+        if num_classes > self.MAX_SCORE_CLASSES:
+            return self._score_each(matches, idfs, limit, require_all=mode == "and")
+
+        classes: Dict[float, List[tuple]] = {}
+        for combo in product(*options):
+            if all(slot is None for slot in combo):
+                continue
+            score = round(sum(idf * self._weights[slot] for idf, slot in zip(idfs, combo) if slot is not None), 4)
+            classes.setdefault(score, []).append(combo)
+
+        results: List[Tuple[int, float]] = []
+        for score in sorted(classes, reverse=True):
+            # A doc has one heaviest field per term, so the combos of a class are disjoint
+            docs = heapq.merge(*(self._class_docs(matches, combo) for combo in classes[score]))
+            results.extend((doc_id, score) for doc_id in islice(docs, limit - len(results)))
+            if len(results) >= limit:
+                break
+        return results
+
+    @staticmethod
+    def _class_docs(matches: List[List[Sequence[int]]], combo: tuple) -> Sequence[int]:
+        """Sorted docs matching each term in exactly the combo's field slot."""
+        present = sorted(
+            (matches[term][slot] for term, slot in enumerate(combo) if slot is not None),
+            key=len,
+        )
+        docs = present[0]
+        for other in present[1:]:
+            docs = _intersect(docs, other)
+        for term, slot in enumerate(combo):
+            if slot is None and docs:
+                for term_docs in matches[term]:
+                    docs = _difference(docs, term_docs)
+        return docs
+
+    def _score_each(self, matches: List[List[Sequence[int]]], idfs: List[float], limit: int,
+                    require_all: bool) -> List[Tuple[int, float]]:
+        """Accumulate scores document by document (queries with many terms)."""
+        candidates = None
+        if require_all:
+            candidates = set.intersection(*(set().union(*by_slot) for by_slot in matches))
+        scores: Dict[int, float] = {}
+        for by_slot, idf in zip(matches, idfs):
+            for slot, docs in enumerate(by_slot):
+                contribution = idf * self._weights[slot]
+                if candidates is not None:
+                    docs = candidates.intersection(docs)
+                for doc_id in docs:
+                    scores[doc_id] = scores.get(doc_id, 0.0) + contribution
+        ranked = ((doc_id, round(score, 4)) for doc_id, score in scores.items())
+        return heapq.nsmallest(limit, ranked, key=lambda item: (-item[1], item[0]))
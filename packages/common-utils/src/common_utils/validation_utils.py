@@ -3,6 +3,9 @@
 import re
 from typing import Dict, List, Any
 
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+URL_PATTERN = re.compile(r'^https?:\/\/(?:[-\w.])+(?:\:[0-9]+)?(?:\/[^\s]*)?$')
+
 
 def is_valid_email(email: str) -> bool:
     """Check if an email address is valid.
@@ -13,8 +16,7 @@ def is_valid_email(email: str) -> bool:
     Returns:
         True if email is valid, False otherwise
     """
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return EMAIL_PATTERN.match(email) is not None
 
 
 def is_valid_url(url: str) -> bool:
@@ -26,8 +28,7 @@ def is_valid_url(url: str) -> bool:
     Returns:
         True if URL is valid, False otherwise
     """
-    pattern = r'^https?:\/\/(?:[-\w.])+(?:\:[0-9]+)?(?:\/[^\s]*)?$'
-    return re.match(pattern, url) is not None
+    return URL_PATTERN.match(url) is not None
 
 
 def validate_required_fields(data: Dict[str, Any], required_fields: List[str]) -> Dict[str, List[str]]:
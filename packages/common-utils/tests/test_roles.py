@@ -0,0 +1,158 @@
+import threading
+import time
+
+import pytest
+
+from common_utils.aim.roles import RoleCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class DelayedSource:
+    """A role source whose calls block until ``release`` is set.
+
+    The answer is read when the call starts, so a held call returns roles
+    that may have changed since.
+    """
+
+    def __init__(self, roles):
+        self.roles = roles
+        self.calls = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def hold(self):
+        self.release.clear()
+        self.entered.clear()
+
+    def __call__(self, user_id):
+        self.calls.append(user_id)
+        roles = self.roles.get(user_id)
+        self.entered.set()
+        assert self.release.wait(5)
+        if isinstance(roles, Exception):
+            raise roles
+        return roles
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_roles_expire_after_ttl(clock):
+    source = DelayedSource({1: ["admin"]})
+    cache = RoleCache(source, ttl=10, negative_ttl=1, clock=clock)
+    assert cache.get(1) == {"admin"}
+    clock.now = 9.9
+    source.roles[1] = ["viewer"]
+    assert cache.get(1) == {"admin"}
+    clock.now = 10
+    assert cache.get(1) == {"viewer"}
+    assert source.calls == [1, 1]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_unknown_users_use_the_negative_ttl(clock):
+    source = DelayedSource({2: LookupError("no such user")})
+    cache = RoleCache(source, ttl=10, negative_ttl=1, clock=clock)
+    assert cache.get(1) == frozenset()
+    assert cache.get(2) == frozenset()
+    clock.now = 0.5
+    assert not cache.has_roles(1, frozenset({"admin"}))
+    assert cache.negative_hits == 1
+    clock.now = 1
+    source.roles[1] = ["admin"]
+    assert cache.has_roles(1, frozenset({"admin"}))
+    assert source.calls == [1, 2, 1]
+
+
+def test_source_errors_are_not_cached(clock):
+    source = DelayedSource({1: RuntimeError("directory down")})
+    cache = RoleCache(source, clock=clock)
+    with pytest.raises(RuntimeError):
+        cache.get(1)
+    source.roles[1] = ["admin"]
+    assert cache.get(1) == {"admin"}
+    assert cache.lookup_errors == 1
+
+
+def test_concurrent_misses_share_one_source_call(clock):
+    source = DelayedSource({1: ["admin"]})
+    cache = RoleCache(source, clock=clock)
+    source.hold()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(1))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: cache.misses == 8)
+    source.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert source.calls == [1]
+    assert results == [frozenset({"admin"})] * 8
+    assert cache.coalesced == 7
+
+
+def test_invalidate_during_lookup_does_not_cache_the_stale_value(clock):
+    source = DelayedSource({1: ["admin"]})
+    cache = RoleCache(source, clock=clock)
+    source.hold()
+    results = []
+    reader = threading.Thread(target=lambda: results.append(cache.get(1)))
+    reader.start()
+    assert source.entered.wait(5)
+
+    source.roles[1] = ["viewer"]  # roles were revoked while the source was answering
+    cache.invalidate(1)
+    source.release.set()
+    reader.join()
+
+    assert results == [frozenset({"admin"})]  # the caller in flight still gets its answer
+    assert len(cache) == 0
+    assert cache.get(1) == {"viewer"}
+    assert source.calls == [1, 1]
+
+
+def test_least_recently_used_user_is_evicted(clock):
+    source = DelayedSource({user_id: ["viewer"] for user_id in range(4)})
+    cache = RoleCache(source, max_entries=2, clock=clock)
+    cache.get(1)
+    cache.get(2)
+    cache.get(1)  # 2 is now the least recently used
+    cache.get(3)
+
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    source.calls.clear()
+    cache.get(1)
+    cache.get(3)
+    assert source.calls == []
+    cache.get(2)
+    assert source.calls == [2]
+
+
+def test_invalidate_everyone(clock):
+    source = DelayedSource({1: ["admin"], 2: ["viewer"]})
+    cache = RoleCache(source, clock=clock)
+    cache.get(1)
+    cache.get(2)
+    cache.invalidate()
+    assert len(cache) == 0
+    with pytest.raises(ValueError):
+        RoleCache(source, max_entries=0)
@@ -0,0 +1,180 @@
+import random
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import List, Optional
+
+import pytest
+
+from common_utils import FieldError, FieldSpec, Schema, SchemaValidationError, schema_from_dataclass
+from common_utils.schema import _INVALID, _coercer, _error
+
+
+class Status(Enum):
+    OPEN = "open"
+    CLOSED = "closed"
+
+
+@dataclass
+class Line:
+    product_id: int
+    quantity: int = field(metadata={"min": 1, "max": 99})
+
+
+@dataclass
+class Record:
+    id: int
+    username: str = field(metadata={"min_length": 3, "max_length": 8})
+    email: str = field(metadata={"format": "email"})
+    price: Decimal = field(metadata={"min": 0, "max": 1000})
+    ratio: float = field(metadata={"min": -1.5})
+    status: Status
+    lines: List[Line]
+    website: Optional[str] = field(default=None, metadata={"format": "url"})
+    active: bool = True
+    seen_at: Optional[datetime] = None
+    tags: List[str] = field(default_factory=list, metadata={"max_length": 3})
+    scores: List[int] = field(default_factory=list)
+    note: str = "none"
+
+
+LINE_SCHEMA = schema_from_dataclass(Line, name="line")
+SCHEMA = schema_from_dataclass(Record, overrides={"lines": {"items": LINE_SCHEMA}})
+
+
+def reference_validate(schema, data, prefix=""):
+    """Check a record field by field, straight from the specs."""
+    if not isinstance(data, Mapping):
+        return None, [FieldError(prefix[:-1] or None, "type", "Expected an object")]
+    out, errors = {}, []
+    for spec in schema.fields:
+        path = prefix + spec.name
+        value = data.get(spec.name)
+        if value is None or (value.__class__ is not list and value == ""):
+            if spec.required:
+                errors.append(_error(spec, path, "required"))
+            else:
+                out[spec.name] = spec.default_factory() if spec.default_factory else spec.default
+            continue
+
+        if spec.type is list and isinstance(spec.items, Schema):
+            if not isinstance(value, (list, tuple)):
+                errors.append(_error(spec, path, "type", value))
+                continue
+            items = [reference_validate(spec.items, item, f"{path}[{index}].") for index, item in enumerate(value)]
+            item_errors = [error for _, found in items for error in found]
+            if item_errors:
+                errors.extend(item_errors)
+                continue
+            value = [values for values, _ in items]
+        elif spec.type is list:
+            if not isinstance(value, (list, tuple)):
+                value = _INVALID
+            else:
+                coerce = _coercer(spec.items)
+                items = [item if coerce is None or item.__class__ is spec.items else coerce(item) for item in value]
+                value = _INVALID if _INVALID in items else items
+        elif _coercer(spec.type) is not None and value.__class__ is not spec.type:
+            value = _coercer(spec.type)(value)
+        if value is _INVALID:
+            errors.append(_error(spec, path, "type", value))
+            continue
+
+        checks = [
+            ("min", spec.min is not None and value < spec.min),
+            ("max", spec.max is not None and value > spec.max),
+            ("min_length", spec.min_length is not None and len(value) < spec.min_length),
+            ("max_length", spec.max_length is not None and len(value) > spec.max_length),
+            ("format", spec.format is not None and not is_formatted(spec.format, value)),
+        ]
+        failed = [code for code, failing in checks if failing]
+        if failed:
+            errors.append(_error(spec, path, failed[0], value))
+        else:
+            out[spec.name] = value
+    return out, errors
+
+
+def is_formatted(kind, value):
+    from common_utils import is_valid_email, is_valid_url
+    return is_valid_email(value) if kind == "email" else is_valid_url(value)
+
+
+CANDIDATES = {
+    "username": ["bob", "alice", "al", "much too long", 42, "", None, ["bob"]],
+    "email": ["a@example.com", "bad", "x@y", 5, "", None],
+    "price": [Decimal("9.99"), "12.50", 3, 2.5, -1, "1001", "abc", "NaN", True, None, "Infinity"],
+    "ratio": [0.5, "0.25", -2, "-1.5", 7, "inf", "x", False, None],
+    "status": ["open", "closed", Status.OPEN, "pending", 1, None, ""],
+    "lines": [
+        [{"product_id": 1, "quantity": 2}],
+        [{"product_id": "3", "quantity": "5"}, {"product_id": 4, "quantity": 100}],
+        [{"quantity": 0}, "not an object"],
+        [], "lines", None, ({"product_id": 1, "quantity": 1},),
+    ],
+    "website": ["https://example.com", "example", 3, None, ""],
+    "active": [True, False, "yes", "N", 0, 1, 2, "maybe", [], None],
+    "seen_at": [datetime(2024, 5, 1), date(2024, 5, 1), "2024-05-01", "2024-05-01T10:30:00", "yesterday", 7, None],
+    "tags": [["a", "b"], ["a", 1], ["a", "b", "c", "d"], "a,b", [], None],
+    "scores": [[1, 2], ["3", 4], [1.0, 2], [1.5], [True], "1", None],
+    "note": ["hello", "", 3, None],
+}
+
+
+def random_record(rng):
+    record = {}
+    for name, values in CANDIDATES.items():
+        if rng.random() < 0.8:
+            record[name] = rng.choice(values)
+    if rng.random() < 0.1:
+        record["unknown"] = "dropped"
+    return record
+
+
+def test_compiled_validator_matches_field_by_field_checks():
+    rng = random.Random(17)
+    seen_codes = set()
+    for _ in range(3000):
+        record = random_record(rng)
+        expected = reference_validate(SCHEMA, record)
+        assert SCHEMA.validate(record) == expected, record
+        seen_codes.update(error.code for error in expected[1])
+    assert seen_codes == {"required", "type", "format", "min", "max", "min_length", "max_length"}
+
+
+@pytest.mark.parametrize("data", [None, [], "record", 3])
+def test_non_objects_are_rejected(data):
+    assert SCHEMA.validate(data) == reference_validate(SCHEMA, data) == (
+        None, [FieldError(None, "type", "Expected an object")])
+
+
+def test_messages():
+    values, errors = SCHEMA.validate({
+        "username": "al", "email": "bad", "price": "-1", "ratio": "x", "status": "pending",
+        "lines": [{"product_id": 1, "quantity": 0}, 5], "tags": ["a", "b", "c", "d"],
+    })
+    assert values["active"] is True and values["note"] == "none" and "tags" not in values
+    assert [error.message for error in errors] == [
+        "Field 'username' must have a length of at least 3",
+        "Invalid email address 'bad'",
+        "Field 'price' must be at least 0",
+        "Field 'ratio' must be a number",
+        "Field 'status' must be one of ['open', 'closed']",
+        "Field 'lines[0].quantity' must be at least 1",
+        "Expected an object",
+        "Field 'tags' must have a length of at most 3",
+    ]
+    assert errors[6].field == "lines[1]"
+
+
+def test_object_list_of_the_wrong_type():
+    _, errors = SCHEMA.validate({"lines": "x"})
+    assert FieldError("lines", "type", "Field 'lines' must be a list of objects") in errors
+
+
+def test_parse_raises_with_every_error():
+    with pytest.raises(SchemaValidationError) as raised:
+        Schema("pair", [FieldSpec("a", int), FieldSpec("b", int, max=5)]).parse({"b": "6"})
+    assert [(error.field, error.code) for error in raised.value.errors] == [("a", "required"), ("b", "max")]
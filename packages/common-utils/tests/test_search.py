@@ -0,0 +1,87 @@
+import random
+from math import log
+
+from common_utils import InvertedIndex, tokenize
+
+
+def make_index():
+    return InvertedIndex({"name": 3.0, "tags": 2.0, "description": 1.0})
+
+
+def test_replacing_the_only_document_of_a_term():
+    index = make_index()
+    index.add(1, {"name": "python book"})
+    index.add(1, {"name": "python guide"})
+    assert [doc_id for doc_id, _ in index.search("python")] == [1]
+    assert index.search("book") == []
+    assert [doc_id for doc_id, _ in index.search("guide")] == [1]
+
+
+WEIGHTS = {"name": 3.0, "tags": 2.0, "description": 1.0}
+WORDS = ["ant", "anchor", "and", "bee", "beetle", "be", "cat", "catalog", "dog", "dot", "éclair", "eclipse"]
+
+
+def reference_search(docs, query, mode, limit, prefix):
+    """Score every document from its raw text."""
+    terms = list(dict.fromkeys(tokenize(query)))
+    total = max(len(docs), 1)
+
+    def field_weight(fields, term, is_prefix):
+        weights = [WEIGHTS[name] for name, text in fields.items()
+                   if any(token == term or is_prefix and token.startswith(term) for token in tokenize(text))]
+        return max(weights, default=None)
+
+    per_term = []
+    for position, term in enumerate(terms):
+        is_prefix = prefix and position == len(terms) - 1
+        weights = {doc_id: field_weight(fields, term, is_prefix) for doc_id, fields in docs.items()}
+        weights = {doc_id: weight for doc_id, weight in weights.items() if weight is not None}
+        per_term.append((log(1 + total / max(len(weights), 1)), weights))
+
+    results = []
+    for doc_id in docs:
+        matched = [doc_id in weights for _, weights in per_term]
+        if not any(matched) or mode == "and" and not all(matched):
+            continue
+        score = sum(idf * weights[doc_id] for idf, weights in per_term if doc_id in weights)
+        results.append((doc_id, round(score, 4)))
+    results.sort(key=lambda item: (-item[1], item[0]))
+    return results[:max(limit, 0)]
+
+
+def random_text(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def test_search_matches_brute_force_scoring():
+    rng = random.Random(11)
+    index = make_index()
+    docs = {}
+    for step in range(600):
+        doc_id = rng.randrange(80)
+        if rng.random() < 0.15:
+            index.remove(doc_id)
+            docs.pop(doc_id, None)
+        else:
+            fields = {"name": random_text(rng, rng.randint(0, 2)), "tags": random_text(rng, rng.randint(0, 3)),
+                      "description": random_text(rng, rng.randint(0, 6)), "ignored": random_text(rng, 2)}
+            index.add(doc_id, fields)
+            docs[doc_id] = {name: text for name, text in fields.items() if name in WEIGHTS}
+
+        if step % 5 == 0:
+            words = [rng.choice(WORDS) for _ in range(rng.choice((1, 1, 2, 3, 5, 7)))]
+            if rng.random() < 0.5:
+                words[-1] = words[-1][:rng.randint(1, len(words[-1]))]
+            query = " ".join(words)
+            mode = rng.choice(("and", "or"))
+            limit = rng.choice((0, 1, 5, 1000))
+            prefix = rng.random() < 0.7
+            assert index.search(query, mode=mode, limit=limit, prefix=prefix) == \
+                reference_search(docs, query, mode, limit, prefix), (query, mode, limit, prefix)
+    assert len(index) == len(docs)
+
+
+def test_huge_limit_is_clamped():
+    index = make_index()
+    index.add(1, {"name": "python"})
+    assert index.search("py", limit=10 ** 12) == [(1, round(3.0 * log(2), 4))]
@@ -14,6 +14,9 @@ setup(
         "dataclasses>=0.8;python_version<'3.7'",
     ],
     extras_require={
+        "json": [
+            "orjson>=3.6",
+        ],
         "dev": [
             "pytest>=6.0",
             "pytest-cov>=2.0",
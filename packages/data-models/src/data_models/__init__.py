@@ -2,7 +2,12 @@
 
 from .user import User, UserProfile
 from .product import Product, Category
-from .order import Order, OrderItem, OrderStatus
+from .order import Order, OrderItem, OrderStatus, ORDER_TRANSITIONS, InvalidTransitionError
+from .order_log import OrderEvent, OrderEventLog, read_order_events, apply_order_events
+from .category_tree import CategoryTree
+from .encoding import to_json
+from .inventory import Inventory, InventoryError, OutOfStockError, UnknownProductError
+from .snapshot import Snapshot, SnapshotStore, write_snapshot
 
 __version__ = "0.1.0"
 __all__ = [
@@ -13,4 +18,19 @@ __all__ = [
     "Order",
     "OrderItem",
     "OrderStatus",
+    "ORDER_TRANSITIONS",
+    "InvalidTransitionError",
+    "OrderEvent",
+    "OrderEventLog",
+    "read_order_events",
+    "apply_order_events",
+    "CategoryTree",
+    "Snapshot",
+    "SnapshotStore",
+    "write_snapshot",
+    "to_json",
+    "Inventory",
+    "InventoryError",
+    "OutOfStockError",
+    "UnknownProductError",
 ]
@@ -0,0 +1,150 @@
+"""Category hierarchy index."""
+
+from typing import Dict, Iterable, List, Optional, Set
+
+from .product import Category, Product
+
+
+class CategoryTree:
+    """Precomputed category hierarchy (closure table) with a product index.
+
+    For every category the full ancestor path and descendant set are kept up
+    to date as categories are added or re-parented, so subtree queries only
+    touch the categories and products that end up in the result.
+    """
+
+    def __init__(self, categories: Iterable[Category] = ()):
+        self.categories: Dict[int, Category] = {}
+        self._ancestors: Dict[int, List[int]] = {}
+        self._descendants: Dict[int, Set[int]] = {}
+        self._children: Dict[int, Set[int]] = {}
+        self._products: Dict[int, Set[int]] = {}
+        self._product_category: Dict[int, int] = {}
+        self.add_categories(categories)
+
+    def __contains__(self, category_id: int) -> bool:
+        return category_id in self.categories
+
+    def add_category(self, category: Category) -> None:
+        """Add a category below its ``parent_id`` (or as a root)."""
+        if category.id in self.categories:
+            raise ValueError(f"Category {category.id} already exists")
+        parent_id = category.parent_id
+        if parent_id is not None and parent_id not in self.categories:
+            raise ValueError(f"Parent category {parent_id} does not exist")
+
+        self.categories[category.id] = category
+        self._descendants[category.id] = set()
+        self._children[category.id] = set()
+        self._products.setdefault(category.id, set())
+
+        if parent_id is None:
+            self._ancestors[category.id] = []
+            return
+
+        ancestors = self._ancestors[parent_id] + [parent_id]
+        self._ancestors[category.id] = ancestors
+        self._children[parent_id].add(category.id)
+        for ancestor_id in ancestors:
+            self._descendants[ancestor_id].add(category.id)
+
+    def add_categories(self, categories: Iterable[Category]) -> None:
+        """Add several categories in any order; parents are added first."""
+        pending = {category.id: category for category in categories}
+        while pending:
+            chain = [next(iter(pending))]
+            seen = set(chain)
+            while pending[chain[-1]].parent_id in pending:
+                parent_id = pending[chain[-1]].parent_id
+                if parent_id in seen:
+                    raise ValueError("Category hierarchy contains a cycle")
+                chain.append(parent_id)
+                seen.add(parent_id)
+            for category_id in reversed(chain):
+                self.add_category(pending.pop(category_id))
+
+    def move_category(self, category_id: int, new_parent_id: Optional[int]) -> None:
+        """Re-parent a category together with its whole subtree."""
+        category = self.categories[category_id]
+        subtree = self._descendants[category_id] | {category_id}
+        if new_parent_id is not None:
+            if new_parent_id not in self.categories:
+                raise ValueError(f"Parent category {new_parent_id} does not exist")
+            if new_parent_id in subtree:
+                raise ValueError(f"Cannot move category {category_id} below its own subtree")
+
+        old_ancestors = self._ancestors[category_id]
+        for ancestor_id in old_ancestors:
+            self._descendants[ancestor_id] -= subtree
+        if category.parent_id is not None:
+            self._children[category.parent_id].discard(category_id)
+
+        new_ancestors = [] if new_parent_id is None else self._ancestors[new_parent_id] + [new_parent_id]
+        for ancestor_id in new_ancestors:
+            self._descendants[ancestor_id] |= subtree
+        if new_parent_id is not None:
+            self._children[new_parent_id].add(category_id)
+
+        # Replace the shared path prefix of every node in the subtree
+        depth = len(old_ancestors)
+        for node_id in subtree:
+            self._ancestors[node_id] = new_ancestors + self._ancestors[node_id][depth:]
+        category.parent_id = new_parent_id
+
+    def ancestors(self, category_id: int) -> List[int]:
+        """Ancestor ids from the root down to the direct parent."""
+        return list(self._ancestors[category_id])
+
+    def descendants(self, category_id: int) -> Set[int]:
+        """Ids of all categories below ``category_id``."""
+        return set(self._descendants[category_id])
+
+    def children(self, category_id: int) -> List[int]:
+        """Ids of the direct subcategories."""
+        return sorted(self._children[category_id])
+
+    def is_descendant(self, category_id: int, ancestor_id: int) -> bool:
+        """Check whether ``category_id`` lies below ``ancestor_id``."""
+        return category_id in self._descendants[ancestor_id]
+
+    def add_product(self, product: Product) -> None:
+        """Index a product under its category (re-indexes if it moved)."""
+        self.assign_product(product.id, product.category_id)
+
+    def assign_product(self, product_id: int, category_id: int) -> None:
+        """Index a product id under a category without needing the object."""
+        self.remove_product(product_id)
+        self._products.setdefault(category_id, set()).add(product_id)
+        self._product_category[product_id] = category_id
+
+    def remove_product(self, product_id: int) -> None:
+        """Drop a product from the index."""
+        category_id = self._product_category.pop(product_id, None)
+        if category_id is not None:
+            self._products[category_id].discard(product_id)
+
+    def product_ids(self, category_id: int, recursive: bool = False) -> List[int]:
+        """Ids of products in a category, optionally including subcategories."""
+        product_ids = set(self._products.get(category_id, ()))
+        if recursive:
+            for descendant_id in self._descendants[category_id]:
+                product_ids |= self._products[descendant_id]
+        return sorted(product_ids)
+
+    def subtree(self, category_id: int) -> dict:
+        """Nested dictionary of a category and all its subcategories.
+
+        Built from the descendant set without recursion, so deep hierarchies
+        do not hit the recursion limit.
+        """
+        nodes = {}
+        for node_id in sorted(self._descendants[category_id] | {category_id}):
+            node = self.categories[node_id].to_dict()
+            node["ancestors"] = self.ancestors(node_id)
+            node["children"] = []
+            nodes[node_id] = node
+        # In id order, so every children list ends up sorted like children()
+        for node_id, node in nodes.items():
+            if node_id != category_id:
+                nodes[self.categories[node_id].parent_id]["children"].append(node)
+        return nodes[category_id]
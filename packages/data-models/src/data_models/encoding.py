@@ -0,0 +1,240 @@
+"""Direct JSON encoding of model objects."""
+
+import json
+import keyword
+import typing
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+class _Inexact(Exception):
+    """Raised when orjson would not reproduce the stdlib output."""
+
+
+def _safe_float(value: float) -> bool:
+    # orjson spells NaN/Infinity and exponents differently from json.dumps
+    return value == 0.0 or 1e-4 <= abs(value) < 1e16
+
+
+def _check_float(value: Optional[float]) -> Optional[float]:
+    if value is None or value == 0.0 or 1e-4 <= abs(value) < 1e16:
+        return value
+    raise _Inexact(value)
+
+
+def _decimal(value: Optional[Decimal]) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def _native_decimal(value: Optional[Decimal]) -> Optional[float]:
+    if value is None:
+        return None
+    value = float(value)
+    if value == 0.0 or 1e-4 <= abs(value) < 1e16:
+        return value
+    raise _Inexact(value)
+
+
+def _isoformat(value: Optional[date]) -> Optional[str]:
+    return None if value is None else value.isoformat()
+
+
+def _enum_value(value: Optional[Enum]) -> Any:
+    return None if value is None else value.value
+
+
+def _scan_plain(obj: Any) -> Tuple[bool, bool]:
+    """Check the parts of a document outside models.
+
+    Returns:
+        Whether all floats there are safe for orjson, and whether every dict
+        there already has sorted keys (models are checked by their layouts)
+    """
+    stack = [obj]
+    keys_sorted = True
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not _safe_float(value):
+                return False, keys_sorted
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, dict):
+            if keys_sorted:
+                keys = list(value)
+                keys_sorted = all(isinstance(key, str) for key in keys) and keys == sorted(keys)
+            stack.extend(value.values())
+    return True, keys_sorted
+
+
+def _hint(model: type, name: str) -> Any:
+    attribute = getattr(model, name, None)
+    if isinstance(attribute, property):
+        hint = typing.get_type_hints(attribute.fget).get("return")
+    else:
+        hint = typing.get_type_hints(model).get(name)
+    if typing.get_origin(hint) is typing.Union:
+        hint = next((arg for arg in typing.get_args(hint) if arg is not type(None)), hint)
+    return hint
+
+
+_HELPERS = {
+    "_check_float": _check_float,
+    "_decimal": _decimal,
+    "_native_decimal": _native_decimal,
+    "_isoformat": _isoformat,
+    "_enum_value": _enum_value,
+}
+
+
+def _compile_fields(name: str, keys: List[str], expressions: Dict[str, str]) -> Callable[[Any], dict]:
+    """Generate ``lambda obj: {key: obj.key, ...}`` with per-key conversions."""
+    items = ", ".join(f"{key!r}: {expressions.get(key, f'obj.{key}')}" for key in keys)
+    namespace = dict(_HELPERS)
+    exec(f"def {name}(obj):\n    return {{{items}}}\n", namespace)
+    return namespace[name]
+
+
+class _Layout:
+    """How to turn instances of one model class into flat, key-sorted dicts.
+
+    Keys come from a single ``to_dict()`` call. For every class a function
+    reading those attributes straight into a dict display is generated
+    (much like ``dataclasses`` generates ``__init__``), converting only the
+    Decimal/date/Enum values. Nested models stay in place for the encoder's
+    ``default`` hook, so no dictionary tree is built ahead of encoding.
+    """
+
+    def __init__(self, obj: Any):
+        model = type(obj)
+        reference = obj.to_dict()
+        keys = sorted(reference)
+        self.native = False
+        if not all(key.isidentifier() and not keyword.iskeyword(key) for key in keys):
+            self.fields = model.to_dict
+            return
+
+        plain, native = {}, {}
+        for key in keys:
+            hint = _hint(model, key)
+            if hint is Decimal:
+                plain[key] = f"_decimal(obj.{key})"
+                native[key] = f"_native_decimal(obj.{key})"
+            elif hint is float:
+                native[key] = f"_check_float(obj.{key})"
+            elif isinstance(hint, type) and issubclass(hint, date):
+                plain[key] = f"_isoformat(obj.{key})"
+            elif isinstance(hint, type) and issubclass(hint, Enum):
+                plain[key] = f"_enum_value(obj.{key})"
+        self.fields = _compile_fields(f"{model.__name__}_fields", keys, plain)
+
+        # Encode through to_dict() if the layout does not reproduce it
+        expected = _dumps(reference)
+        try:
+            matches = _dumps(self.fields(obj)) == expected
+        except (AttributeError, TypeError, ValueError):
+            matches = False
+        if not matches:
+            self.fields = model.to_dict
+            return
+
+        if orjson is not None:
+            self.native_fields = _compile_fields(f"{model.__name__}_native_fields", keys, native)
+            # orjson does not escape non-ASCII text; to_json checks that per document
+            expected = json.dumps(reference, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+            try:
+                encoded = orjson.dumps(self.native_fields(obj), default=_native_default,
+                                       option=orjson.OPT_PASSTHROUGH_DATACLASS)
+                self.native = encoded == expected.encode()
+            except (TypeError, _Inexact):
+                self.native = False
+
+
+# Model class -> layout, built on first use
+_LAYOUTS: Dict[type, _Layout] = {}
+# Model class -> orjson field function, for classes orjson encodes exactly
+_NATIVE_FIELDS: Dict[type, Callable[[Any], dict]] = {}
+
+
+def _layout(obj: Any) -> Optional[_Layout]:
+    layout = _LAYOUTS.get(type(obj))
+    if layout is None and hasattr(obj, "to_dict"):
+        layout = _LAYOUTS[type(obj)] = _Layout(obj)
+    return layout
+
+
+def _default(obj: Any) -> Any:
+    layout = _layout(obj)
+    if layout is not None:
+        return layout.fields(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _native_default(obj: Any) -> Any:
+    native_fields = _NATIVE_FIELDS.get(type(obj))
+    if native_fields is not None:
+        return native_fields(obj)
+    layout = _layout(obj)
+    if layout is not None:
+        if not layout.native:
+            raise _Inexact(type(obj).__name__)
+        _NATIVE_FIELDS[type(obj)] = layout.native_fields
+        return layout.native_fields(obj)
+    # Plain Decimals may hold floats orjson formats differently
+    raise _Inexact(type(obj).__name__)
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, default=_default, sort_keys=True, separators=(",", ":"))
+
+
+def to_json(obj: Any, indent: Optional[int] = None) -> bytes:
+    """Encode data and model objects as JSON.
+
+    The output is byte-for-byte what ``json.dumps(..., sort_keys=True)``
+    produces after replacing every model with its ``to_dict()``, but models
+    are read straight from their attributes instead of building that
+    dictionary tree first. Outside models, ``Decimal`` is written as a
+    number, dates in ISO 8601 and enums by value, as ``to_dict`` does.
+
+    Compact output uses orjson when it is installed and the result is known
+    to be identical (ASCII text, no floats orjson spells differently);
+    otherwise the stdlib encoder is used.
+
+    Args:
+        obj: Model objects, or lists/dicts containing them
+        indent: Indentation for pretty-printed output (compact if None)
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if indent is not None:
+        return json.dumps(obj, default=_default, sort_keys=True, indent=indent).encode()
+
+    if orjson is not None:
+        floats_safe, keys_sorted = _scan_plain(obj)
+        if floats_safe:
+            option = orjson.OPT_PASSTHROUGH_DATACLASS
+            if not keys_sorted:
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                encoded = orjson.dumps(obj, default=_native_default, option=option)
+            except (TypeError, _Inexact):
+                # Non-string keys, big integers, unsafe floats or plain Decimals
+                encoded = None
+            if encoded is not None and encoded.isascii() and b"\x7f" not in encoded:
+                return encoded
+    return _dumps(obj).encode()
@@ -0,0 +1,166 @@
+"""Thread-safe stock reservations."""
+
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+Lines = Union[Dict[int, int], Iterable[Tuple[int, int]]]
+
+
+class InventoryError(ValueError):
+    """Base class for inventory errors."""
+
+
+class UnknownProductError(InventoryError):
+    """A reservation references products the inventory does not track."""
+
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Unknown products: {self.product_ids}")
+
+
+class OutOfStockError(InventoryError):
+    """Not enough stock for one or more lines; nothing was reserved."""
+
+    def __init__(self, shortages: Dict[int, Tuple[int, int]]):
+        self.shortages = shortages
+        details = ", ".join(
+            f"product {product_id} (requested {requested}, available {available})"
+            for product_id, (requested, available) in sorted(shortages.items())
+        )
+        super().__init__(f"Insufficient stock for {details}")
+
+
+class Inventory:
+    """Available stock per product with all-or-nothing reservations.
+
+    Every product has its own lock. A reservation locks the products of all
+    its lines in ascending id order, which rules out deadlocks between
+    concurrent reservations, checks every line and only then decrements, so
+    an order either gets all of its lines or none.
+
+    Args:
+        on_change: Called as ``on_change(product_id, available)`` whenever a
+            reservation changes a product's stock, while the product's lock
+            is held, e.g. to mirror ``Product.stock_quantity``
+    """
+
+    def __init__(self, on_change: Optional[Callable[[int, int], None]] = None):
+        self.on_change = on_change
+        self._available: Dict[int, int] = {}
+        self._locks: Dict[int, threading.Lock] = {}
+        self._reservations: Dict[object, Dict[int, int]] = {}
+        self._registry_lock = threading.Lock()
+
+    def __contains__(self, product_id: int) -> bool:
+        return product_id in self._available
+
+    def set_stock(self, product_id: int, quantity: int) -> None:
+        """Track a product (or overwrite its available stock)."""
+        if quantity < 0:
+            raise InventoryError(f"Stock of product {product_id} cannot be negative")
+        with self._registry_lock:
+            lock = self._locks.setdefault(product_id, threading.Lock())
+        with lock:
+            self._available[product_id] = quantity
+
+    def available(self, product_id: int) -> int:
+        """Stock that can still be reserved."""
+        return self._available[product_id]
+
+    def reservation(self, reservation_id: object) -> Dict[int, int]:
+        """Reserved quantities per product (empty if there is none)."""
+        return dict(self._reservations.get(reservation_id, {}))
+
+    def _changed(self, product_id: int) -> None:
+        if self.on_change is not None:
+            self.on_change(product_id, self._available[product_id])
+
+    @staticmethod
+    def _merge(lines: Lines) -> Dict[int, int]:
+        items = lines.items() if isinstance(lines, dict) else lines
+        merged: Dict[int, int] = {}
+        for product_id, quantity in items:
+            if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+                raise InventoryError(f"Quantity for product {product_id} must be a positive integer")
+            merged[product_id] = merged.get(product_id, 0) + quantity
+        return merged
+
+    def _acquire(self, product_ids):
+        locks = [self._locks[product_id] for product_id in sorted(product_ids)]
+        for lock in locks:
+            lock.acquire()
+        return locks
+
+    @staticmethod
+    def _release_locks(locks) -> None:
+        for lock in reversed(locks):
+            lock.release()
+
+    def reserve(self, reservation_id: object, lines: Lines) -> Dict[int, int]:
+        """Reserve every line of an order, or nothing.
+
+        Args:
+            reservation_id: Key of the reservation (e.g. the order id)
+            lines: ``{product_id: quantity}`` or ``(product_id, quantity)`` pairs;
+                repeated products are added up
+
+        Returns:
+            Reserved quantities per product
+
+        Raises:
+            UnknownProductError: If a product is not tracked
+            OutOfStockError: If any line cannot be covered
+            InventoryError: For invalid quantities or a reused reservation id
+        """
+        wanted = self._merge(lines)
+        unknown = [product_id for product_id in wanted if product_id not in self._locks]
+        if unknown:
+            raise UnknownProductError(unknown)
+
+        # Claim the id first (setdefault is atomic), then lock the products
+        claim: Dict[int, int] = {}
+        if self._reservations.setdefault(reservation_id, claim) is not claim:
+            raise InventoryError(f"Reservation {reservation_id!r} already exists")
+        locks = self._acquire(wanted)
+        try:
+            shortages = {
+                product_id: (quantity, self._available[product_id])
+                for product_id, quantity in wanted.items()
+                if self._available[product_id] < quantity
+            }
+            if shortages:
+                del self._reservations[reservation_id]
+                raise OutOfStockError(shortages)
+            for product_id, quantity in wanted.items():
+                self._available[product_id] -= quantity
+                self._changed(product_id)
+            claim.update(wanted)
+        finally:
+            self._release_locks(locks)
+        return dict(wanted)
+
+    def release(self, reservation_id: object) -> bool:
+        """Return a reservation's stock (e.g. when the order is cancelled).
+
+        Returns:
+            False if there was no such reservation
+        """
+        wanted = self._reservations.pop(reservation_id, None)
+        if wanted is None:
+            return False
+        locks = self._acquire(wanted)
+        try:
+            for product_id, quantity in wanted.items():
+                self._available[product_id] += quantity
+                self._changed(product_id)
+        finally:
+            self._release_locks(locks)
+        return True
+
+    def commit(self, reservation_id: object) -> bool:
+        """Make a reservation final (the stock has left the warehouse).
+
+        Returns:
+            False if there was no such reservation
+        """
+        return self._reservations.pop(reservation_id, None) is not None
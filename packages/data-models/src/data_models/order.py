@@ -1,7 +1,7 @@
 """Order-related data models."""
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, FrozenSet, Optional, List
 from dataclasses import dataclass, field
 from decimal import Decimal
 from enum import Enum
@@ -17,6 +17,26 @@ class OrderStatus(Enum):
     CANCELLED = "cancelled"
 
 
+# Allowed status changes; DELIVERED and CANCELLED are final
+ORDER_TRANSITIONS: Dict[OrderStatus, FrozenSet[OrderStatus]] = {
+    OrderStatus.PENDING: frozenset({OrderStatus.CONFIRMED, OrderStatus.CANCELLED}),
+    OrderStatus.CONFIRMED: frozenset({OrderStatus.PROCESSING, OrderStatus.CANCELLED}),
+    OrderStatus.PROCESSING: frozenset({OrderStatus.SHIPPED, OrderStatus.CANCELLED}),
+    OrderStatus.SHIPPED: frozenset({OrderStatus.DELIVERED}),
+    OrderStatus.DELIVERED: frozenset(),
+    OrderStatus.CANCELLED: frozenset(),
+}
+
+
+class InvalidTransitionError(ValueError):
+    """Raised when an order cannot move to the requested status."""
+
+    def __init__(self, current: OrderStatus, requested: OrderStatus):
+        self.current = current
+        self.requested = requested
+        super().__init__(f"Cannot change order status from {current.value} to {requested.value}")
+
+
 @dataclass
 class OrderItem:
     """Individual item within an order."""
@@ -25,8 +45,8 @@ class OrderItem:
     product_id: int
     product_name: str
     product_sku: str
-    quantity: int
-    unit_price: Decimal
+    quantity: int = field(metadata={"min": 1})
+    unit_price: Decimal = field(metadata={"min": 0})
 
     @property
     def total_price(self) -> Decimal:
@@ -93,6 +113,30 @@ class Order:
         """Get formatted total amount string."""
         return f"${self.total_amount:.2f}"
 
+    def can_transition_to(self, status: OrderStatus) -> bool:
+        """Check whether the order may move to ``status``."""
+        return status in ORDER_TRANSITIONS[self.status]
+
+    def transition_to(self, status: OrderStatus, at: Optional[datetime] = None) -> None:
+        """Move the order to ``status``, stamping shipped/delivered dates.
+
+        Args:
+            status: The new status
+            at: When the change happened (defaults to now)
+
+        Raises:
+            InvalidTransitionError: If the transition table does not allow it
+        """
+        if not self.can_transition_to(status):
+            raise InvalidTransitionError(self.status, status)
+        if at is None:
+            at = datetime.now()
+        if status is OrderStatus.SHIPPED:
+            self.shipped_date = at
+        elif status is OrderStatus.DELIVERED:
+            self.delivered_date = at
+        self.status = status
+
     def add_item(self, item: OrderItem) -> None:
         """Add an item to the order."""
         self.items.append(item)
@@ -0,0 +1,316 @@
+"""Append-only, group-committed log of order creations and status changes."""
+
+import json
+import os
+import struct
+import threading
+import zlib
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterator, MutableMapping, NamedTuple, Optional
+
+from .order import Order, OrderItem, OrderStatus
+
+MAGIC = b"ORDEVT\x00\x01"
+# order id, timestamp (microseconds since 1970-01-01), status code, length of
+# the body that follows (24-bit), CRC-32 of the rest and the body
+_RECORD = struct.Struct("<QqB3sI")
+_PAYLOAD_SIZE = _RECORD.size - 4
+_EPOCH = datetime(1970, 1, 1)
+# Status code flag of a created order; the body holds the order as JSON
+_CREATED = 0x80
+_MAX_BODY = (1 << 24) - 1
+_NO_BODY = bytes(3)
+
+# Stored status codes; append new statuses, never renumber
+STATUS_CODES: Dict[OrderStatus, int] = {
+    OrderStatus.PENDING: 1,
+    OrderStatus.CONFIRMED: 2,
+    OrderStatus.PROCESSING: 3,
+    OrderStatus.SHIPPED: 4,
+    OrderStatus.DELIVERED: 5,
+    OrderStatus.CANCELLED: 6,
+}
+_STATUSES = {code: status for status, code in STATUS_CODES.items()}
+
+
+class OrderEvent(NamedTuple):
+    """An order moved to ``status`` at ``timestamp``, or was created (``order`` is set)."""
+
+    order_id: int
+    status: OrderStatus
+    timestamp: datetime
+    order: Optional[Order] = None
+
+
+def _order_body(order: Order) -> bytes:
+    def isoformat(value: Optional[datetime]) -> Optional[str]:
+        return value.isoformat() if value else None
+
+    return json.dumps({
+        "user_id": order.user_id,
+        "items": [[item.id, item.product_id, item.product_name, item.product_sku, item.quantity,
+                   str(item.unit_price)] for item in order.items],
+        "shipping_address": order.shipping_address,
+        "billing_address": order.billing_address,
+        "order_date": isoformat(order.order_date),
+        "shipped_date": isoformat(order.shipped_date),
+        "delivered_date": isoformat(order.delivered_date),
+        "notes": order.notes,
+    }, separators=(",", ":")).encode()
+
+
+def _order_from_body(order_id: int, status: OrderStatus, body: bytes) -> Order:
+    def parse(value: Optional[str]) -> Optional[datetime]:
+        return datetime.fromisoformat(value) if value else None
+
+    data = json.loads(body)
+    return Order(
+        id=order_id,
+        user_id=data["user_id"],
+        status=status,
+        items=[OrderItem(id=item_id, product_id=product_id, product_name=name, product_sku=sku,
+                         quantity=quantity, unit_price=Decimal(price))
+               for item_id, product_id, name, sku, quantity, price in data["items"]],
+        shipping_address=data["shipping_address"],
+        billing_address=data["billing_address"],
+        order_date=parse(data["order_date"]),
+        shipped_date=parse(data["shipped_date"]),
+        delivered_date=parse(data["delivered_date"]),
+        notes=data["notes"],
+    )
+
+
+def _encode(event: OrderEvent) -> bytes:
+    micros = (event.timestamp - _EPOCH) // timedelta(microseconds=1)
+    code = STATUS_CODES[event.status]
+    body = b""
+    if event.order is not None:
+        code |= _CREATED
+        body = _order_body(event.order)
+        if len(body) > _MAX_BODY:
+            raise ValueError(f"Order {event.order_id} is too large for the event log")
+    length = len(body).to_bytes(3, "little")
+    payload = _RECORD.pack(event.order_id, micros, code, length, 0)[:_PAYLOAD_SIZE]
+    return payload + struct.pack("<I", zlib.crc32(body, zlib.crc32(payload))) + body
+
+
+def _scan(data: bytes) -> Iterator[OrderEvent]:
+    """Decode records until the end or the first torn/corrupt record.
+
+    Returns (as the generator's return value) the length of the valid part.
+    """
+    offset = len(MAGIC)
+    size = len(data)
+    view = memoryview(data)
+    crc32 = zlib.crc32
+    while True:
+        # Status changes are fixed-size; unpack them in one pass up to the next creation
+        aligned = offset + (size - offset) // _RECORD.size * _RECORD.size
+        for order_id, micros, code, length, checksum in _RECORD.iter_unpack(view[offset:aligned]):
+            start = offset + _RECORD.size
+            found = crc32(data[offset:_PAYLOAD_SIZE + offset])
+            if length == _NO_BODY:
+                if found != checksum or code not in _STATUSES:
+                    return offset
+                offset = start
+                yield OrderEvent(order_id, _STATUSES[code], _EPOCH + timedelta(microseconds=micros))
+                continue
+            end = start + int.from_bytes(length, "little")
+            status = _STATUSES.get(code & ~_CREATED)
+            if end > size or crc32(data[start:end], found) != checksum or status is None or not code & _CREATED:
+                return offset
+            offset = end
+            yield OrderEvent(order_id, status, _EPOCH + timedelta(microseconds=micros),
+                             _order_from_body(order_id, status, data[start:end]))
+            break
+        else:
+            return offset
+
+
+def _valid_length(data: bytes) -> int:
+    events = _scan(data)
+    while True:
+        try:
+            next(events)
+        except StopIteration as stop:
+            return stop.value
+
+
+def read_order_events(path: str) -> Iterator[OrderEvent]:
+    """Read the valid events of a log, oldest first.
+
+    Reading stops at a torn or corrupt record (e.g. after a crash mid-write).
+    """
+    if not os.path.exists(path):
+        return iter(())
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not an order event log")
+    return _scan(data)
+
+
+def apply_order_events(orders: MutableMapping[int, Order], events: Iterator[OrderEvent]) -> int:
+    """Replay events onto orders, skipping unknown orders and stale events.
+
+    Created orders are added unless an order with their id is already known.
+
+    Returns:
+        Number of events applied
+    """
+    applied = 0
+    for order_id, status, timestamp, created in events:
+        if created is not None:
+            if order_id not in orders:
+                orders[order_id] = created
+                applied += 1
+            continue
+        order = orders.get(order_id)
+        if order is not None and order.can_transition_to(status):
+            order.transition_to(status, at=timestamp)
+            applied += 1
+    return applied
+
+
+class OrderEventLog:
+    """Durable, append-only log of order creations and status changes.
+
+    Status changes are fixed-size records; a creation record is followed by
+    the order as JSON. Records are checksummed, so replay is a single read
+    and a torn tail is detected and cut off when the log is reopened. Appends
+    from many threads are group-committed: a writer thread writes everything
+    queued since its last flush with one ``write`` and one ``fsync``, and
+    ``append`` returns once the batch containing its event is on disk.
+
+    Args:
+        path: Log file; created if missing
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.events_written = 0
+        self.batches = 0
+
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            if not data.startswith(MAGIC):
+                raise ValueError(f"{path} is not an order event log")
+            valid = _valid_length(data)
+            self._file = open(path, "r+b")
+            if valid < len(data):
+                self._file.truncate(valid)
+            self._file.seek(valid)
+        else:
+            self._file = open(path, "wb")
+            self._file.write(MAGIC)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        self._done = threading.Condition(self._lock)
+        self._pending = []
+        self._appended = 0
+        self._durable = 0
+        self._closing = False
+        self._error: Optional[OSError] = None
+        self._writer = threading.Thread(target=self._run, name="order-event-log", daemon=True)
+        self._writer.start()
+
+    def append(self, order_id: int, status: OrderStatus, timestamp: Optional[datetime] = None,
+               wait: bool = True) -> OrderEvent:
+        """Record a status change.
+
+        Args:
+            order_id: The order
+            status: Its new status
+            timestamp: When it changed (defaults to now)
+            wait: Block until the event is durable
+
+        Returns:
+            The recorded event
+        """
+        return self._append(OrderEvent(order_id, status, timestamp or datetime.now()), wait)
+
+    def append_created(self, order: Order, wait: bool = True) -> OrderEvent:
+        """Record a new order; replay adds it to the orders.
+
+        Args:
+            order: The order, in its initial status
+            wait: Block until the event is durable
+
+        Returns:
+            The recorded event
+        """
+        return self._append(OrderEvent(order.id, order.status, order.order_date or datetime.now(), order), wait)
+
+    def _append(self, event: OrderEvent, wait: bool) -> OrderEvent:
+        record = _encode(event)
+        with self._lock:
+            if self._error is not None:
+                raise OSError(f"Order event log is unusable: {self._error}")
+            if self._closing:
+                raise ValueError("Order event log is closed")
+            self._pending.append(record)
+            self._appended += 1
+            sequence = self._appended
+            self._work.notify()
+            if wait:
+                self._wait_for(sequence)
+        return event
+
+    def flush(self) -> None:
+        """Block until every event appended so far is durable."""
+        with self._lock:
+            self._wait_for(self._appended)
+
+    def _wait_for(self, sequence: int) -> None:
+        while self._durable < sequence and self._error is None:
+            self._done.wait()
+        if self._error is not None:
+            raise OSError(f"Order event log is unusable: {self._error}")
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._pending and not self._closing:
+                    self._work.wait()
+                if not self._pending:
+                    return
+                batch, self._pending = self._pending, []
+                target = self._appended
+            try:
+                self._file.write(b"".join(batch))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                with self._lock:
+                    self._error = e
+                    self._done.notify_all()
+                return
+            with self._lock:
+                self._durable = target
+                self.events_written += len(batch)
+                self.batches += 1
+                self._done.notify_all()
+
+    def close(self) -> None:
+        """Flush pending events and close the file."""
+        with self._lock:
+            self._closing = True
+            self._work.notify()
+        self._writer.join()
+        self._file.close()
+
+    def __enter__(self) -> "OrderEventLog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
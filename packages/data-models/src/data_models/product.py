@@ -41,10 +41,10 @@ class Product:
     id: int
     name: str
     description: str
-    price: Decimal
+    price: Decimal = field(metadata={"min": 0})
     sku: str
     category_id: int
-    stock_quantity: int = 0
+    stock_quantity: int = field(default=0, metadata={"min": 0})
     is_active: bool = True
     images: List[str] = field(default_factory=list)
     tags: List[str] = field(default_factory=list)
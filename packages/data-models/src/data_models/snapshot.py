@@ -0,0 +1,397 @@
+"""Columnar binary snapshots of model collections."""
+
+import dataclasses
+import json
+import mmap
+import struct
+import typing
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+SCHEMA_VERSION = 1
+MAGIC = b"DMSNAP\x00\x01"
+_PREFIX = struct.Struct("<8sI")
+_ALIGN = 8
+_EPOCH = datetime(1970, 1, 1)
+_INT_NULL = -(1 << 63)
+
+
+def _unwrap_optional(hint: Any) -> Any:
+    if typing.get_origin(hint) is typing.Union:
+        args = [arg for arg in typing.get_args(hint) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return hint
+
+
+def _column_kind(hint: Any) -> tuple:
+    """Map a type hint to (kind, child model or enum class)."""
+    hint = _unwrap_optional(hint)
+    if typing.get_origin(hint) in (list, List):
+        (item,) = typing.get_args(hint)
+        if dataclasses.is_dataclass(item):
+            return "table", item
+        return "str_list", None
+    if isinstance(hint, type) and issubclass(hint, Enum):
+        return "enum", hint
+    for kind, python_type in (("bool", bool), ("int", int), ("float", float), ("decimal", Decimal),
+                              ("datetime", datetime), ("str", str)):
+        if hint is python_type:
+            return kind, None
+    raise TypeError(f"Unsupported field type for snapshots: {hint!r}")
+
+
+class _Writer:
+    """Accumulates aligned binary parts and describes them in the header."""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.size = 0
+
+    def add(self, data: bytes) -> List[int]:
+        padding = -self.size % _ALIGN
+        if padding:
+            self.parts.append(b"\x00" * padding)
+            self.size += padding
+        location = [self.size, len(data)]
+        self.parts.append(data)
+        self.size += len(data)
+        return location
+
+    def add_strings(self, values: List[Optional[str]]) -> Dict[str, List[int]]:
+        offsets = array("Q", [0])
+        heap = bytearray()
+        for value in values:
+            if value is not None:
+                heap += value.encode()
+            offsets.append(len(heap))
+        return {"offsets": self.add(offsets.tobytes()), "heap": self.add(bytes(heap))}
+
+    def add_table(self, model: type, rows: List[Any]) -> List[dict]:
+        hints = typing.get_type_hints(model)
+        columns = []
+        for model_field in dataclasses.fields(model):
+            values = [getattr(row, model_field.name) for row in rows]
+            columns.append(self.add_column(model_field.name, hints[model_field.name], values))
+        return columns
+
+    def add_column(self, name: str, hint: Any, values: List[Any]) -> dict:
+        kind, extra = _column_kind(hint)
+        column: Dict[str, Any] = {"name": name, "kind": kind}
+        if any(value is None for value in values):
+            column["validity"] = self.add(bytes(value is not None for value in values))
+
+        if kind == "bool":
+            column["data"] = self.add(bytes(bool(value) for value in values))
+        elif kind == "int":
+            column["data"] = self.add(array("q", (_INT_NULL if v is None else v for v in values)).tobytes())
+        elif kind == "float":
+            column["data"] = self.add(array("d", (0.0 if v is None else v for v in values)).tobytes())
+        elif kind == "decimal":
+            scale = max((-v.as_tuple().exponent for v in values if v is not None), default=0)
+            scale = max(scale, 0)
+            column["scale"] = scale
+            units = []
+            for value in values:
+                unit = 0 if value is None else int(value.scaleb(scale))
+                if not -(1 << 63) < unit < (1 << 63):
+                    raise ValueError(f"Decimal value {value} of '{name}' does not fit a snapshot column")
+                units.append(unit)
+            column["data"] = self.add(array("q", units).tobytes())
+        elif kind == "datetime":
+            micros = []
+            for value in values:
+                if value is not None and value.tzinfo is not None:
+                    raise ValueError(f"Timezone-aware datetimes are not supported ('{name}')")
+                micros.append(0 if value is None else (value - _EPOCH) // timedelta(microseconds=1))
+            column["data"] = self.add(array("q", micros).tobytes())
+        elif kind == "enum":
+            members = list(extra)
+            column["values"] = [member.value for member in members]
+            column["data"] = self.add(bytes(0 if v is None else members.index(v) for v in values))
+        elif kind == "str":
+            column.update(self.add_strings(values))
+        elif kind == "str_list":
+            lists = array("Q", [0])
+            flat = []
+            for value in values:
+                flat.extend(value or ())
+                lists.append(len(flat))
+            column["lists"] = self.add(lists.tobytes())
+            column.update(self.add_strings(flat))
+        elif kind == "table":
+            rows_index = array("Q", [0])
+            children = []
+            for value in values:
+                children.extend(value or ())
+                rows_index.append(len(children))
+            column["rows"] = self.add(rows_index.tobytes())
+            column["model"] = extra.__name__
+            column["columns"] = self.add_table(extra, children)
+        return column
+
+
+def write_snapshot(path: str, objects: Iterable[Any], model: type) -> int:
+    """Write a collection of model objects to a snapshot file.
+
+    Objects are stored sorted by ``id`` so readers can look them up by
+    binary search without building an index.
+
+    Args:
+        path: Output file path
+        objects: Instances of ``model``
+        model: Dataclass of the objects (e.g. ``Product``, ``User``, ``Order``)
+
+    Returns:
+        Number of objects written
+    """
+    rows = sorted(objects, key=lambda obj: obj.id)
+    writer = _Writer()
+    header = {
+        "schema_version": SCHEMA_VERSION,
+        "model": model.__name__,
+        "count": len(rows),
+        "columns": writer.add_table(model, rows),
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    data_start = _PREFIX.size + len(header_bytes)
+    data_start += -data_start % _ALIGN
+
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\x00" * (data_start - f.tell()))
+        for part in writer.parts:
+            f.write(part)
+    return len(rows)
+
+
+class _Column:
+    """Read-only, zero-copy view of one snapshot column."""
+
+    def __init__(self, spec: dict, view: memoryview, models: Dict[str, type], hint: Any = None):
+        self.name = spec["name"]
+        self.kind = spec["kind"]
+        self.spec = spec
+
+        def part(key: str, fmt: str = "B") -> memoryview:
+            offset, length = spec[key]
+            return view[offset:offset + length].cast(fmt)
+
+        self.validity = part("validity") if "validity" in spec else None
+        if self.kind in ("int", "decimal", "datetime"):
+            self.data = part("data", "q")
+        elif self.kind == "float":
+            self.data = part("data", "d")
+        elif self.kind in ("bool", "enum"):
+            self.data = part("data")
+        if self.kind in ("str", "str_list"):
+            self.offsets = part("offsets", "Q")
+            self.heap = part("heap")
+        if self.kind == "str_list":
+            self.lists = part("lists", "Q")
+        if self.kind == "table":
+            self.rows = part("rows", "Q")
+            self.model = models[spec["model"]]
+            self.columns = _table_columns(self.model, spec["columns"], view, models)
+        if self.kind == "enum":
+            enum_type = _unwrap_optional(hint)
+            self.enum_values = [enum_type(value) if enum_type else value for value in spec["values"]]
+        if self.kind == "decimal":
+            self.scale = spec["scale"]
+
+    def _string(self, index: int) -> str:
+        return str(self.heap[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+    def get(self, row: int) -> Any:
+        if self.validity is not None and not self.validity[row]:
+            return None
+        kind = self.kind
+        if kind == "int":
+            return self.data[row]
+        if kind == "str":
+            return self._string(row)
+        if kind == "decimal":
+            return Decimal(self.data[row]).scaleb(-self.scale)
+        if kind == "bool":
+            return bool(self.data[row])
+        if kind == "float":
+            return self.data[row]
+        if kind == "datetime":
+            return _EPOCH + timedelta(microseconds=self.data[row])
+        if kind == "enum":
+            return self.enum_values[self.data[row]]
+        if kind == "str_list":
+            return [self._string(i) for i in range(self.lists[row], self.lists[row + 1])]
+        if kind == "table":
+            return [_materialize(self.model, self.columns, child)
+                    for child in range(self.rows[row], self.rows[row + 1])]
+        raise TypeError(f"Unknown column kind '{kind}'")
+
+
+def _table_columns(model: type, specs: List[dict], view: memoryview, models: Dict[str, type]) -> List[_Column]:
+    hints = typing.get_type_hints(model)
+    return [_Column(spec, view, models, hints.get(spec["name"])) for spec in specs]
+
+
+def _materialize(model: type, columns: List[_Column], row: int) -> Any:
+    return model(**{column.name: column.get(row) for column in columns})
+
+
+class Snapshot:
+    """Memory-mapped snapshot file with lazily materialized rows.
+
+    Columns are read straight from the mapped pages, so opening a snapshot
+    costs only the header parse, and processes mapping the same file share
+    its pages. ``snapshot[i]`` builds the model object for row ``i`` on
+    access; ``get(id)`` finds a row by id with a binary search.
+
+    Args:
+        path: Snapshot file path
+        model: Expected model class (checked against the header)
+    """
+
+    def __init__(self, path: str, model: type):
+        self.path = path
+        self.model = model
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = _PREFIX.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a data_models snapshot")
+        header = json.loads(self._mmap[_PREFIX.size:_PREFIX.size + header_length])
+        if header["schema_version"] != SCHEMA_VERSION or header["model"] != model.__name__:
+            self.close()
+            raise ValueError(
+                f"{path} holds {header['model']} schema v{header['schema_version']}, "
+                f"expected {model.__name__} schema v{SCHEMA_VERSION}"
+            )
+        data_start = _PREFIX.size + header_length
+        data_start += -data_start % _ALIGN
+
+        self.header = header
+        self._view = memoryview(self._mmap)[data_start:]
+        models = {model.__name__: model}
+        for hint in typing.get_type_hints(model).values():
+            kind, extra = _column_kind(hint)
+            if kind == "table":
+                models[extra.__name__] = extra
+        columns = _table_columns(model, header["columns"], self._view, models)
+        self._columns = {column.name: column for column in columns}
+        self._column_list = columns
+        self._ids = self._columns["id"].data
+
+    def __len__(self) -> int:
+        return self.header["count"]
+
+    def __getitem__(self, row: int) -> Any:
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return _materialize(self.model, self._column_list, row)
+
+    def __iter__(self) -> Iterator[Any]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def ids(self) -> memoryview:
+        """Sorted ids of all rows (zero-copy)."""
+        return self._ids
+
+    def find_row(self, object_id: int) -> Optional[int]:
+        """Row number of an id, or None."""
+        row = bisect_left(self._ids, object_id)
+        if row < len(self._ids) and self._ids[row] == object_id:
+            return row
+        return None
+
+    def get(self, object_id: int) -> Optional[Any]:
+        """Materialize the object with ``object_id``, or None."""
+        row = self.find_row(object_id)
+        return None if row is None else self[row]
+
+    def value(self, row: int, field_name: str) -> Any:
+        """Read one field of a row without building the model object."""
+        return self._columns[field_name].get(row)
+
+    def close(self) -> None:
+        """Release the mapping and the file."""
+        self._columns = {}
+        self._column_list = []
+        self._ids = None
+        self._view = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Views handed out to callers still reference the mapping
+            pass
+        self._file.close()
+
+
+class SnapshotStore(MutableMapping):
+    """Id -> object mapping backed by a snapshot with an in-memory overlay.
+
+    Objects are materialized from the snapshot on first access and kept in
+    the overlay, so mutations of returned objects persist. New and replaced
+    objects live in the overlay; deletions hide snapshot rows.
+    """
+
+    def __init__(self, snapshot: Snapshot):
+        self.snapshot = snapshot
+        self._overlay: Dict[int, Any] = {}
+        self._deleted: set = set()
+        # Kept up to date by writes and deletions, so len() does not scan the overlay
+        self._count = len(snapshot)
+
+    def __getitem__(self, object_id: int) -> Any:
+        if object_id in self._overlay:
+            return self._overlay[object_id]
+        if object_id in self._deleted:
+            raise KeyError(object_id)
+        obj = self.snapshot.get(object_id)
+        if obj is None:
+            raise KeyError(object_id)
+        # Concurrent first reads must share one object (setdefault is atomic)
+        return self._overlay.setdefault(object_id, obj)
+
+    def __setitem__(self, object_id: int, obj: Any) -> None:
+        if object_id not in self:
+            self._count += 1
+        self._overlay[object_id] = obj
+        self._deleted.discard(object_id)
+
+    def __delitem__(self, object_id: int) -> None:
+        if object_id not in self:
+            raise KeyError(object_id)
+        self._overlay.pop(object_id, None)
+        self._deleted.add(object_id)
+        self._count -= 1
+
+    def __contains__(self, object_id: object) -> bool:
+        if object_id in self._overlay:
+            return True
+        return object_id not in self._deleted and self.snapshot.find_row(object_id) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        seen = set()
+        for object_id in self.snapshot.ids():
+            if object_id not in self._deleted:
+                seen.add(object_id)
+                yield object_id
+        for object_id in list(self._overlay):
+            if object_id not in seen:
+                yield object_id
+
+    def __len__(self) -> int:
+        return self._count
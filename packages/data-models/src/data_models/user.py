@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -11,7 +11,7 @@ class User:
 
     id: int
     username: str
-    email: str
+    email: str = field(metadata={"format": "email"})
     first_name: str
     last_name: str
     is_active: bool = True
@@ -51,7 +51,7 @@ class UserProfile:
 
     user_id: int
     bio: Optional[str] = None
-    avatar_url: Optional[str] = None
+    avatar_url: Optional[str] = field(default=None, metadata={"format": "url"})
     phone_number: Optional[str] = None
     date_of_birth: Optional[datetime] = None
     location: Optional[str] = None
@@ -0,0 +1,118 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from data_models import Category, CategoryTree, Product
+
+CREATED = datetime(2024, 1, 1)
+
+
+def make_category(category_id, parent_id=None):
+    return Category(id=category_id, name=f"Category {category_id}", parent_id=parent_id, created_at=CREATED)
+
+
+def random_tree(rng, count):
+    categories = [make_category(1)]
+    for category_id in range(2, count + 1):
+        categories.append(make_category(category_id, rng.choice([None, rng.randrange(1, category_id)])))
+    rng.shuffle(categories)
+    return CategoryTree(categories)
+
+
+def reference_subtree(tree, category_id):
+    node = tree.categories[category_id].to_dict()
+    node["ancestors"] = reference_ancestors(tree, category_id)
+    children = sorted(other.id for other in tree.categories.values() if other.parent_id == category_id)
+    node["children"] = [reference_subtree(tree, child_id) for child_id in children]
+    return node
+
+
+def reference_ancestors(tree, category_id):
+    ancestors = []
+    parent_id = tree.categories[category_id].parent_id
+    while parent_id is not None:
+        ancestors.append(parent_id)
+        parent_id = tree.categories[parent_id].parent_id
+    return ancestors[::-1]
+
+
+def assert_consistent(tree):
+    for category_id in tree.categories:
+        assert tree.ancestors(category_id) == reference_ancestors(tree, category_id)
+        assert tree.subtree(category_id) == reference_subtree(tree, category_id)
+        below = {other for other in tree.categories if category_id in reference_ancestors(tree, other)}
+        assert tree.descendants(category_id) == below
+
+
+def test_subtree_matches_the_parent_links():
+    tree = random_tree(random.Random(5), 60)
+    assert_consistent(tree)
+
+
+def test_deep_subtree_does_not_recurse():
+    tree = CategoryTree(make_category(category_id, category_id - 1 or None) for category_id in range(1, 2001))
+    node = tree.subtree(1)
+    depth = 1
+    while node["children"]:
+        (node,) = node["children"]
+        depth += 1
+    assert depth == 2000 and node["id"] == 2000
+    assert node["ancestors"] == list(range(1, 2000))
+
+
+def test_moves_keep_the_closure_consistent():
+    rng = random.Random(9)
+    tree = random_tree(rng, 40)
+    owners = {product_id: rng.randrange(1, 41) for product_id in range(1, 81)}
+    for product_id, category_id in owners.items():
+        tree.assign_product(product_id, category_id)
+    for _ in range(200):
+        category_id = rng.randrange(1, 41)
+        new_parent_id = rng.choice([None, rng.randrange(1, 41)])
+        if new_parent_id is not None and (new_parent_id == category_id
+                                          or category_id in reference_ancestors(tree, new_parent_id)):
+            with pytest.raises(ValueError, match="below its own subtree"):
+                tree.move_category(category_id, new_parent_id)
+        else:
+            tree.move_category(category_id, new_parent_id)
+            assert tree.categories[category_id].parent_id == new_parent_id
+    assert_consistent(tree)
+    for category_id in tree.categories:
+        expected = sorted(product_id for product_id, owner in owners.items()
+                          if owner == category_id or category_id in reference_ancestors(tree, owner))
+        assert tree.product_ids(category_id, recursive=True) == expected
+
+
+def test_move_rejects_cycles_and_unknown_parents():
+    tree = CategoryTree([make_category(1), make_category(2, 1), make_category(3, 2)])
+    for new_parent_id in (1, 2, 3):
+        with pytest.raises(ValueError, match="below its own subtree"):
+            tree.move_category(1, new_parent_id)
+    with pytest.raises(ValueError, match="does not exist"):
+        tree.move_category(3, 99)
+    assert [tree.categories[category_id].parent_id for category_id in (1, 2, 3)] == [None, 1, 2]
+    assert_consistent(tree)
+
+    tree.move_category(3, None)
+    tree.move_category(1, 3)
+    assert tree.ancestors(2) == [3, 1]
+    assert tree.children(3) == [1]
+    assert_consistent(tree)
+
+
+def test_add_categories_rejects_cycles():
+    with pytest.raises(ValueError, match="cycle"):
+        CategoryTree([make_category(1, 3), make_category(2, 1), make_category(3, 2)])
+    with pytest.raises(ValueError, match="does not exist"):
+        CategoryTree([make_category(1, 42)])
+
+
+def test_products_follow_their_category():
+    tree = CategoryTree([make_category(1), make_category(2, 1)])
+    tree.add_product(Product(id=7, name="Phone", description="", price=1, sku="P-7", category_id=2))
+    assert tree.product_ids(1) == [] and tree.product_ids(1, recursive=True) == [7]
+    tree.assign_product(7, 1)
+    assert tree.product_ids(2) == [] and tree.product_ids(1) == [7]
+    tree.remove_product(7)
+    assert tree.product_ids(1, recursive=True) == []
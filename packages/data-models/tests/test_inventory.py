@@ -0,0 +1,101 @@
+import random
+import sys
+import threading
+
+import pytest
+
+from data_models import Inventory, InventoryError, OutOfStockError, UnknownProductError
+
+
+def make_inventory(stock):
+    changes = []
+    inventory = Inventory(on_change=lambda product_id, available: changes.append((product_id, available)))
+    for product_id, quantity in stock.items():
+        inventory.set_stock(product_id, quantity)
+    return inventory, changes
+
+
+def test_shortage_reserves_nothing():
+    inventory, changes = make_inventory({1: 5, 2: 1})
+    with pytest.raises(OutOfStockError) as error:
+        inventory.reserve("order-1", [(1, 3), (2, 2)])
+
+    assert error.value.shortages == {2: (2, 1)}
+    assert (inventory.available(1), inventory.available(2)) == (5, 1)
+    assert inventory.reservation("order-1") == {}
+    assert changes == []
+    # The failed id can be used again
+    assert inventory.reserve("order-1", {1: 5}) == {1: 5}
+
+
+def test_repeated_lines_are_added_up():
+    inventory, changes = make_inventory({1: 5})
+    assert inventory.reserve("order-1", [(1, 2), (1, 2)]) == {1: 4}
+    assert inventory.available(1) == 1
+    assert changes == [(1, 1)]
+    with pytest.raises(OutOfStockError):
+        inventory.reserve("order-2", [(1, 1), (1, 1)])
+
+
+def test_invalid_reservations():
+    inventory, _ = make_inventory({1: 5})
+    with pytest.raises(UnknownProductError):
+        inventory.reserve("order-1", {1: 1, 99: 1})
+    for quantity in (0, -1, 1.5, True):
+        with pytest.raises(InventoryError):
+            inventory.reserve("order-1", {1: quantity})
+    inventory.reserve("order-1", {1: 1})
+    with pytest.raises(InventoryError):
+        inventory.reserve("order-1", {1: 1})
+    assert inventory.available(1) == 4
+
+
+def test_release_and_commit():
+    inventory, _ = make_inventory({1: 5, 2: 5})
+    inventory.reserve("cancelled", {1: 2, 2: 3})
+    inventory.reserve("shipped", {1: 1})
+
+    assert inventory.release("cancelled")
+    assert not inventory.release("cancelled")
+    assert inventory.commit("shipped")
+    assert not inventory.release("shipped")
+    assert (inventory.available(1), inventory.available(2)) == (4, 5)
+
+
+def test_concurrent_reservations_never_oversell():
+    stock = {product_id: 50 for product_id in range(1, 6)}
+    inventory, _ = make_inventory(stock)
+    reserved = []
+    start = threading.Barrier(8)
+
+    def order_lines(worker):
+        rng = random.Random(worker)
+        start.wait()
+        for number in range(200):
+            lines = [(rng.randint(1, 5), rng.randint(1, 3)) for _ in range(rng.randint(1, 4))]
+            try:
+                reserved.append(inventory.reserve((worker, number), lines))
+            except OutOfStockError:
+                pass
+            if number % 7 == 0:
+                inventory.release((worker, number - 1))
+
+    workers = [threading.Thread(target=order_lines, args=(worker,)) for worker in range(8)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible
+    try:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    held = {product_id: 0 for product_id in stock}
+    for reservation_id in [(worker, number) for worker in range(8) for number in range(200)]:
+        for product_id, quantity in inventory.reservation(reservation_id).items():
+            held[product_id] += quantity
+    for product_id, quantity in stock.items():
+        assert inventory.available(product_id) >= 0
+        assert inventory.available(product_id) + held[product_id] == quantity
+    assert reserved
@@ -0,0 +1,141 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from data_models import (
+    Order, OrderEventLog, OrderItem, OrderStatus, apply_order_events, read_order_events,
+)
+
+START = datetime(2024, 5, 1, 12, 30, 15, 250)
+
+
+def make_order(order_id, lines=2):
+    order = Order(id=order_id, user_id=order_id * 10, status=OrderStatus.PENDING, order_date=START,
+                  shipping_address="1 Main St", notes="ring twice" if order_id % 2 else None)
+    for line in range(1, lines + 1):
+        order.add_item(OrderItem(id=line, product_id=100 + line, product_name=f"Product é {line}",
+                                 product_sku=f"SKU-{line}", quantity=line, unit_price=Decimal("19.99")))
+    return order
+
+
+def replay(path):
+    orders = {}
+    applied = apply_order_events(orders, read_order_events(path))
+    return orders, applied
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "orders.log")
+    expected = {order_id: make_order(order_id) for order_id in (1, 2, 3)}
+    steps = [
+        (1, OrderStatus.CONFIRMED), (1, OrderStatus.PROCESSING), (1, OrderStatus.SHIPPED),
+        (2, OrderStatus.CANCELLED), (1, OrderStatus.DELIVERED),
+    ]
+    with OrderEventLog(path) as log:
+        for order in expected.values():
+            log.append_created(order)
+        for minutes, (order_id, status) in enumerate(steps, start=1):
+            at = START + timedelta(minutes=minutes)
+            log.append(order_id, status, at)
+            expected[order_id].transition_to(status, at=at)
+
+    orders, applied = replay(path)
+    assert applied == len(expected) + len(steps)
+    assert orders == expected
+    assert orders[1].delivered_date == START + timedelta(minutes=5)
+    assert orders[3].items[0].unit_price == Decimal("19.99")
+
+
+def test_replay_skips_unknown_stale_and_known_orders(tmp_path):
+    path = str(tmp_path / "orders.log")
+    with OrderEventLog(path) as log:
+        log.append(99, OrderStatus.CONFIRMED)  # never created
+        log.append_created(make_order(1))
+        log.append(1, OrderStatus.DELIVERED)  # not reachable from pending
+        log.append(1, OrderStatus.CONFIRMED)
+
+    known = make_order(1)
+    known.notes = "loaded from a snapshot"
+    orders = {1: known}
+    assert apply_order_events(orders, read_order_events(path)) == 1
+    assert orders[1] is known
+    assert known.status is OrderStatus.CONFIRMED
+
+
+def test_torn_tail_is_cut_off_on_reopen(tmp_path):
+    path = str(tmp_path / "orders.log")
+    with OrderEventLog(path) as log:
+        log.append_created(make_order(1))
+        log.append(1, OrderStatus.CONFIRMED)
+        log.append_created(make_order(2))
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.truncate(size - 5)
+
+    assert set(replay(path)[0]) == {1}
+    with OrderEventLog(path) as log:
+        log.append(1, OrderStatus.PROCESSING)
+    orders, applied = replay(path)
+    assert applied == 3
+    assert orders[1].status is OrderStatus.PROCESSING
+
+
+def test_corrupt_record_ends_replay(tmp_path):
+    path = str(tmp_path / "orders.log")
+    with OrderEventLog(path) as log:
+        log.append_created(make_order(1))
+        offset = os.path.getsize(path)
+        log.append_created(make_order(2))
+        log.append(1, OrderStatus.CONFIRMED)
+    with open(path, "r+b") as f:
+        f.seek(offset + 40)  # inside the body of order 2
+        byte = f.read(1)
+        f.seek(offset + 40)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    orders, applied = replay(path)
+    assert applied == 1
+    assert orders[1].status is OrderStatus.PENDING
+
+
+def test_concurrent_appends_are_group_committed(tmp_path):
+    path = str(tmp_path / "orders.log")
+    log = OrderEventLog(path)
+
+    def create(first):
+        for order_id in range(first, first + 25):
+            log.append_created(make_order(order_id, lines=1))
+            log.append(order_id, OrderStatus.CONFIRMED)
+
+    threads = [threading.Thread(target=create, args=(first,)) for first in range(1, 201, 25)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    log.close()
+
+    assert log.events_written == 400
+    assert log.batches <= 400
+    orders, applied = replay(path)
+    assert applied == 400
+    assert sorted(orders) == list(range(1, 201))
+    assert all(order.status is OrderStatus.CONFIRMED for order in orders.values())
+
+
+def test_closed_log_refuses_appends(tmp_path):
+    log = OrderEventLog(str(tmp_path / "orders.log"))
+    log.close()
+    with pytest.raises(ValueError):
+        log.append(1, OrderStatus.CONFIRMED)
+
+
+def test_other_files_are_refused(tmp_path):
+    path = tmp_path / "orders.log"
+    path.write_bytes(b"not a log")
+    with pytest.raises(ValueError):
+        OrderEventLog(str(path))
+    with pytest.raises(ValueError):
+        read_order_events(str(path))
@@ -0,0 +1,110 @@
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from data_models import (
+    Category, Order, OrderItem, OrderStatus, Product, Snapshot, SnapshotStore, User, write_snapshot,
+)
+
+START = datetime(2024, 5, 1, 12, 30, 15, 250)
+
+
+def make_products(count):
+    return [Product(id=product_id * 3, name=f"Product é {product_id}", description="" if product_id % 4 else "x" * 50,
+                    price=Decimal(product_id) / 8, sku=f"SKU-{product_id}", category_id=product_id % 5,
+                    stock_quantity=product_id * 7, is_active=product_id % 3 != 0,
+                    images=[f"{product_id}.png"] * (product_id % 3), tags=[f"tag{tag}" for tag in range(product_id % 4)],
+                    created_at=START + timedelta(hours=product_id), updated_at=START)
+            for product_id in range(1, count + 1)]
+
+
+def make_orders(count):
+    orders = []
+    statuses = list(OrderStatus)
+    for order_id in range(1, count + 1):
+        order = Order(id=order_id, user_id=order_id % 7, status=statuses[order_id % len(statuses)],
+                      order_date=START + timedelta(minutes=order_id),
+                      shipped_date=START + timedelta(days=1) if order_id % 2 else None,
+                      notes="ring twice" if order_id % 3 == 0 else None)
+        for line in range(1, order_id % 4 + 1):
+            order.items.append(OrderItem(id=line, product_id=line * 3, product_name=f"Product {line}",
+                                         product_sku=f"SKU-{line}", quantity=line, unit_price=Decimal("19.99")))
+        orders.append(order)
+    return orders
+
+
+def open_store(path, objects, model):
+    write_snapshot(str(path), objects, model)
+    return SnapshotStore(Snapshot(str(path), model))
+
+
+@pytest.mark.parametrize("model,objects", [
+    (Product, make_products(40)),
+    (Order, make_orders(30)),
+    (User, [User(id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com", first_name="Jane",
+                 last_name="Doe", is_active=user_id % 2 == 0, created_at=START) for user_id in range(1, 20)]),
+    (Category, [Category(id=1, name="Root", created_at=START),
+                Category(id=2, name="Child", description="below root", parent_id=1, created_at=START)]),
+])
+def test_round_trip(tmp_path, model, objects):
+    path = tmp_path / "objects.snap"
+    assert write_snapshot(str(path), reversed(objects), model) == len(objects)
+    with Snapshot(str(path), model) as snapshot:
+        assert len(snapshot) == len(objects)
+        assert list(snapshot) == objects
+        assert list(snapshot.ids()) == [obj.id for obj in objects]
+        assert snapshot.get(objects[-1].id) == objects[-1]
+        assert snapshot.get(objects[-1].id + 1) is None
+
+
+def test_wrong_model_is_rejected(tmp_path):
+    path = tmp_path / "users.snap"
+    write_snapshot(str(path), [], User)
+    with pytest.raises(ValueError, match="expected Product"):
+        Snapshot(str(path), Product)
+
+
+def test_overlay_writes_and_deletes_match_a_dict(tmp_path):
+    products = make_products(40)
+    store = open_store(tmp_path / "products.snap", products, Product)
+    expected = {product.id: product for product in products}
+    rng = random.Random(3)
+    try:
+        for step in range(400):
+            object_id = rng.randrange(0, 130)
+            action = rng.random()
+            if action < 0.4:
+                product = make_products(1)[0]
+                product.id = object_id
+                product.name = f"Written {step}"
+                store[object_id] = expected[object_id] = product
+            elif action < 0.7:
+                if object_id in expected:
+                    del store[object_id]
+                    del expected[object_id]
+                else:
+                    with pytest.raises(KeyError):
+                        del store[object_id]
+            else:
+                assert store.get(object_id) == expected.get(object_id)
+            assert len(store) == len(expected)
+            assert (object_id in store) == (object_id in expected)
+
+        assert sorted(store) == sorted(expected)
+        assert {object_id: store[object_id] for object_id in store} == expected
+    finally:
+        store.snapshot.close()
+
+
+def test_materialized_objects_are_shared_and_mutable(tmp_path):
+    store = open_store(tmp_path / "products.snap", make_products(5), Product)
+    try:
+        product = store[3]
+        assert store[3] is product
+        product.stock_quantity = 1
+        assert store[3].stock_quantity == 1
+        assert len(store) == 5
+    finally:
+        store.snapshot.close()